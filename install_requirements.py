@@ -25,6 +25,8 @@ def install_requirements() -> None:
         successful = False
     if not install_matplotlib():
         successful = False
+    if not install_pyroute2():
+        successful = False
 
     if successful:
         print_log("All dependencies installed.")
@@ -157,5 +159,24 @@ def install_pycurl() -> bool:
     return True
 
 
+def install_pyroute2() -> bool:
+    """
+    Installs pyroute2 to venv using pip.
+    :return: True for success, False otherwise
+    """
+    print("Install pyroute2... ", end="", flush=True)
+    try:
+        subprocess.check_output(["bin/pip", "install", "pyroute2"])
+    except FileNotFoundError:
+        try:
+            subprocess.check_output(["bin/pip", "install", "python3-pyroute2"])
+        except FileNotFoundError:
+            print("failed.")
+            return False
+
+    print("done.")
+    return True
+
+
 if __name__ == "__main__":
     install_requirements()
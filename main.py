@@ -1,7 +1,13 @@
 from src.Client import *
 from src.Monitoring import Monitoring
 from src.Server import *
+from src.exchanges.Bulk import *
 from src.exchanges.HTTP import *
+from src.exchanges.HTTPKeepAlive import *
+from src.exchanges.HTTPLoad import *
+from src.exchanges.TCPStream import *
+from src.exchanges.UDPEcho import *
+from src.vpns.HelperClient import start_helper, stop_helper
 from src.vpns.NoVPN import *
 from src.vpns.Rosenpass import *
 from src.vpns.WireGuard import *
@@ -16,7 +22,8 @@ class HandleInput:
     valid_inputs = False
 
     def __init__(
-            self, role, vpn_option, exchange_type, operation, iterations, directory, auto
+            self, role, vpn_option, exchange_type, operation, iterations, directory, auto, persistent=False,
+            duration=None, exchange_options=()
     ) -> None:
         """
         Sets all values to the given inputs and checks the values.
@@ -27,6 +34,9 @@ class HandleInput:
         :param iterations: number of iterations of exchanges
         :param directory: directory to save the keys (only for keysend option)
         :param auto: activates monitoring in automatic mode
+        :param persistent: keeps the VPN open across all exchanges
+        :param duration: time in seconds for running exchanges in persistent mode, instead of a number of iterations
+        :param exchange_options: options of the exchange as strings 'NAME=VALUE'
         """
         self.role = role
         self.vpn_option = vpn_option
@@ -35,8 +45,11 @@ class HandleInput:
         self.iterations = iterations
         self.directory = directory
         self.auto = auto
+        self.persistent = persistent
+        self.duration = duration
+        self.exchange_options = {}
 
-        if self.__check_values():
+        if self.__parse_exchange_options(exchange_options) and self.__check_values():
             self.valid_inputs = True
 
     def execute(self) -> bool:
@@ -49,14 +62,22 @@ class HandleInput:
             helpers.messages.print_err("Inputs are not valid. Please start again.")
             return False
 
-        self.__create_instance()
+        # the privileged helper does everything that needs root for the whole run, so 'sudo' is only needed once
+        if self.operation == "exchange" and self.vpn_option != "novpn" and not start_helper():
+            return False
+
+        try:
+            if not self.__create_instance():
+                return False
 
-        if self.operation == "keygen":
-            self.__handle_keygen()
-        elif self.operation == "keysend":
-            self.__handle_keysend()
-        elif self.operation == "exchange":
-            self.__handle_exchange()
+            if self.operation == "keygen":
+                self.__handle_keygen()
+            elif self.operation == "keysend":
+                self.__handle_keysend()
+            elif self.operation == "exchange":
+                self.__handle_exchange()
+        finally:
+            stop_helper()
 
         return True
 
@@ -77,9 +98,9 @@ class HandleInput:
             )
             return False
 
-        if not self.exchange_type == "http":
+        if self.exchange_type not in ("http", "http-keepalive", "http-load", "bulk", "udp", "tcp-stream"):
             helpers.messages.print_err(
-                "Invalid EXCHANGE_TYPE argument. Has to be http."
+                "Invalid EXCHANGE_TYPE argument. Has to be http|http-keepalive|http-load|bulk|udp|tcp-stream."
             )
             return False
 
@@ -93,16 +114,47 @@ class HandleInput:
             helpers.messages.print_err("Invalid ITERATIONS option. Has to be positive.")
             return False
 
+        if self.duration is not None and (self.duration <= 0 or not self.persistent):
+            helpers.messages.print_err("Invalid DURATION option. Has to be positive and needs --persistent.")
+            return False
+
         return True
 
-    def __create_instance(self) -> None:
+    def __parse_exchange_options(self, exchange_options) -> bool:
+        """
+        Splits the options of the exchange into names and values. Returns False if an option has no value.
+        :param exchange_options: options of the exchange as strings 'NAME=VALUE'
+        :return: True for success, False otherwise
         """
-        Creates the server or client instance with the given parameters.
+        for option in exchange_options:
+            name, separator, value = option.partition("=")
+            if not separator or not name:
+                helpers.messages.print_err(f"Invalid EXCHANGE_OPTION {option}. Has to be NAME=VALUE.")
+                return False
+            self.exchange_options[name.replace("-", "_")] = value
+
+        return True
+
+    def __create_instance(self) -> bool:
+        """
+        Creates the server or client instance with the given parameters. Fails if the exchange does not accept its
+        options.
+        :return: True for success, False otherwise
         """
         # create Exchange instance
         exchange = None
         if self.exchange_type == "http":
             exchange = HTTP
+        elif self.exchange_type == "http-keepalive":
+            exchange = HTTPKeepAlive
+        elif self.exchange_type == "http-load":
+            exchange = HTTPLoad
+        elif self.exchange_type == "bulk":
+            exchange = Bulk
+        elif self.exchange_type == "udp":
+            exchange = UDPEcho
+        elif self.exchange_type == "tcp-stream":
+            exchange = TCPStream
 
         # create VPN instance
         vpn = None
@@ -117,11 +169,18 @@ class HandleInput:
         elif self.vpn_option == "openvpnstatic":
             vpn = OpenVPNstatic    
     
+        try:
+            if self.role == "server":
+                self.instance = Server(exchange, vpn, self.exchange_options)
+            elif self.role == "client":
+                self.instance = Client(exchange, vpn, self.exchange_options)
+        except (TypeError, ValueError) as err:
+            if not self.exchange_options:
+                raise
+            helpers.messages.print_err(f"Invalid EXCHANGE_OPTION for {self.exchange_type}: {err}")
+            return False
 
-        if self.role == "server":
-            self.instance = Server(exchange, vpn)
-        elif self.role == "client":
-            self.instance = Client(exchange, vpn)
+        return True
 
     def __handle_keygen(self) -> None:
         """
@@ -139,13 +198,31 @@ class HandleInput:
         """
         Starts the monitor, executes the exchange and stops the monitor.
         """
-        monitor = Monitoring(self.role, self.vpn_option)
+        if self.role == "server":
+            local_address = self.instance.hosts.server_address
+        else:
+            local_address = self.instance.hosts.client_address
+
+        monitor = Monitoring(
+            self.role,
+            self.vpn_option,
+            tunnel_interface=self.instance.vpn.interface_name,
+            local_address=local_address,
+            get_process_ids=self.instance.vpn.get_process_ids,
+            get_exchange_counters=self.instance.exchange.get_counters,
+        )
 
         monitor.start(auto=self.auto)
         # start test
-        self.instance.run(self.iterations, monitor)
-        # end test
-        monitor.stop()
+        try:
+            if self.persistent:
+                self.instance.run_persistent(self.iterations, monitor, self.duration)
+            else:
+                self.instance.run(self.iterations, monitor)
+        finally:
+            self.instance.exchange.close()
+            # end test, also after an error, so the threads of the monitor do not keep the process running
+            monitor.stop()
 
 
 @click.command()
@@ -158,11 +235,27 @@ class HandleInput:
     default="~",
 )
 @click.option("--auto", help="monitor in auto mode", is_flag=True)
+@click.option("--persistent", help="keep the VPN open across all exchanges", is_flag=True)
+@click.option(
+    "--duration",
+    type=float,
+    default=None,
+    help="seconds to run exchanges instead of a number of iterations (only with --persistent)",
+)
+@click.option(
+    "-x",
+    "--exchange-option",
+    "exchange_options",
+    type=str,
+    multiple=True,
+    help="option of the exchange as NAME=VALUE, like rate=100 (can be repeated)",
+)
 @click.argument("role", type=str)
 @click.argument("vpn_option", type=str)
 @click.argument("exchange_type", type=str)
 @click.argument("operation", type=str)
-def cli(role, vpn_option, exchange_type, operation, iterations, directory, auto):
+def cli(role, vpn_option, exchange_type, operation, iterations, directory, auto, persistent, duration,
+        exchange_options):
     """
     Calls the handler with the given CLI inputs.
     :param role: role of the host
@@ -172,9 +265,13 @@ def cli(role, vpn_option, exchange_type, operation, iterations, directory, auto)
     :param iterations: number of iterations of exchanges
     :param directory: directory to save the keys (only for keysend option)
     :param auto: activates monitoring in automatic mode
+    :param persistent: keeps the VPN open across all exchanges
+    :param duration: time in seconds for running exchanges in persistent mode, instead of a number of iterations
+    :param exchange_options: options of the exchange as strings 'NAME=VALUE'
     """
     handler = HandleInput(
-        role, vpn_option, exchange_type, operation, iterations, directory, auto
+        role, vpn_option, exchange_type, operation, iterations, directory, auto, persistent, duration,
+        exchange_options
     )
     if not handler.execute():
         messages.print_err("Execution failed.")
@@ -13,16 +13,18 @@ class HandleInput:
     valid_inputs = False
 
     def __init__(
-            self, output_type, path, full, detailed, median, normal
+            self, output_type, path, full, detailed, median, normal, jobs=1, force=False
     ) -> None:
         """
         Sets all values to the given inputs and checks the values.
-        :param output_type: type of the output, for example as 'graphs'
+        :param output_type: type of the output, 'graphs', 'columnar', 'breakdown', 'latency', 'sweep' or 'histogram'
         :param path: path of the file or directory of the data
         :param full: True if full graphs should be generated, False otherwise
         :param detailed: True if detailed graphs should be generated, False otherwise
         :param median: True if median graphs should be generated, False otherwise
         :param normal: True if normal graphs should be generated, False otherwise
+        :param jobs: number of processes generating graphs in parallel
+        :param force: True if all graphs should be generated, False for skipping graphs that are up-to-date
         """
         self.type = output_type
         self.path = path
@@ -30,6 +32,8 @@ class HandleInput:
         self.detailed = detailed
         self.median = median
         self.normal = normal
+        self.jobs = jobs
+        self.force = force
 
         if self.__check_values():
             self.valid_inputs = True
@@ -39,23 +43,43 @@ class HandleInput:
         If inputs are valid, generates the output with the respective class.
         :return: True for success, False otherwise
         """
+        if not self.valid_inputs:
+            return False
+
         if self.type == "graphs":
             output = GraphOutput(
                 self.path,
                 value_types,
                 [self.detailed, self.full],
-                [self.normal, self.median]
+                [self.normal, self.median],
+                self.jobs,
+                self.force,
             )
             output.generate()
+        elif self.type == "columnar":
+            output = ColumnarOutput(self.path)
+            output.generate()
+        elif self.type == "breakdown":
+            output = BreakdownOutput(self.path)
+            output.generate()
+        elif self.type == "latency":
+            output = LatencyOutput(self.path)
+            output.generate()
+        elif self.type == "sweep":
+            output = SweepOutput(self.path)
+            output.generate()
+        elif self.type == "histogram":
+            output = HistogramOutput(self.path)
+            output.generate()
 
     def __check_values(self) -> bool:
         """
         Checks if the given inputs are in the defined scope. Returns False otherwise.
         :return: True for success, False otherwise
         """
-        if not self.type == "graphs":
+        if self.type not in ("graphs", "columnar", "breakdown", "latency", "sweep", "histogram"):
             print_err(
-                "Invalid TYPE argument. Has to be graphs."
+                "Invalid TYPE argument. Has to be graphs|columnar|breakdown|latency|sweep|histogram."
             )
             return False
 
@@ -65,6 +89,13 @@ class HandleInput:
             )
             return False
 
+        if self.jobs < 1:
+            print_err("Invalid JOBS option. Has to be positive.")
+            return False
+
+        if self.type != "graphs":
+            return True
+
         if not (self.detailed or self.full):
             print_err(
                 "Either --detailed, --full or both must be set."
@@ -85,9 +116,11 @@ class HandleInput:
 @click.option("-d", "--detailed", help="generate relative graphs in the relevant scope", is_flag=True)
 @click.option("-m", "--median", help="generate min-max-median graphs", is_flag=True)
 @click.option("-n", "--normal", help="generate normal graphs", is_flag=True)
+@click.option("-j", "--jobs", type=int, default=1, help="number of processes generating graphs in parallel")
+@click.option("--force", help="generate all graphs, also the ones that are up-to-date", is_flag=True)
 @click.argument("output_type", type=str)
 @click.argument("path", type=pathlib.Path)
-def cli(output_type, path, full, detailed, median, normal):
+def cli(output_type, path, full, detailed, median, normal, jobs, force):
     """
     Takes arguments from the command line, asks the user for the values for which graphs should be generated and
     calls the InputHandler with the arguments and user inputs.
@@ -97,14 +130,28 @@ def cli(output_type, path, full, detailed, median, normal):
     specify the y-limits and the type of graph, 'normal' graphs with all values or min-max-median graphs with 8
     intervals, respectively. At least one option of each pair has to be set, possibly both. All different combinations
     that are checked create a graph, for example if flags -f, -d and -m are set, the program generates full and detailed
-    min-max-median graphs, but no 'normal' graphs.
-    :param output_type: type of the output, for example as 'graphs'
+    min-max-median graphs, but no 'normal' graphs. The output_type 'columnar' converts the data files into the compact
+    columnar format (see src/output/ColumnarData.py) and needs no flags. The output_type 'breakdown' shows the phases
+    of opening and closing the VPN as stacked bars and needs no flags either, just like the output_type 'latency', which
+    plots the latencies measured per exchange as CDF and scatter plot, the output_type 'sweep', which compares the
+    goodput of the VPNs over the payload sizes of a sweep, and the output_type 'histogram', which merges the latency
+    histograms of all exchanges and runs per VPN and plots their percentiles. Graphs that were already generated from the
+    same data with the same options are skipped (see data_graphs/manifest.json), unless --force is set.
+    :param output_type: type of the output, 'graphs', 'columnar', 'breakdown', 'latency', 'sweep' or 'histogram'
     :param path: path of the file or directory of the data
     :param full: True if full graphs should be generated, False otherwise
     :param detailed: True if detailed graphs should be generated, False otherwise
     :param median: True if median graphs should be generated, False otherwise
     :param normal: True if normal graphs should be generated, False otherwise
+    :param jobs: number of processes generating graphs in parallel
+    :param force: True if all graphs should be generated, False for skipping graphs that are up-to-date
     """
+    if output_type != "graphs":
+        handler = HandleInput(output_type, path, full, detailed, median, normal, jobs, force)
+        if handler.valid_inputs:
+            handler.execute([])
+        return
+
     questions = [
         inquirer.Checkbox(
             "values",
@@ -113,10 +160,50 @@ def cli(output_type, path, full, detailed, median, normal):
                 "all",
                 "CPU usage (%)",
                 "RAM usage (%)",
+                "Monitoring CPU usage (%)",
                 "Total received bytes",
                 "Total sent bytes",
+                "Received bytes on tunnel interface",
+                "Sent bytes on tunnel interface",
+                "Received bytes on physical interface",
+                "Sent bytes on physical interface",
                 "Received packets per second",
                 "Sent packets per second",
+                "VPN process CPU usage (%)",
+                "VPN process CPU time",
+                "VPN process memory",
+                "VPN process context switches",
+                "VPN process threads",
+                "VPN setup time",
+                "VPN teardown time",
+                "VPN daemon shutdown time",
+                "Time to handshake",
+                "Exchange latency",
+                "Connect time",
+                "Pretransfer time",
+                "Time to first byte",
+                "Request latency",
+                "Exchange retries",
+                "First request latency",
+                "Kept-alive request latency",
+                "Load median latency",
+                "Load p99 latency",
+                "Load request rate",
+                "Server request rate",
+                "Server service time",
+                "Download goodput",
+                "Upload goodput",
+                "Received goodput",
+                "Sent goodput",
+                "UDP round-trip time",
+                "UDP jitter client to server",
+                "UDP jitter server to client",
+                "UDP loss",
+                "Stream goodput",
+                "TCP round-trip time",
+                "TCP congestion window",
+                "TCP retransmissions",
+                "TCP delivery rate",
             ],
         ),
     ]
@@ -130,10 +217,50 @@ def cli(output_type, path, full, detailed, median, normal):
     all_set = "all" in answers["values"]
     cpu_usage = "CPU usage (%)" in answers["values"]
     ram_usage = "RAM usage (%)" in answers["values"]
+    monitor_cpu_usage = "Monitoring CPU usage (%)" in answers["values"]
     recv_bytes = "Total received bytes" in answers["values"]
     sent_bytes = "Total sent bytes" in answers["values"]
+    tunnel_recv_bytes = "Received bytes on tunnel interface" in answers["values"]
+    tunnel_sent_bytes = "Sent bytes on tunnel interface" in answers["values"]
+    wire_recv_bytes = "Received bytes on physical interface" in answers["values"]
+    wire_sent_bytes = "Sent bytes on physical interface" in answers["values"]
     recv_pps = "Received packets per second" in answers["values"]
     sent_pps = "Sent packets per second" in answers["values"]
+    vpn_cpu_usage = "VPN process CPU usage (%)" in answers["values"]
+    vpn_cpu_time = "VPN process CPU time" in answers["values"]
+    vpn_memory = "VPN process memory" in answers["values"]
+    vpn_ctx_switches = "VPN process context switches" in answers["values"]
+    vpn_threads = "VPN process threads" in answers["values"]
+    vpn_open_time = "VPN setup time" in answers["values"]
+    vpn_close_time = "VPN teardown time" in answers["values"]
+    shutdown_time = "VPN daemon shutdown time" in answers["values"]
+    handshake_time = "Time to handshake" in answers["values"]
+    exchange_time = "Exchange latency" in answers["values"]
+    connect_time = "Connect time" in answers["values"]
+    pretransfer_time = "Pretransfer time" in answers["values"]
+    starttransfer_time = "Time to first byte" in answers["values"]
+    total_time = "Request latency" in answers["values"]
+    exchange_retries = "Exchange retries" in answers["values"]
+    first_request_time = "First request latency" in answers["values"]
+    request_time = "Kept-alive request latency" in answers["values"]
+    load_median_latency = "Load median latency" in answers["values"]
+    load_tail_latency = "Load p99 latency" in answers["values"]
+    load_rate = "Load request rate" in answers["values"]
+    server_request_rate = "Server request rate" in answers["values"]
+    server_service_time = "Server service time" in answers["values"]
+    download_goodput = "Download goodput" in answers["values"]
+    upload_goodput = "Upload goodput" in answers["values"]
+    recv_goodput = "Received goodput" in answers["values"]
+    sent_goodput = "Sent goodput" in answers["values"]
+    udp_round_trip_time = "UDP round-trip time" in answers["values"]
+    udp_forward_jitter = "UDP jitter client to server" in answers["values"]
+    udp_return_jitter = "UDP jitter server to client" in answers["values"]
+    udp_loss = "UDP loss" in answers["values"]
+    stream_goodput = "Stream goodput" in answers["values"]
+    tcp_round_trip_time = "TCP round-trip time" in answers["values"]
+    tcp_congestion_window = "TCP congestion window" in answers["values"]
+    tcp_retransmit_rate = "TCP retransmissions" in answers["values"]
+    tcp_delivery_rate = "TCP delivery rate" in answers["values"]
 
     value_types = []
 
@@ -141,16 +268,96 @@ def cli(output_type, path, full, detailed, median, normal):
         value_types.append(CPUPercent)
     if ram_usage or all_set:
         value_types.append(RAMPercent)
+    if monitor_cpu_usage or all_set:
+        value_types.append(MonitorCPUPercent)
     if recv_bytes or all_set:
         value_types.append(RecvBytes)
     if sent_bytes or all_set:
         value_types.append(SentBytes)
+    if tunnel_recv_bytes or all_set:
+        value_types.append(TunnelRecvBytes)
+    if tunnel_sent_bytes or all_set:
+        value_types.append(TunnelSentBytes)
+    if wire_recv_bytes or all_set:
+        value_types.append(WireRecvBytes)
+    if wire_sent_bytes or all_set:
+        value_types.append(WireSentBytes)
     if recv_pps or all_set:
         value_types.append(RecvPPS)
     if sent_pps or all_set:
         value_types.append(SentPPS)
+    if vpn_cpu_usage or all_set:
+        value_types.append(VPNCPUPercent)
+    if vpn_cpu_time or all_set:
+        value_types.append(VPNCPUTime)
+    if vpn_memory or all_set:
+        value_types.append(VPNMemory)
+    if vpn_ctx_switches or all_set:
+        value_types.append(VPNContextSwitches)
+    if vpn_threads or all_set:
+        value_types.append(VPNThreads)
+    if vpn_open_time or all_set:
+        value_types.append(VPNOpenTime)
+    if vpn_close_time or all_set:
+        value_types.append(VPNCloseTime)
+    if shutdown_time or all_set:
+        value_types.append(ShutdownTime)
+    if handshake_time or all_set:
+        value_types.append(HandshakeTime)
+    if exchange_time or all_set:
+        value_types.append(ExchangeTime)
+    if connect_time or all_set:
+        value_types.append(ConnectTime)
+    if pretransfer_time or all_set:
+        value_types.append(PretransferTime)
+    if starttransfer_time or all_set:
+        value_types.append(StarttransferTime)
+    if total_time or all_set:
+        value_types.append(TotalTime)
+    if exchange_retries or all_set:
+        value_types.append(ExchangeRetries)
+    if first_request_time or all_set:
+        value_types.append(FirstRequestTime)
+    if request_time or all_set:
+        value_types.append(RequestTime)
+    if load_median_latency or all_set:
+        value_types.append(LoadMedianLatency)
+    if load_tail_latency or all_set:
+        value_types.append(LoadTailLatency)
+    if load_rate or all_set:
+        value_types.append(LoadRate)
+    if server_request_rate or all_set:
+        value_types.append(ServerRequestRate)
+    if server_service_time or all_set:
+        value_types.append(ServerServiceTime)
+    if download_goodput or all_set:
+        value_types.append(DownloadGoodput)
+    if upload_goodput or all_set:
+        value_types.append(UploadGoodput)
+    if recv_goodput or all_set:
+        value_types.append(RecvGoodput)
+    if sent_goodput or all_set:
+        value_types.append(SentGoodput)
+    if udp_round_trip_time or all_set:
+        value_types.append(UDPRoundTripTime)
+    if udp_forward_jitter or all_set:
+        value_types.append(UDPForwardJitter)
+    if udp_return_jitter or all_set:
+        value_types.append(UDPReturnJitter)
+    if udp_loss or all_set:
+        value_types.append(UDPLoss)
+    if stream_goodput or all_set:
+        value_types.append(StreamGoodput)
+    if tcp_round_trip_time or all_set:
+        value_types.append(TCPRoundTripTime)
+    if tcp_congestion_window or all_set:
+        value_types.append(TCPCongestionWindow)
+    if tcp_retransmit_rate or all_set:
+        value_types.append(TCPRetransmitRate)
+    if tcp_delivery_rate or all_set:
+        value_types.append(TCPDeliveryRate)
 
-    handler = HandleInput(output_type, path, full, detailed, median, normal)
+    handler = HandleInput(output_type, path, full, detailed, median, normal, jobs, force)
     handler.execute(value_types)
 
 
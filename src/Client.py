@@ -11,29 +11,39 @@ class Client:
     and sharing keys for the given VPN.
     """
 
-    def __init__(self, exchange_type, vpn_type) -> None:
+    def __init__(self, exchange_type, vpn_type, exchange_options=None, ready_timeout=10.0, exchange_timeout=30.0,
+                 retry_interval=0.05) -> None:
         """
         Loads the hosts addresses and creates instances of the given VPN and exchange classes with the correct
         parameters.
         :param exchange_type: Class to be used as Exchange type
         :param vpn_type: Class to be used as VPN type
+        :param exchange_options: dictionary of further keyword arguments for the exchange, like {"rate": "100"}
+        :param ready_timeout: maximum time in seconds to wait for the handshake of the VPN
+        :param exchange_timeout: maximum time in seconds for the attempts of one exchange
+        :param retry_interval: time in seconds between two attempts of an exchange
         """
         messages.print_log("Initializing client...")
 
         self.hosts = HostsManager()
+        self.ready_timeout = ready_timeout
+        self.exchange_timeout = exchange_timeout
+        self.retry_interval = retry_interval
 
         self.vpn = vpn_type(role="client")
         self.exchange = exchange_type(
-            role="client", open_server_address=self.vpn.open_server_address, interface=self.vpn.interface_name
+            role="client", open_server_address=self.vpn.open_server_address, interface=self.vpn.interface_name,
+            **(exchange_options or {})
         )
 
         messages.print_log("Client initialized.")
 
     def run(self, number, monitor) -> bool:
         """
-        Runs the exchange as often as given as input. Every exchange first opens the VPN, attempts to run the
-        exchange multiple times and closes the VPN. Stops after too many unsuccessful exchange attempts. Does a
-        manual poll before each step.
+        Runs the exchange as often as given as input. Every exchange first opens the VPN, waits for the handshake,
+        attempts to run the exchange until it succeeds and closes the VPN. Stops if an exchange does not succeed within
+        the exchange timeout. Does a manual poll before each step and records the time needed for opening the VPN, the
+        exchange and closing the VPN.
         :param number: number of exchanges to be executed
         :param monitor: monitor for handling the polls
         :return: True for success, False otherwise
@@ -42,45 +52,157 @@ class Client:
         while i < number:
             messages.print_log(f"Starting exchange {i + 1}...")
 
-            # open the VPN
-            monitor.poll("Client.run(): before opening VPN connection")
-            if not self.vpn.open():
+            if not self.__open_vpn(monitor):
                 return False
 
-            # do one exchange, try multiple times if necessary
-            monitor.poll("Client.run(): before doing next round of exchange")
-            remaining_attempts = 50
-            slept = False
-
-            messages.print_log(f"Sending packet to {self.vpn.open_server_address}...")
-            while True:
-                if remaining_attempts > 0:  # still attempts left, normal case
-                    return_code = self.exchange.run()
-                    if return_code == 0:
-                        i += 1  # only go to next round when return_code is 0 (success)
-                        break
-                    elif return_code == 1:
-                        remaining_attempts -= 1
-                    else:  # error has occurred that requires starting VPN again
-                        break
-                elif not slept:  # if no more attempts but did not sleep yet
-                    time.sleep(2)
-                    remaining_attempts = 50
-                    slept = True
-                else:  # if no more attempts and already slept
-                    messages.print_err(
-                        "Too many exchange connection attempts. Did not finish successfully."
-                    )
-                    return False
-
-            # close the VPN
-            monitor.poll("Client.run(): before closing VPN connection")
-            if not self.vpn.close():
+            return_code = self.__run_exchange(monitor)
+            if return_code < 0:
+                return False
+            if return_code == 0:
+                i += 1  # only go to next round when the exchange was successful
+
+            if not self.__close_vpn(monitor):
                 return False
 
         messages.print_log(f"Finished exchanges successfully.")
         return True
 
+    def run_persistent(self, number, monitor, duration=None) -> bool:
+        """
+        Opens the VPN once and runs the exchange as often as given as input (or until the duration passed) through the
+        established tunnel, then closes the VPN. The VPN is only reopened if an exchange fails in a way that requires
+        it. Records the time needed for opening and closing the VPN separately from the time of each exchange.
+        :param number: number of exchanges to be executed, ignored if a duration is given
+        :param monitor: monitor for handling the polls
+        :param duration: time in seconds for running exchanges, None for running the given number of exchanges
+        :return: True for success, False otherwise
+        """
+        if not self.__open_vpn(monitor):
+            return False
+
+        start = time.monotonic()
+        i = 0
+        while (time.monotonic() - start < duration) if duration else (i < number):
+            messages.print_log(f"Starting exchange {i + 1}...")
+
+            return_code = self.__run_exchange(monitor)
+            if return_code < 0:
+                self.__close_vpn(monitor)
+                return False
+            if return_code == 0:
+                i += 1
+            elif not (self.__close_vpn(monitor) and self.__open_vpn(monitor)):
+                return False
+
+        if not self.__close_vpn(monitor):
+            return False
+
+        messages.print_log(f"Finished {i} exchanges successfully.")
+        return True
+
+    def __open_vpn(self, monitor) -> bool:
+        """
+        Opens the VPN and waits until the handshake with the server has completed. Records the time needed for
+        opening, in total and per phase, and the time until the handshake.
+        :param monitor: monitor for handling the polls
+        :return: True for success, False otherwise
+        """
+        monitor.poll("Client.run(): before opening VPN connection")
+
+        start = time.monotonic()
+        success = self.vpn.open()
+        duration = time.monotonic() - start
+
+        handshake = None
+        if success:
+            handshake = self.vpn.wait_ready(self.ready_timeout)
+            if handshake is None:
+                messages.print_warn(f"No handshake within {self.ready_timeout} s, trying the exchange anyway.")
+
+        spans = self.vpn.pop_spans()
+        if spans:
+            monitor.record("Client.run(): phases of opening VPN connection", "open_spans", spans)
+        if not success:
+            return False
+        monitor.record("Client.run(): VPN connection opened", "timing", {"vpn_open": duration})
+        self.exchange.reset()  # connections of the exchange went through the closed tunnel
+        if handshake is not None:
+            monitor.record("Client.run(): VPN handshake completed", "timing", {"handshake": handshake})
+
+        return True
+
+    def __close_vpn(self, monitor) -> bool:
+        """
+        Closes the VPN and records the time needed, in total and per phase.
+        :param monitor: monitor for handling the polls
+        :return: True for success, False otherwise
+        """
+        monitor.poll("Client.run(): before closing VPN connection")
+
+        start = time.monotonic()
+        success = self.vpn.close()
+        duration = time.monotonic() - start
+
+        spans = self.vpn.pop_spans()
+        if spans:
+            monitor.record("Client.run(): phases of closing VPN connection", "close_spans", spans)
+        if not success:
+            return False
+        timing = {"vpn_close": duration}
+        if self.vpn.shutdown_latency is not None:
+            timing["shutdown"] = self.vpn.shutdown_latency  # time the daemon needed for ending after SIGTERM
+        monitor.record("Client.run(): VPN connection closed", "timing", timing)
+
+        return True
+
+    def __run_exchange(self, monitor) -> int:
+        """
+        Does one exchange, tries again until the exchange timeout passed if necessary. Since the client waited for the
+        handshake before, further attempts are only needed until the server is listening. Records the time of the
+        successful attempt and the number of attempts. Also records the measurements of the exchange's last attempt
+        (like the timers of libcurl) in the category 'exchange', together with the number of retries and the result
+        (0 for success, 2 for an error that requires reopening the VPN, -1 if the exchange timeout passed), and the
+        histogram of its latencies in the category 'histogram' if it counts them.
+        :param monitor: monitor for handling the polls
+        :return: 0 for success, 2 for an error that requires reopening the VPN, -1 if the exchange timeout passed
+        """
+        monitor.poll("Client.run(): before doing next round of exchange")
+        deadline = time.monotonic() + self.exchange_timeout
+        attempts = 0
+
+        messages.print_log(f"Sending packet to {self.vpn.open_server_address}...")
+        while True:
+            attempts += 1
+            start = time.monotonic()
+            return_code = self.exchange.run()
+            duration = time.monotonic() - start
+
+            if return_code == 0:
+                monitor.record(
+                    "Client.run(): exchange done",
+                    "timing",
+                    {"exchange": duration, "exchange_attempts": attempts},
+                )
+            elif return_code == 1 and time.monotonic() < deadline:
+                time.sleep(self.retry_interval)
+                continue
+            elif return_code == 1:
+                messages.print_err(
+                    f"Exchange did not succeed within {self.exchange_timeout} s. Did not finish successfully."
+                )
+                return_code = -1
+            else:  # error has occurred that requires starting VPN again
+                return_code = 2
+
+            monitor.record(
+                "Client.run(): exchange result",
+                "exchange",
+                {**self.exchange.results, "retries": attempts - 1, "result": return_code},
+            )
+            if self.exchange.histogram is not None:
+                monitor.record("Client.run(): exchange latencies", "histogram", self.exchange.histogram.to_record())
+            return return_code
+
     def keygen(self) -> bool:  # only needed for VPN usage
         """
         Generates the necessary keys for the VPN. Only needed when a VPN is used, does nothing except for printing
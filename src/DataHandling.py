@@ -1,49 +1,128 @@
 import datetime
 import json
+import os
+import queue
+import threading
+import time
 from json import JSONEncoder
 from pathlib import Path
 
+import src.messages as messages
+
 
 class DataHandling:
     """
-    Handles all data operations for storing and writing data to a file.
+    Handles all data operations for storing and writing data to a file. Data is appended to an NDJSON file (one JSON
+    object per line) by a background thread in batches, so the memory usage is bounded and all data written before a
+    crash is kept. Errors of the writer are reported, and the writer keeps taking samples, so adding samples never
+    blocks because of a failed writer.
     """
-    data = {"data": []}  # for storing data from the file
 
-    def __init__(self, role, vpn) -> None:
+    def __init__(self, role, vpn, flush_interval=1.0, checkpoint_interval=5.0, batch_size=1000,
+                 max_queued=10000) -> None:
         """
-        Gets timestamp for now, creates data directory and sets part of the name format.
+        Gets timestamp for now, creates data directory, opens the data file and starts the thread writing the data.
+
+        File name consists of the name (role-vpn), '_' and the timestamp in ISO format (but with '_' instead of ':' for
+        compatibility reasons). File is created in 'data' directory.
         :param role: role of the host, needed for file name
         :param vpn: VPN used for the exchange, needed for file name
+        :param flush_interval: maximum time in seconds a sample waits before it is written to the file
+        :param checkpoint_interval: time in seconds after which the file is synchronized to the disk
+        :param batch_size: maximum number of samples written at once
+        :param max_queued: maximum number of samples waiting to be written, adding more waits for the writer
         """
         self.timestamp = datetime.datetime.now().isoformat()
         self.name = f"{role}-{vpn}"
         Path("data").mkdir(parents=True, exist_ok=True)
 
+        self.flush_interval = flush_interval
+        self.checkpoint_interval = checkpoint_interval
+        self.batch_size = batch_size
+
+        timestamp = self.timestamp.replace(":", "_")
+        self.file_path = f"data/{self.name}_{timestamp}.ndjson"
+        self.file = open(self.file_path, "a")
+
+        self.queue = queue.Queue(maxsize=max_queued)  # samples waiting to be written, None stops the writer
+        self.failed = False  # True if the file can not be written anymore, further samples are discarded
+        self.discarded = 0  # number of samples that could not be written
+        self.writer = threading.Thread(target=self.__write_batches)
+        self.writer.start()
+
     def write_data(self) -> None:
         """
-        Creates and/or opens the file and writes the data from the internal data structure to the JSON file.
+        Writes all remaining samples to the file, synchronizes it to the disk and closes it. No data can be added
+        afterward.
+        """
+        self.queue.put(None)
+        self.writer.join()
 
-        File name consists of the name (role-vpn), '_' and the timestamp in ISO format (but with '_' instead of ':' for
-        compatibility reasons). File is created in 'data' directory.
+    def __write_batches(self) -> None:
         """
-        timestamp = self.timestamp.replace(":", "_")
+        Collects samples until the batch is full or the flush interval passed and appends them to the file. Every
+        batch is flushed, so it survives a crash of the process. The file is synchronized to the disk at every
+        checkpoint and before closing it. Samples that can not be converted to JSON are skipped. After an error writing
+        the file, all further samples are discarded, but still taken from the queue until the writer is stopped.
+        """
+        last_checkpoint = time.monotonic()
+        done = False
 
-        with open(f"data/{self.name}_{timestamp}.json", "w") as file:
-            json.dump(
-                self.data,  # data to be stored in the file
-                indent=2,  # indent used for the lines
-                sort_keys=True,  # sorts the keys by alphabet
-                fp=file,  # file to be used
-                cls=DateTimeEncoder  # format of the data
-            )
+        while not done:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                try:
+                    entry = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+
+                if entry is None:
+                    done = True
+                    break
+                batch.append(entry)
+
+            if self.failed:
+                self.discarded += len(batch)
+                continue
+
+            lines = []
+            for entry in batch:
+                try:
+                    lines.append(json.dumps(entry, sort_keys=True, cls=DateTimeEncoder) + "\n")
+                except (TypeError, ValueError) as err:
+                    messages.print_warn(f"Skipping sample '{entry.get('name')}' that is no valid JSON: {err=}")
+                    self.discarded += 1
+
+            try:
+                if lines:
+                    self.file.write("".join(lines))
+                    self.file.flush()
+
+                if done or time.monotonic() - last_checkpoint >= self.checkpoint_interval:
+                    os.fsync(self.file.fileno())
+                    last_checkpoint = time.monotonic()
+            except Exception as err:
+                messages.print_err(f"Unable to write {self.file_path}, discarding all further samples: {err=}")
+                self.failed = True
+                self.discarded += len(lines)
+
+        try:
+            self.file.close()
+        except OSError as err:
+            messages.print_err(f"Unable to close {self.file_path}: {err=}")
+        if self.discarded:
+            messages.print_warn(f"{self.discarded} samples could not be written to {self.file_path}.")
 
     def add_data(
-            self, name, time, cpu_perc, ram_perc, pps_sent, pps_recv, bytes_sent, bytes_recv
+            self, name, time, cpu_perc, ram_perc, pps_sent, pps_recv, bytes_sent, bytes_recv, monitor_cpu_perc=0.0,
+            interfaces=None, processes=None, counters=None
     ) -> None:
         """
-        Adds the given data fields to an internal data structure. Format of the information is split up into name,
-        timestamp, hardware values and network values.
+        Adds the given data fields to the samples waiting to be written. Format of the information is split up into
+        name, timestamp, hardware values, network values and, if given, the values of single interfaces and of the
+        VPN's processes and the counters of the exchange.
         :param name: short description of the situation in which the poll was created
         :param time: timestamp of the poll
         :param cpu_perc: relative CPU usage value
@@ -52,6 +131,11 @@ class DataHandling:
         :param pps_recv: received packets per second value
         :param bytes_sent: sent amount of bytes since beginning
         :param bytes_recv: received amount of bytes since beginning
+        :param monitor_cpu_perc: relative CPU usage of the monitoring itself
+        :param interfaces: dictionary of the byte and packet counters of the tunnel and physical interface since
+        beginning, like 'tunnel_bytes_sent' or 'wire_packets_recv'
+        :param processes: dictionary of the resource usage of the VPN's processes, like 'vpn_cpu_time' or 'vpn_rss'
+        :param counters: dictionary of the counters of the exchange, like 'requests' or 'goodput_recv'
         """
         new_data = {
             "name": name,
@@ -59,7 +143,8 @@ class DataHandling:
             "hardware": [
                 {
                     "cpu_percent": cpu_perc,
-                    "ram_percent": ram_perc
+                    "ram_percent": ram_perc,
+                    "monitor_cpu_percent": monitor_cpu_perc,
                 }
             ],
             "network": [
@@ -72,7 +157,27 @@ class DataHandling:
             ],
         }
 
-        self.data["data"].append(new_data)
+        if interfaces:
+            new_data["interfaces"] = [interfaces]
+
+        if processes:
+            new_data["processes"] = [processes]
+
+        if counters:
+            new_data["counters"] = [counters]
+
+        self.queue.put(new_data)
+
+    def add_record(self, name, time, category, values: dict) -> None:
+        """
+        Adds a record of values that are not part of a poll, like the duration of an exchange, to the samples waiting
+        to be written. A record has no hardware and network values, only name, timestamp and one category.
+        :param name: short description of the recorded event
+        :param time: timestamp of the event
+        :param category: category of the values, like 'timing'
+        :param values: dictionary of the recorded numbers, like {'exchange': 0.012}
+        """
+        self.queue.put({"name": name, "time": time, category: [values]})
 
 
 class DateTimeEncoder(JSONEncoder):
@@ -83,3 +188,4 @@ class DateTimeEncoder(JSONEncoder):
     def default(self, obj):
         if isinstance(obj, (datetime.date, datetime.datetime)):
             return obj.isoformat()
+        return super().default(obj)  # raises TypeError
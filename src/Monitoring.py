@@ -5,136 +5,325 @@ import time
 import psutil
 
 from src.DataHandling import DataHandling
+from src.ProcessTracker import ProcessTracker
+from src.messages import print_log
 
 
 class Monitoring:
     """
-    Handles the monitoring of performance parameters. Runs several processes for updating values.
+    Handles the monitoring of performance parameters. Runs a single sampler thread that takes one snapshot of all
+    counters per tick and derives every value of a poll from that snapshot.
     """
-    done = threading.Event()  # signals to subprocesses if monitoring has stopped
+    done = threading.Event()  # signals to the sampler thread if monitoring has stopped
 
-    def __init__(self, role, vpn) -> None:
+    def __init__(self, role, vpn, tunnel_interface=None, local_address=None, get_process_ids=None,
+                 get_exchange_counters=None) -> None:
         """
-        Creates an instance for handling data (storing and writing) and initializes starting values.
+        Creates an instance for handling data (storing and writing) and takes the initial snapshot of all counters.
+        Besides the host-wide counters, the counters of the VPN's tunnel interface and of the physical interface
+        carrying the local address are recorded, if they are given. If a function for the VPN's process IDs is given,
+        the resource usage of these processes and their children is recorded as well, and if a function for the
+        counters of the exchange is given, these counters (like the requests answered by the server or the bytes of a
+        transfer).
         :param role: role of the host, needed for file name of data file
         :param vpn: VPN used, needed for file name of data file
+        :param tunnel_interface: name of the VPN's interface (like 'wg0') or None if no VPN is used
+        :param local_address: IP address of this host, used to find the physical interface
+        :param get_process_ids: function returning the IDs of the VPN's processes, or None
+        :param get_exchange_counters: function returning the counters of the exchange, or None
         """
         self.monitor = None
         self.interval = None
         self.data_handler = DataHandling(role, vpn)
+        self.lock = threading.Lock()  # guards the snapshots shared between sampler and manual polls
 
-        self.initial_bytes_sent = psutil.net_io_counters().bytes_sent
-        self.initial_bytes_recv = psutil.net_io_counters().bytes_recv
-        self.pps_sent, self.pps_recv = 0, 0
+        self.interfaces = {}  # maps 'tunnel' and 'wire' to the name of the interface
+        if tunnel_interface:
+            self.interfaces["tunnel"] = tunnel_interface
+        wire_interface = self.__get_interface_by_address(local_address)
+        if wire_interface:
+            self.interfaces["wire"] = wire_interface
+        if self.interfaces:
+            print_log(f"Monitoring interfaces: {self.interfaces}")
+
+        # interface counters are reset if an interface is recreated, so they are accumulated
+        self.interface_offsets = {}  # counters of earlier instances of an interface
+        self.interface_last = {}  # last read counters of an interface
+
+        self.process_tracker = None
+        if get_process_ids:
+            self.process_tracker = ProcessTracker(get_process_ids)
+
+        self.get_exchange_counters = get_exchange_counters
+
+        self.cpu_count = psutil.cpu_count() or 1
+        with self.lock:
+            self.initial_snapshot = self.__take_snapshot()
+        self.last_snapshot = self.initial_snapshot  # snapshot of the last tick
+        self.previous_snapshot = self.initial_snapshot  # snapshot of the tick before the last tick
+        self.monitor_cpu_percent = 0.0  # CPU usage of the sampler thread itself in the last tick
+        self.monitor_cpu_time = 0.0  # total CPU time of the sampler thread in seconds
 
     def start(self, auto=True, interval=0.1) -> None:
         """
-        Starts the monitoring and necessary threads for the updating values. Polls can happen automatically
-        repeatedly after a specified interval. Automatic polls start when this is executed. Manual polls are possible
-        as soon as this method was executed.
+        Starts the monitoring and the sampler thread. The sampler takes a snapshot every [interval] seconds, which is
+        used as the window for the packets per second values. Polls can happen automatically on every tick.
+        Manual polls are possible as soon as this method was executed.
         :param auto: True (default) for automatic polls every [interval] seconds, False for only manual polls
-        :param interval: interval for automatic polls in seconds
+        :param interval: interval for the sampler ticks and automatic polls in seconds
         """
         self.interval = interval
 
-        pps_sent = threading.Thread(target=self.__update_packets_per_second_sent)
-        pps_recv = threading.Thread(target=self.__update_packets_per_second_recv)
-
-        pps_sent.start()
-        pps_recv.start()
-
-        if auto:
-            self.monitor = threading.Thread(target=self.__updating_poll)
-            self.monitor.start()
+        self.monitor = threading.Thread(target=self.__sample, args=(auto,))
+        self.monitor.start()
 
     def stop(self) -> None:
         """
-        Stops the monitoring and signals all threads to stop. Automatic polls stop, manual polls are not
+        Stops the monitoring and signals the sampler thread to stop. Automatic polls stop, manual polls are not
         possible after calling this method. Signals the data handler to store the collected information in a file.
         """
         self.done.set()
+        if self.monitor:
+            self.monitor.join()
+
+        print_log(f"Monitoring used {self.monitor_cpu_time:.3f} s of CPU time.")
         self.data_handler.write_data()
 
     def poll(self, name) -> None:
         """
-        Does a manual poll. Sends current measurement data to the data handler.
+        Does a manual poll. Takes a new snapshot and sends the values derived from it to the data handler. The
+        packets per second are calculated over the window since the last sampler tick (or the one before, if the
+        last tick happened less than half an interval ago).
         :param name: short description of the situation in which the poll was created
         """
-        self.data_handler.add_data(
-            name=name,
-            time=datetime.datetime.now(),
-            cpu_perc=self.__get_cpu_percent(),
-            ram_perc=self.__get_ram_percent(),
-            pps_sent=self.pps_sent,
-            pps_recv=self.pps_recv,
-            bytes_sent=self.__get_upload_bytes(),
-            bytes_recv=self.__get_download_bytes(),
-        )
+        with self.lock:
+            snapshot = self.__take_snapshot()
+            base = self.last_snapshot
+            if self.interval and snapshot["monotonic"] - base["monotonic"] < self.interval / 2:
+                base = self.previous_snapshot
+
+        self.__add_data(name, snapshot, base)
 
-    def __updating_poll(self) -> None:
+    def record(self, name, category, values: dict) -> None:
         """
-        Repeatedly does automatic polls after the specified interval. Stops when 'done' is set. Names of automatic
-        polls are set to 'automatic poll'.
+        Records values measured outside the monitoring, like the duration of opening the VPN, together with the
+        current time. Records are stored in the same file as the polls, but have their own time axis.
+        :param name: short description of the recorded event
+        :param category: category of the values, like 'timing'
+        :param values: dictionary of the recorded numbers
         """
+        self.data_handler.add_record(name, datetime.datetime.now(), category, values)
+
+    def __sample(self, auto) -> None:
+        """
+        Takes a snapshot every [interval] seconds until 'done' is set. Ticks are scheduled on a fixed timetable, so
+        the time needed for a tick does not shift the following ticks. If auto is set, every tick is stored as a poll
+        named 'automatic poll'. Also measures the CPU time the sampler thread uses itself.
+        :param auto: True for storing every tick as automatic poll, False for only updating the snapshots
+        """
+        next_tick = time.monotonic()
+        last_thread_time = time.thread_time()
+        last_tick = next_tick
+
         while not self.done.is_set():
-            self.data_handler.add_data(
-                name="automatic poll",
-                time=datetime.datetime.now(),
-                cpu_perc=self.__get_cpu_percent(),
-                ram_perc=self.__get_ram_percent(),
-                pps_sent=self.pps_sent,
-                pps_recv=self.pps_recv,
-                bytes_sent=self.__get_upload_bytes(),
-                bytes_recv=self.__get_download_bytes(),
-            )
-            time.sleep(self.interval)
+            next_tick += self.interval
+            if self.done.wait(max(0.0, next_tick - time.monotonic())):
+                break
 
-    @staticmethod
-    def __get_cpu_percent():
+            with self.lock:
+                snapshot = self.__take_snapshot()
+                base = self.last_snapshot
+                self.previous_snapshot = self.last_snapshot
+                self.last_snapshot = snapshot
+
+            if auto:
+                self.__add_data("automatic poll", snapshot, base)
+
+            # CPU time of the sampler thread relative to all CPUs, comparable to the system-wide CPU usage
+            thread_time = time.thread_time()
+            elapsed = snapshot["monotonic"] - last_tick
+            self.monitor_cpu_time += thread_time - last_thread_time
+            if elapsed > 0:
+                self.monitor_cpu_percent = round(
+                    100 * (thread_time - last_thread_time) / elapsed / self.cpu_count, 3
+                )
+            last_thread_time = thread_time
+            last_tick = snapshot["monotonic"]
+
+    def __add_data(self, name, snapshot, base) -> None:
         """
-        :return: current relative CPU usage in percent
+        Derives all values from the snapshot and sends them to the data handler.
+        :param name: short description of the situation in which the poll was created
+        :param snapshot: snapshot of the poll
+        :param base: earlier snapshot, used as the start of the window for relative values
         """
-        return psutil.cpu_percent()
+        elapsed = snapshot["monotonic"] - base["monotonic"]
 
-    @staticmethod
-    def __get_ram_percent():
+        interfaces = {}
+        for role, counters in snapshot["interfaces"].items():
+            initial_counters = self.initial_snapshot["interfaces"][role]
+            for key in counters:
+                interfaces[f"{role}_{key}"] = counters[key] - initial_counters[key]
+
+        processes = None
+        if snapshot["processes"]:
+            cpu_time = snapshot["processes"]["cpu_time"]
+            base_cpu_time = base["processes"]["cpu_time"]
+            processes = {
+                "vpn_cpu_time": cpu_time,
+                "vpn_cpu_percent": round(
+                    100 * max(0.0, cpu_time - base_cpu_time) / elapsed / self.cpu_count, 3
+                ) if elapsed > 0 else 0.0,
+                "vpn_rss": snapshot["processes"]["rss"],
+                "vpn_ctx_switches": snapshot["processes"]["ctx_switches"],
+                "vpn_threads": snapshot["processes"]["threads"],
+                "vpn_processes": snapshot["processes"]["processes"],
+            }
+
+        counters = None
+        if snapshot["counters"]:
+            counters = dict(snapshot["counters"])
+            base_counters = base["counters"] or {}
+            if "requests" in counters:
+                requests = counters["requests"] - base_counters.get("requests", 0)
+                counters["requests_per_second"] = round(requests / elapsed, 3) if elapsed > 0 else 0.0
+                if "service_time" in counters:
+                    service_time = counters["service_time"] - base_counters.get("service_time", 0.0)
+                    counters["mean_service_time"] = service_time / requests if requests > 0 else 0.0
+            if "tcp_retransmits" in counters:
+                retransmits = counters["tcp_retransmits"] - base_counters.get("tcp_retransmits", 0)
+                counters["retransmits_per_second"] = round(retransmits / elapsed, 3) if elapsed > 0 else 0.0
+            for direction in ("recv", "sent"):
+                if f"bytes_{direction}" in counters:
+                    transferred = counters[f"bytes_{direction}"] - base_counters.get(f"bytes_{direction}", 0)
+                    counters[f"goodput_{direction}"] = round(
+                        8 * transferred / elapsed / 1000000, 3
+                    ) if elapsed > 0 else 0.0
+
+        self.data_handler.add_data(
+            name=name,
+            time=snapshot["time"],
+            cpu_perc=self.__get_cpu_percent(snapshot["cpu"], base["cpu"]),
+            ram_perc=snapshot["ram_percent"],
+            pps_sent=self.__get_packets_per_second(
+                snapshot["net"]["packets_sent"], base["net"]["packets_sent"], elapsed
+            ),
+            pps_recv=self.__get_packets_per_second(
+                snapshot["net"]["packets_recv"], base["net"]["packets_recv"], elapsed
+            ),
+            bytes_sent=snapshot["net"]["bytes_sent"] - self.initial_snapshot["net"]["bytes_sent"],
+            bytes_recv=snapshot["net"]["bytes_recv"] - self.initial_snapshot["net"]["bytes_recv"],
+            monitor_cpu_perc=self.monitor_cpu_percent,
+            interfaces=interfaces,
+            processes=processes,
+            counters=counters,
+        )
+
+    def __take_snapshot(self) -> dict:
         """
-        :return: current relative RAM usage in percent
+        Reads all counters at once. The host-wide network counters are the sum of the counters of all interfaces,
+        so all network values come from the same read. Has to be called while holding the lock.
+        :return: dictionary of the wall clock time, monotonic time, host-wide and per-interface network counters, CPU
+        times, RAM usage, resource usage of the VPN's processes (None if they are not followed) and counters of the
+        exchange (None if they are not followed)
         """
-        return psutil.virtual_memory()[2]
+        nic_counters = psutil.net_io_counters(pernic=True)
+
+        net = {"bytes_sent": 0, "bytes_recv": 0, "packets_sent": 0, "packets_recv": 0}
+        for counters in nic_counters.values():
+            for key in net:
+                net[key] += getattr(counters, key)
 
-    def __get_upload_bytes(self):
+        interfaces = {}
+        for role, interface in self.interfaces.items():
+            interfaces[role] = self.__get_interface_counters(interface, nic_counters.get(interface))
+
+        return {
+            "time": datetime.datetime.now(),
+            "monotonic": time.monotonic(),
+            "net": net,
+            "interfaces": interfaces,
+            "cpu": psutil.cpu_times(),
+            "ram_percent": psutil.virtual_memory()[2],
+            "processes": self.process_tracker.sample() if self.process_tracker else None,
+            "counters": self.get_exchange_counters() if self.get_exchange_counters else None,
+        }
+
+    def __get_interface_counters(self, interface, counters) -> dict:
         """
-        :return: difference of amount of upload bytes since start
+        Returns the accumulated counters of an interface. If the interface was deleted and created again (like the
+        tunnel interface between two exchanges), its counters start at 0 again, so the last counters of the earlier
+        instance are added. A missing interface keeps its last counters.
+        :param interface: name of the interface
+        :param counters: counters read for the interface, None if the interface does not exist
+        :return: dictionary of accumulated bytes and packets, sent and received
         """
-        return psutil.net_io_counters().bytes_sent - self.initial_bytes_sent
+        offsets = self.interface_offsets.setdefault(
+            interface, {"bytes_sent": 0, "bytes_recv": 0, "packets_sent": 0, "packets_recv": 0}
+        )
+        last = self.interface_last.setdefault(interface, dict.fromkeys(offsets, 0))
 
-    def __get_download_bytes(self):
+        if counters:
+            current = {key: getattr(counters, key) for key in offsets}
+            if any(current[key] < last[key] for key in offsets):  # interface was recreated
+                for key in offsets:
+                    offsets[key] += last[key]
+            self.interface_last[interface] = last = current
+
+        return {key: offsets[key] + last[key] for key in offsets}
+
+    @staticmethod
+    def __get_interface_by_address(address):
         """
-        :return: difference of amount of download bytes since start
+        Finds the interface that has the given IP address assigned.
+        :param address: IP address to look for, may be None
+        :return: name of the interface, None if no interface has the address
         """
-        return psutil.net_io_counters().bytes_recv - self.initial_bytes_recv
+        if not address:
+            return None
 
-    def __update_packets_per_second_sent(self):
+        for interface, addresses in psutil.net_if_addrs().items():
+            for entry in addresses:
+                # IPv6 link-local addresses can contain the scope, like 'fe80::1%eth0'
+                if entry.address.split("%")[0] == address:
+                    return interface
+
+        return None
+
+    @staticmethod
+    def __get_cpu_percent(cpu_times, base_cpu_times) -> float:
         """
-        Continuously calculates the packets per second (sent) value by using the specified interval.
-        :return: sent packets per second in the last interval
+        Calculates the relative CPU usage between two snapshots of CPU times, in the same way psutil does.
+        :param cpu_times: CPU times of the snapshot
+        :param base_cpu_times: CPU times of the earlier snapshot
+        :return: relative CPU usage in percent
         """
-        while not self.done.is_set():
-            before = psutil.net_io_counters().packets_sent
-            time.sleep(self.interval)
-            self.pps_sent = int(
-                (psutil.net_io_counters().packets_sent - before) / self.interval
-            )
 
-    def __update_packets_per_second_recv(self):
+        def get_total_and_idle(times):
+            # guest times are already contained in user times
+            total = sum(times) - getattr(times, "guest", 0) - getattr(times, "guest_nice", 0)
+            idle = times.idle + getattr(times, "iowait", 0)
+            return total, idle
+
+        total, idle = get_total_and_idle(cpu_times)
+        base_total, base_idle = get_total_and_idle(base_cpu_times)
+
+        total_delta = total - base_total
+        if total_delta <= 0:
+            return 0.0
+
+        busy_delta = total_delta - (idle - base_idle)
+        return round(min(100.0, max(0.0, 100 * busy_delta / total_delta)), 1)
+
+    @staticmethod
+    def __get_packets_per_second(packets, base_packets, elapsed) -> int:
         """
-        Continuously calculates the packets per second (received) value by using the specified interval.
-        :return: received packets per second in the last interval
+        :param packets: packet counter of the snapshot
+        :param base_packets: packet counter of the earlier snapshot
+        :param elapsed: time between the snapshots in seconds
+        :return: packets per second in the window between the snapshots
         """
-        while not self.done.is_set():
-            before = psutil.net_io_counters().packets_recv
-            time.sleep(self.interval)
-            self.pps_recv = int(
-                (psutil.net_io_counters().packets_recv - before) / self.interval
-            )
+        if elapsed <= 0:
+            return 0
+
+        return int((packets - base_packets) / elapsed)
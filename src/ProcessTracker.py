@@ -0,0 +1,106 @@
+import time
+
+import psutil
+
+
+class ProcessTracker:
+    """
+    Follows the processes of a VPN daemon, including all children (like the actual daemon started behind 'sudo'), and
+    sums up their resource usage. Processes can end and be replaced between two samples, for example when the VPN is
+    reopened for the next exchange, so cumulative values of ended processes are kept.
+    """
+
+    def __init__(self, get_process_ids, scan_interval=1.0) -> None:
+        """
+        :param get_process_ids: function returning the IDs of the root processes to follow, like the 'sudo' process
+        :param scan_interval: time in seconds after which children of the root processes are searched again
+        """
+        self.get_process_ids = get_process_ids
+        self.scan_interval = scan_interval
+
+        self.root_ids = set()
+        self.processes = {}  # maps process ID to psutil.Process
+        self.last_values = {}  # maps process ID to its last cumulative values
+        self.ended_cpu_time = 0.0  # CPU time of all processes that ended
+        self.ended_ctx_switches = 0  # context switches of all processes that ended
+        self.last_scan = None
+
+    def sample(self) -> dict:
+        """
+        Reads the current resource usage of all followed processes.
+        :return: dictionary of the cumulative CPU time in seconds, resident memory in bytes, cumulative number of
+        context switches, number of threads and number of processes
+        """
+        self.__update_processes()
+
+        cpu_time = self.ended_cpu_time
+        ctx_switches = self.ended_ctx_switches
+        rss, threads = 0, 0
+
+        for process_id, process in list(self.processes.items()):
+            try:
+                with process.oneshot():
+                    cpu_times = process.cpu_times()
+                    values = {
+                        "cpu_time": cpu_times.user + cpu_times.system,
+                        "ctx_switches": sum(process.num_ctx_switches()),
+                    }
+                    rss += process.memory_info().rss
+                    threads += process.num_threads()
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                self.__remove_process(process_id)
+                continue
+            except psutil.AccessDenied:
+                continue
+
+            self.last_values[process_id] = values
+            cpu_time += values["cpu_time"]
+            ctx_switches += values["ctx_switches"]
+
+        return {
+            "cpu_time": cpu_time,
+            "rss": rss,
+            "ctx_switches": ctx_switches,
+            "threads": threads,
+            "processes": len(self.processes),
+        }
+
+    def __update_processes(self) -> None:
+        """
+        Adds new root processes and their children, removes processes that ended. Children are only searched if the
+        root processes changed or the scan interval passed, since this needs to go through all processes of the host.
+        """
+        root_ids = set(self.get_process_ids())
+        now = time.monotonic()
+
+        for process_id, process in list(self.processes.items()):
+            if not process.is_running():  # also detects reused process IDs
+                self.__remove_process(process_id)
+
+        if root_ids == self.root_ids and self.last_scan and now - self.last_scan < self.scan_interval:
+            return
+
+        self.root_ids = root_ids
+        self.last_scan = now
+
+        for process_id in root_ids:
+            try:
+                root = self.processes.get(process_id) or psutil.Process(process_id)
+                self.processes[process_id] = root
+                for child in root.children(recursive=True):
+                    if child.pid not in self.processes:
+                        self.processes[child.pid] = child
+            except psutil.Error:
+                continue
+
+    def __remove_process(self, process_id) -> None:
+        """
+        Stops following a process and keeps its last cumulative values.
+        :param process_id: ID of the process that ended
+        """
+        self.processes.pop(process_id, None)
+        values = self.last_values.pop(process_id, None)
+
+        if values:
+            self.ended_cpu_time += values["cpu_time"]
+            self.ended_ctx_switches += values["ctx_switches"]
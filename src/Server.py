@@ -1,5 +1,6 @@
-import src.messages as messages
+import time
 
+import src.messages as messages
 from src.HostsManager import HostsManager
 
 
@@ -10,50 +11,144 @@ class Server:
     and sharing keys for the given VPN.
     """
 
-    def __init__(self, exchange_type, vpn_type) -> None:
+    def __init__(self, exchange_type, vpn_type, exchange_options=None) -> None:
         """
         Loads the hosts addresses and creates instances of the given VPN and exchange classes with the correct
         parameters.
         :param exchange_type: Class to be used as Exchange type
         :param vpn_type: Class to be used as VPN type
+        :param exchange_options: dictionary of further keyword arguments for the exchange, like {"rate": "100"}
         """
         messages.print_log("Initializing server...")
 
         self.hosts = HostsManager()
 
         self.vpn = vpn_type(role="server")
-        self.exchange = exchange_type(role="server", open_server_address="::", interface=self.vpn.interface_name)
+        self.exchange = exchange_type(
+            role="server", open_server_address="::", interface=self.vpn.interface_name, **(exchange_options or {})
+        )
 
         messages.print_log("Server initialized.")
 
     def run(self, number, monitor) -> bool:
         """
         Runs the exchange as often as given as input. Every exchange first opens the VPN, runs the exchange and
-        closes the VPN. Does a manual poll before each step.
+        closes the VPN. Does a manual poll before each step and records the time needed for opening and closing the VPN.
+        The exchange is closed at the end (like its server, which keeps listening across the exchanges).
         :param number: number of exchanges to be executed
         :param monitor: monitor for handling the polls
         :return: True for success, False otherwise
         """
-        for i in range(number):
-            messages.print_log(f"Starting exchange {i + 1}...")
+        try:
+            for i in range(number):
+                messages.print_log(f"Starting exchange {i + 1}...")
 
-            # open the VPN
-            monitor.poll("Server.run(): before opening VPN connection")
-            if not self.vpn.open():
-                return False
+                if not self.__open_vpn(monitor):
+                    return False
+
+                # do one exchange
+                monitor.poll("Server.run(): before doing next round of exchange")
+                return_code = self.exchange.run()
+                if return_code != 0:
+                    return False
+
+                if not self.__close_vpn(monitor):
+                    return False
+        finally:
+            self.__close_exchange(monitor)
 
-            # do one exchange
-            monitor.poll("Server.run(): before doing next round of exchange")
-            return_code = self.exchange.run()
-            if return_code != 0:
+        messages.print_log(f"Finished exchanges successfully.")
+        return True
+
+    def run_persistent(self, number, monitor, duration=None, idle_timeout=5.0) -> bool:
+        """
+        Opens the VPN once and runs the exchange as often as given as input through the established tunnel, then
+        closes the VPN. If a duration is given, exchanges are run until the duration passed and no request arrived
+        for [idle_timeout] seconds, since the client decides about the last exchange. The exchange is closed at the end.
+        :param number: number of exchanges to be executed, ignored if a duration is given
+        :param monitor: monitor for handling the polls
+        :param duration: time in seconds for running exchanges, None for running the given number of exchanges
+        :param idle_timeout: time in seconds to wait for a request after the duration passed
+        :return: True for success, False otherwise
+        """
+        try:
+            if not self.__open_vpn(monitor):
                 return False
 
-            # close the VPN
-            monitor.poll("Server.run(): before closing VPN connection")
-            if not self.vpn.close():
+            start = time.monotonic()
+            i = 0
+            while duration or i < number:
+                messages.print_log(f"Starting exchange {i + 1}...")
+
+                monitor.poll("Server.run(): before doing next round of exchange")
+                return_code = self.exchange.run(timeout=idle_timeout if duration else None)
+                if return_code == 0:
+                    i += 1
+                elif not duration or time.monotonic() - start >= duration:
+                    break
+
+            if not self.__close_vpn(monitor):
                 return False
+        finally:
+            self.__close_exchange(monitor)
+
+        if not duration and i < number:
+            return False
+
+        messages.print_log(f"Finished {i} exchanges successfully.")
+        return True
+
+    def __close_exchange(self, monitor) -> None:
+        """
+        Closes the exchange, stopping its server, and polls once more, so the last counters of the server are stored.
+        :param monitor: monitor for handling the polls
+        """
+        monitor.poll("Server.run(): before closing exchange")
+        self.exchange.close()
+
+    def __open_vpn(self, monitor) -> bool:
+        """
+        Opens the VPN and records the time needed, in total and per phase.
+        :param monitor: monitor for handling the polls
+        :return: True for success, False otherwise
+        """
+        monitor.poll("Server.run(): before opening VPN connection")
+
+        start = time.monotonic()
+        success = self.vpn.open()
+        duration = time.monotonic() - start
+
+        spans = self.vpn.pop_spans()
+        if spans:
+            monitor.record("Server.run(): phases of opening VPN connection", "open_spans", spans)
+        if not success:
+            return False
+        monitor.record("Server.run(): VPN connection opened", "timing", {"vpn_open": duration})
+
+        return True
+
+    def __close_vpn(self, monitor) -> bool:
+        """
+        Closes the VPN and records the time needed, in total and per phase.
+        :param monitor: monitor for handling the polls
+        :return: True for success, False otherwise
+        """
+        monitor.poll("Server.run(): before closing VPN connection")
+
+        start = time.monotonic()
+        success = self.vpn.close()
+        duration = time.monotonic() - start
+
+        spans = self.vpn.pop_spans()
+        if spans:
+            monitor.record("Server.run(): phases of closing VPN connection", "close_spans", spans)
+        if not success:
+            return False
+        timing = {"vpn_close": duration}
+        if self.vpn.shutdown_latency is not None:
+            timing["shutdown"] = self.vpn.shutdown_latency  # time the daemon needed for ending after SIGTERM
+        monitor.record("Server.run(): VPN connection closed", "timing", timing)
 
-        messages.print_log(f"Finished exchanges successfully.")
         return True
 
     def keygen(self) -> bool:  # only needed for VPN usage
@@ -0,0 +1,398 @@
+import os
+import socket
+import struct
+import tempfile
+import time
+
+import src.messages as messages
+from src.exchanges.Exchange import Exchange
+
+header = struct.Struct("!cQ")  # direction (b'D' server to client, b'U' client to server) and number of bytes
+acknowledgement = struct.Struct("!Q")  # number of bytes the server received
+size_units = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+# IP_MTU and IPV6_MTU of Linux, not exported by the socket module
+path_mtu_options = {socket.AF_INET: (socket.IPPROTO_IP, 14), socket.AF_INET6: (socket.IPPROTO_IPV6, 24)}
+
+
+class Bulk(Exchange):
+    """
+    Implements a bulk transfer over TCP, measuring the goodput of the tunnel. For every exchange, the client connects
+    to the server and transfers [size] bytes of payload in the given direction: 'download' from the server, 'upload'
+    to the server or 'both', one after the other over the same connection. The sending host sends from a file of
+    random bytes allocated once, with socket.sendfile() (without copying the payload into user space), the receiving
+    host discards the payload into a reused buffer. The client keeps the number of bytes, the time and the goodput in
+    Mbit/s of every direction in self.results. Both hosts count the payload bytes for the monitoring.
+
+    If a list of sizes is given, the exchanges sweep over them, one size per exchange, starting over after the last
+    one. Sizes around the maximum segment size of the connection (the payload of one packet, given by the MTU of the
+    tunnel) are added, since the goodput changes most where a payload needs one more packet.
+    """
+
+    def __init__(self, role, open_server_address, interface, size="1M", direction="both", payload_size="64M",
+                 transfer_timeout=10, sizes=None, mtu_probes=4, mtu_step=16) -> None:
+        """
+        :param role: role of the host
+        :param open_server_address: address to be opened on the server, or already open for the client
+        :param interface: name of the interface for the client to use
+        :param size: number of bytes of one transfer, like 1500, '64K' or '1G'
+        :param direction: 'download', 'upload' or 'both'
+        :param payload_size: maximum size of the file of random bytes, larger transfers send it repeatedly. The file is
+        only as large as the largest transfer of this host.
+        :param transfer_timeout: time in seconds without progress after which a transfer fails
+        :param sizes: sizes to sweep over instead of [size], as list like '64,1K,1M' or geometric series
+        'MIN:MAX:FACTOR' like '64:1G:4', None (default) for no sweep
+        :param mtu_probes: number of sizes added on each side of the maximum segment size when sweeping
+        :param mtu_step: distance in bytes between the sizes added around the maximum segment size
+        """
+        super().__init__(role, open_server_address, 9999, interface)
+
+        self.size = parse_size(size)
+        self.direction = direction
+        self.payload_size = parse_size(payload_size)
+        self.transfer_timeout = float(transfer_timeout)
+        if direction not in ("download", "upload", "both"):
+            raise ValueError("direction has to be download, upload or both")
+        if self.size < 1 or self.payload_size < 1 or self.transfer_timeout <= 0:
+            raise ValueError("size, payload_size and transfer_timeout have to be positive")
+
+        self.sizes = parse_sizes(sizes) if sizes else None
+        self.mtu_probes = int(mtu_probes)
+        self.mtu_step = parse_size(mtu_step)
+        if self.sizes is not None and (not self.sizes or min(self.sizes) < 1):
+            raise ValueError("sizes have to be positive")
+        if self.mtu_probes < 0 or self.mtu_step < 1:
+            raise ValueError("mtu_probes can not be negative, mtu_step has to be positive")
+        self.sweep = None  # sizes of the sweep, known after the first connection
+        self.sweep_index = 0  # index of the size of the next exchange in the sweep
+
+        self.payload = None  # file of random bytes, sent by sendfile()
+        self.payload_length = 0  # size of the file of random bytes
+        self.buffer = bytearray(1024 ** 2)  # receives the payload, reused for all transfers
+        self.listener = None  # listening socket of the server, kept across exchanges
+        self.counters = {"transfers": 0, "bytes_recv": 0, "bytes_sent": 0}
+
+    def run(self, timeout=None) -> int:
+        """
+        Decides what is executed based on the role.
+        :param timeout: time in seconds the server waits for the client, None (default) for waiting without limit
+        :return: 0 for success, 1 for an error that can be solved by running again, 2 for an error that requires
+        reopening the interface
+        """
+        if self.role == "server":
+            # downloads of the client's sweep sizes not known here repeat the file
+            self.__prepare_payload(max(self.sizes or [self.size]))
+            return self.__run_server(timeout)
+        elif self.role == "client":
+            return self.__run_client()
+
+        return 1  # if role was not server or client
+
+    def close(self) -> None:
+        """
+        Closes the listening socket of the server and the file of the payload.
+        """
+        if self.listener:
+            self.listener.close()
+            self.listener = None
+
+        if self.payload:
+            self.payload.close()
+            self.payload = None
+            self.payload_length = 0
+
+    def get_counters(self) -> dict:
+        """
+        :return: dictionary of the number of 'transfers' and the payload bytes received ('bytes_recv') and sent
+        ('bytes_sent'), all since the start of the run
+        """
+        return dict(self.counters)
+
+    def __prepare_payload(self, largest) -> None:
+        """
+        Creates the file of random bytes if it does not exist or is too small, before any transfer, so it is not
+        measured.
+        :param largest: size in bytes of the largest transfer, the file is at most [payload_size] bytes large
+        """
+        length = min(self.payload_size, largest)
+        if self.payload and self.payload_length >= length:
+            return
+
+        if self.payload:
+            self.payload.close()
+        self.payload = create_payload(length)
+        self.payload_length = length
+
+    def __run_server(self, timeout=None) -> int:
+        """
+        Opens the listening socket if it is not open yet, accepts one connection and serves its transfers until the
+        client closes it.
+        :param timeout: time in seconds to wait for the connection, None for waiting without limit
+        :return: 0 for success, 1 otherwise (also if no connection arrived in time)
+        """
+        if not self.listener:
+            try:
+                self.listener = socket.create_server(
+                    (self.open_server_address, self.open_server_port), family=socket.AF_INET6, dualstack_ipv6=True
+                )
+            except OSError as err:
+                messages.print_err("Something went wrong while opening the bulk transfer server.")
+                print(f"{err=}")
+                return 1
+
+        print("Awaiting connection... ", end="", flush=True)
+        self.listener.settimeout(timeout)
+        try:
+            connection, _ = self.listener.accept()
+        except socket.timeout:
+            messages.print_log("No connection arrived in time.")
+            return 1
+
+        with connection:
+            connection.settimeout(self.transfer_timeout)
+            # small payloads are sent at once instead of waiting for the acknowledgement of the header (Nagle)
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            try:
+                while self.__serve_transfer(connection):
+                    pass
+            except (OSError, ValueError) as err:
+                messages.print_err(f"Transfer failed: {err}")
+                return 1
+
+        messages.print_log("Transfers done.")
+        return 0
+
+    def __serve_transfer(self, connection) -> bool:
+        """
+        Reads the header of the next transfer and sends or receives its payload. Acknowledges received payload with
+        the number of bytes, so the client can stop its clock.
+        :param connection: socket connected to the client
+        :return: True if a transfer was served, False if the client closed the connection
+        """
+        data = self.__receive_exactly(connection, header.size)
+        if not data:
+            return False
+
+        direction, size = header.unpack(data)
+        if direction == b"D":
+            self.__send_payload(connection, size)
+        elif direction == b"U":
+            self.__receive_payload(connection, size)
+            connection.sendall(acknowledgement.pack(size))
+        else:
+            raise ValueError(f"unknown direction {direction}")
+
+        self.counters["transfers"] += 1
+        return True
+
+    def __run_client(self) -> int:
+        """
+        Connects to the server and runs the transfers of one exchange. Keeps the 'size' of the transfers, the 'mtu' and
+        maximum segment size ('mss') of the connection, 'download_bytes', 'download_time' and 'download_goodput' in
+        Mbit/s (and the same for 'upload') in self.results. When sweeping, the next size is used after a success.
+        :return: 0 for success, 1 for an error that can be solved by running again, 2 for an error that requires
+        reopening the interface
+        """
+        directions = ("download", "upload") if self.direction == "both" else (self.direction,)
+        self.results = {}
+
+        try:
+            connection = self.__connect()
+        except socket.timeout:
+            return 2
+        except OSError as err:
+            messages.print_log(f"Could not connect: {err}")
+            return 1
+
+        with connection:
+            mtu, mss = get_path_mtu(connection)
+            size = self.size
+            if self.sizes:
+                if self.sweep is None:
+                    self.sweep = get_sweep_sizes(self.sizes, mss, self.mtu_probes, self.mtu_step)
+                    messages.print_log(f"Sweeping over {len(self.sweep)} sizes (MTU {mtu}, MSS {mss}).")
+                size = self.sweep[self.sweep_index % len(self.sweep)]
+            self.results = {"size": size, "mtu": mtu, "mss": mss}
+            self.__prepare_payload(max(self.sweep) if self.sweep else self.size)
+
+            try:
+                for direction in directions:
+                    start = time.perf_counter()
+                    if direction == "download":
+                        connection.sendall(header.pack(b"D", size))
+                        self.__receive_payload(connection, size)
+                    else:
+                        connection.sendall(header.pack(b"U", size))
+                        self.__send_payload(connection, size)
+                        received, = acknowledgement.unpack(self.__receive_exactly(connection, acknowledgement.size))
+                        if received != size:
+                            raise ValueError(f"server received {received} of {size} bytes")
+                    duration = time.perf_counter() - start
+
+                    self.counters["transfers"] += 1
+                    self.results[f"{direction}_bytes"] = size
+                    self.results[f"{direction}_time"] = duration
+                    self.results[f"{direction}_goodput"] = 8 * size / duration / 1000000
+                    messages.print_log(
+                        f"{direction.capitalize()} of {size} bytes: {self.results[f'{direction}_goodput']:.2f} "
+                        f"Mbit/s."
+                    )
+            except socket.timeout:
+                messages.print_warn(f"No progress within {self.transfer_timeout} s.")
+                return 2
+            except (OSError, ValueError) as err:
+                messages.print_warn(f"Transfer failed: {err}")
+                return 1
+
+        self.sweep_index += 1
+        return 0
+
+    def __connect(self):
+        """
+        Connects to the server, over the interface of the VPN if one is used. Disables Nagle's algorithm, so the
+        timing of small transfers is not delayed by the delayed acknowledgement of the other host.
+        :return: connected socket
+        """
+        family, kind, protocol, _, address = socket.getaddrinfo(
+            self.open_server_address, self.open_server_port, type=socket.SOCK_STREAM
+        )[0]
+        connection = socket.socket(family, kind, protocol)
+        try:
+            if self.interface:
+                connection.setsockopt(socket.SOL_SOCKET, socket.SO_BINDTODEVICE, self.interface.encode())
+            # without Nagle, a small payload does not wait for the acknowledgement of the header
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connection.settimeout(self.transfer_timeout)
+            connection.connect(address)
+        except OSError:
+            connection.close()
+            raise
+
+        return connection
+
+    def __send_payload(self, connection, size) -> None:
+        """
+        Sends [size] bytes of the payload file with sendfile(), repeating the file if it is smaller.
+        :param connection: connected socket
+        :param size: number of bytes to send
+        """
+        remaining = size
+        while remaining > 0:
+            sent = connection.sendfile(self.payload, 0, min(remaining, self.payload_length))
+            if not sent:
+                raise ConnectionError("connection closed while sending")
+            remaining -= sent
+            self.counters["bytes_sent"] += sent
+
+    def __receive_payload(self, connection, size) -> None:
+        """
+        Receives [size] bytes into the reused buffer and discards them.
+        :param connection: connected socket
+        :param size: number of bytes to receive
+        """
+        view = memoryview(self.buffer)
+        remaining = size
+        while remaining > 0:
+            received = connection.recv_into(view, min(remaining, len(view)))
+            if not received:
+                raise ConnectionError("connection closed while receiving")
+            remaining -= received
+            self.counters["bytes_recv"] += received
+
+    @staticmethod
+    def __receive_exactly(connection, size) -> bytes:
+        """
+        Receives a message of fixed size, like a header.
+        :param connection: connected socket
+        :param size: number of bytes of the message
+        :return: the message, empty if the connection was closed before its first byte
+        """
+        data = b""
+        while len(data) < size:
+            chunk = connection.recv(size - len(data))
+            if not chunk:
+                if data:
+                    raise ConnectionError("connection closed within a message")
+                break
+            data += chunk
+
+        return data
+
+
+def parse_size(size) -> int:
+    """
+    Converts a size with an optional binary unit into a number of bytes.
+    :param size: number or string like 1500, '64K', '1M' or '2G'
+    :return: number of bytes
+    """
+    text = str(size).strip().upper().removesuffix("B").removesuffix("I")
+    unit = text[-1:] if text[-1:] in size_units else ""
+    return int(float(text.removesuffix(unit)) * size_units[unit])
+
+
+def parse_sizes(sizes) -> list:
+    """
+    Converts a list of sizes or a geometric series of sizes into numbers of bytes.
+    :param sizes: list like '64,1K,1M' or geometric series 'MIN:MAX:FACTOR' like '64:1G:4'
+    :return: list of numbers of bytes
+    """
+    text = str(sizes)
+    if ":" not in text:
+        return [parse_size(size) for size in text.split(",")]
+
+    minimum, maximum, factor = text.split(":")
+    size, maximum, factor = parse_size(minimum), parse_size(maximum), float(factor)
+    if size < 1 or factor <= 1:
+        raise ValueError("geometric series needs a positive minimum and a factor larger than 1")
+
+    result = []
+    while size <= maximum:
+        result.append(round(size))
+        size *= factor
+
+    return result
+
+
+def get_sweep_sizes(sizes, mss, probes, step) -> list:
+    """
+    Adds sizes around the maximum segment size to the sizes of a sweep: [probes] sizes [step] bytes apart on each side,
+    the maximum segment size itself and one byte more, the smallest payload needing two packets.
+    :param sizes: list of numbers of bytes
+    :param mss: maximum segment size of the connection
+    :param probes: number of sizes on each side of the maximum segment size, 0 for adding none
+    :param step: distance in bytes between the added sizes
+    :return: sorted list of numbers of bytes without duplicates
+    """
+    result = set(sizes)
+    if probes:
+        result.update(mss + i * step for i in range(-probes, probes + 1) if mss + i * step > 0)
+        result.add(mss + 1)
+
+    return sorted(result)
+
+
+def get_path_mtu(connection) -> (int, int):
+    """
+    Reads the MTU of the route of a connection (the MTU of the tunnel, if the connection goes through one) and the
+    maximum segment size, the payload TCP puts into one packet.
+    :param connection: connected TCP socket
+    :return: tuple of MTU and maximum segment size in bytes
+    """
+    level, option = path_mtu_options[connection.family]
+    return connection.getsockopt(level, option), connection.getsockopt(socket.IPPROTO_TCP, socket.TCP_MAXSEG)
+
+
+def create_payload(size):
+    """
+    Creates a temporary file of random bytes, so a VPN compressing its traffic sees incompressible payload.
+    :param size: size of the file in bytes
+    :return: the file, opened for reading
+    """
+    payload = tempfile.TemporaryFile()
+    remaining = size
+    while remaining > 0:
+        chunk = min(remaining, 1024 ** 2)
+        payload.write(os.urandom(chunk))
+        remaining -= chunk
+    payload.flush()
+
+    return payload
@@ -17,6 +17,8 @@ class Exchange:
         self.open_server_address = open_server_address
         self.open_server_port = open_server_port
         self.interface = interface
+        self.results = {}  # measurements of the last attempt, like timers of the request, recorded by the client
+        self.histogram = None  # LatencyHistogram of the last attempt if the exchange counts latencies, recorded too
 
         if role not in ("server", "client"):
             messages.print_err(
@@ -26,10 +28,31 @@ class Exchange:
 
         self.role = role
 
-    def run(self):
+    def run(self, timeout=None):
         """
         Executes the exchange with the set parameters. Implementation is done in inheriting classes.
+        :param timeout: time in seconds the server waits for the client, None (default) for waiting without limit
         :return: raises NotImplementedError in base implementation
         """
         messages.print_err("Exchange.run(self): NOT IMPLEMENTED")
         raise NotImplementedError
+
+    def reset(self) -> None:
+        """
+        Forgets connections kept from earlier exchanges, called after the VPN was opened again. Base implementation
+        does nothing, for exchanges that do not keep connections.
+        """
+
+    def close(self) -> None:
+        """
+        Releases everything kept across exchanges, like open connections or a running server. Called once after all
+        exchanges. Base implementation does nothing.
+        """
+
+    def get_counters(self) -> dict:
+        """
+        Returns counters of the exchange for the monitoring, like the requests answered by a server. Called by the
+        sampler thread of the monitoring. Base implementation returns no counters.
+        :return: dictionary of the counters since the start of the run
+        """
+        return {}
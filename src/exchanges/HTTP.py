@@ -1,5 +1,8 @@
+import queue
 import socket
-from http.server import BaseHTTPRequestHandler, HTTPServer
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from io import BytesIO
 
 import pycurl
@@ -7,11 +10,175 @@ import pycurl
 import src.messages as messages
 from src.exchanges.Exchange import Exchange
 
+# timers of libcurl recorded for every request, in microseconds from the start of the transfer
+curl_timers = {
+    "connect": pycurl.CONNECT_TIME_T,
+    "pretransfer": pycurl.PRETRANSFER_TIME_T,
+    "starttransfer": pycurl.STARTTRANSFER_TIME_T,
+    "total": pycurl.TOTAL_TIME_T,
+}
+
+
+class ThreadingHTTPServerV6(ThreadingHTTPServer):
+    """
+    HTTP Server using IPv6, handling every connection in its own thread. Request handlers put every request that ends
+    an exchange into the queue 'requests'. Counts the requests answered, their bytes and the time needed for answering
+    them, for the monitoring.
+    """
+    address_family = socket.AF_INET6
+
+    def __init__(self, server_address, request_handler) -> None:
+        """
+        :param server_address: tuple of address and port
+        :param request_handler: class handling the requests, inheriting from CountingRequestHandler
+        """
+        super().__init__(server_address, request_handler)
+        self.requests = queue.Queue()
+        self.thread = None  # thread accepting the connections
+        self.lock = threading.Lock()  # guards the connections and counters
+        self.connections = set()  # sockets of the open connections
+        self.counters = {"requests": 0, "bytes_recv": 0, "bytes_sent": 0, "service_time": 0.0}
+
+    def start(self) -> None:
+        """
+        Serves the requests in a thread of its own until stop() is called.
+        """
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops accepting connections, closes the open ones (kept-alive connections would wait for further requests) and
+        waits until every thread handling a connection ended.
+        """
+        self.shutdown()
+        self.thread.join()
+
+        with self.lock:
+            connections = list(self.connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass  # already closed by the client
+
+        self.server_close()  # joins the threads of the connections
+
+    def count_request(self, bytes_recv, bytes_sent, service_time) -> None:
+        """
+        Counts one answered request.
+        :param bytes_recv: bytes of the request
+        :param bytes_sent: bytes of the response
+        :param service_time: time in seconds from reading the request line until the response was sent
+        """
+        with self.lock:
+            self.counters["requests"] += 1
+            self.counters["bytes_recv"] += bytes_recv
+            self.counters["bytes_sent"] += bytes_sent
+            self.counters["service_time"] += service_time
+
+    def get_counters(self) -> dict:
+        """
+        :return: dictionary of the number of 'requests' answered, their 'bytes_recv' and 'bytes_sent' and the
+        'service_time' in seconds, all since the server was started
+        """
+        with self.lock:
+            return dict(self.counters)
+
+
+class CountingRequestHandler(BaseHTTPRequestHandler):
+    """
+    Base class for the request handlers of ThreadingHTTPServerV6. Counts the bytes and the service time of every request,
+    without the time a kept-alive connection waits for the next request. Registers the connection with the server, so
+    it can be closed when the server stops.
+    """
+
+    def setup(self):
+        super().setup()
+        self.rfile = CountingFile(self.rfile)
+        self.wfile = CountingFile(self.wfile)
+        self.request_start = None
+        with self.server.lock:
+            self.server.connections.add(self.connection)
+
+    def finish(self):
+        try:
+            super().finish()
+        finally:
+            with self.server.lock:
+                self.server.connections.discard(self.connection)
+
+    def parse_request(self):
+        self.request_start = time.perf_counter()  # the request line was read
+        return super().parse_request()
+
+    def handle_one_request(self):
+        bytes_recv = self.rfile.count
+        bytes_sent = self.wfile.count
+        self.request_start = None
+
+        super().handle_one_request()
+
+        if self.request_start is not None:
+            self.server.count_request(
+                self.rfile.count - bytes_recv, self.wfile.count - bytes_sent, time.perf_counter() - self.request_start
+            )
+
+
+class CountingFile:
+    """
+    Wraps the file of a connection and counts the bytes read from or written to it.
+    """
+
+    def __init__(self, file) -> None:
+        """
+        :param file: file to be wrapped
+        """
+        self.file = file
+        self.count = 0
+
+    def read(self, *args):
+        data = self.file.read(*args)
+        self.count += len(data)
+        return data
+
+    def readline(self, *args):
+        data = self.file.readline(*args)
+        self.count += len(data)
+        return data
+
+    def write(self, data):
+        self.count += len(data)
+        return self.file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+def start_server(address, port, request_handler):
+    """
+    Creates a ThreadingHTTPServerV6 and starts serving.
+    :param address: address for opening the server
+    :param port: port for opening the server
+    :param request_handler: class handling the requests
+    :return: the running server, None if it could not be opened
+    """
+    try:
+        server = ThreadingHTTPServerV6((address, port), request_handler)
+    except Exception as err:
+        messages.print_err("Something went wrong while opening the HTTP server.")
+        print(f"{err=}")
+        return None
+
+    server.start()
+    return server
+
 
 class HTTP(Exchange):
     """
-    Implements an HTTP exchange. The server opens port 80 and waits. The client sends one HTTP GET packet and expects
-    a '200 OK' response. The server closes after handling the packet.
+    Implements an HTTP exchange. The server opens port 80 once and answers every request in its own thread, one
+    exchange ends after one request was answered. The client sends one HTTP GET packet over a new connection and
+    expects a '200 OK' response.
     """
 
     def __init__(self, role, open_server_address, interface) -> None:
@@ -22,57 +189,66 @@ class HTTP(Exchange):
         """
         super().__init__(role, open_server_address, 80, interface)
 
-    def run(self) -> int:
+        self.server = None  # HTTP server, kept across exchanges
+
+    def run(self, timeout=None) -> int:
         """
         Decides what is executed based on the role.
+        :param timeout: time in seconds the server waits for a request, None (default) for waiting without limit
         :return: 0 for success, 1 for an error that can be solved by running again, 2 for an error that requires
         reopening the interface
         """
         if self.role == "server":
-            return self.__run_server(self.open_server_address, self.open_server_port)
+            return self.__run_server(timeout)
         elif self.role == "client":
-            return self.__run_client(self.open_server_address, self.open_server_port, self.interface)
+            return self.__run_client()
 
         return 1  # if role was not server or client
 
-    @staticmethod
-    def __run_server(address, port) -> int:
+    def close(self) -> None:
         """
-        Creates the IPv6 HTTP Server and waits for one request. Closes afterward.
-        :param address: address for opening the server
-        :param port: port for opening the server
-        :return: 0 for success, 1 otherwise
+        Stops the server.
         """
-        try:
-            server = HTTPServerV6((address, port), HTTP.RequestHandler)
+        if self.server:
+            self.server.stop()
+            self.server = None
 
-            print("Awaiting request... ", end="", flush=True)
-            server.handle_request()
+    def get_counters(self) -> dict:
+        """
+        :return: counters of the server (see ThreadingHTTPServerV6.get_counters), empty if it is not running
+        """
+        server = self.server
+        return server.get_counters() if server else {}
 
-            messages.print_log("Closing server.")
-            server.server_close()
-            return 0
-        except Exception as err:
-            messages.print_err(
-                "Something went wrong while running the HTTP exchange (server)."
-            )
-            print(f"{err=}")
+    def __run_server(self, timeout=None) -> int:
+        """
+        Starts the server if it is not running yet and waits until it answered one request.
+        :param timeout: time in seconds to wait for the request, None for waiting without limit
+        :return: 0 for success, 1 otherwise (also if no request arrived in time)
+        """
+        if not self.server:
+            self.server = start_server(self.open_server_address, self.open_server_port, HTTP.RequestHandler)
+            if not self.server:
+                return 1
+
+        print("Awaiting request... ", end="", flush=True)
+        try:
+            self.server.requests.get(timeout=timeout)
+        except queue.Empty:
+            messages.print_log("No request arrived in time.")
             return 1
 
-    @staticmethod
-    def __run_client(address, port, interface) -> int:
+        messages.print_log("Request answered.")
+        return 0
+
+    def __run_client(self) -> int:
         """
         Generates the GET packet for the server. Specifies the interface to be used for sending, if a VPN is used.
-        Expects '200 OK' response.
-        :param address: address on which the server runs
-        :param port: open server port
-        :param interface: interface to be used for transmission, has to exist
+        Expects '200 OK' response. Keeps the timers of libcurl and the response code in self.results.
         :return: 0 for success, 1 for an error that can be solved by running again, 2 for an error that requires
         reopening the interface
         """
-        buffer = BytesIO()  # buffer for storing response
-
-        url = f"http://{address}:{port}"
+        url = f"http://{self.open_server_address}:{self.open_server_port}"
 
         # set Curl parameters
         c = pycurl.Curl()
@@ -80,39 +256,55 @@ class HTTP(Exchange):
         c.setopt(pycurl.HTTPGET, True)
 
         # if the VPN uses a different interface, get its name
-        if interface:
-            c.setopt(pycurl.INTERFACE, interface)
+        if self.interface:
+            c.setopt(pycurl.INTERFACE, self.interface)
 
         c.setopt(pycurl.TIMEOUT, 2)
-        c.setopt(pycurl.WRITEDATA, buffer)
+        c.setopt(pycurl.WRITEDATA, BytesIO())  # buffer for storing response
 
         try:
             c.perform()
-            response_code = c.getinfo(pycurl.RESPONSE_CODE)
-            c.close()
-        except pycurl.error as e:
-            if "28" in str(e):  # 28 is the error code for timeouts
-                return 2
+            error = 0
+        except pycurl.error as err:
+            error = err.args[0]
+
+        self.results = get_curl_results(c, error)
+        c.close()
+
+        if error == pycurl.E_OPERATION_TIMEDOUT:
+            return 2
+        if error:
             return 1
 
-        if response_code == 200:
+        if self.results["response_code"] == 200:
             messages.print_log("Request successful!")
             return 0
 
         return 1
 
-    class RequestHandler(BaseHTTPRequestHandler):
+    class RequestHandler(CountingRequestHandler):
         """
-        Specifies the response to a GET packet. Only sends '200 OK'.
+        Specifies the response to a GET packet. Only sends '200 OK', the connection is closed afterward.
         """
 
         def do_GET(self):
             self.send_response(200)
             self.end_headers()
+            self.server.requests.put(time.monotonic())
 
 
-class HTTPServerV6(HTTPServer):
+def get_curl_results(curl, error=0) -> dict:
     """
-    Normal HTTP Server using IPv6.
+    Reads the timers of libcurl and the response code of the last request of a curl handle. The timers are in seconds
+    from the start of the request: 'connect' until the TCP connection was established, 'pretransfer' until the request
+    could be sent, 'starttransfer' until the first byte of the response arrived and 'total' until the response was
+    complete.
+    :param curl: pycurl.Curl after perform()
+    :param error: libcurl error code of the request, 0 if it succeeded
+    :return: dictionary of the timers, the response code and the error code
     """
-    address_family = socket.AF_INET6
+    results = {name: curl.getinfo(timer) / 1000000 for name, timer in curl_timers.items()}
+    results["response_code"] = curl.getinfo(pycurl.RESPONSE_CODE)
+    results["curl_error"] = error
+
+    return results
@@ -0,0 +1,164 @@
+import queue
+import time
+
+import pycurl
+
+import src.messages as messages
+from src.exchanges.Exchange import Exchange
+from src.exchanges.HTTP import CountingRequestHandler, get_curl_results, start_server
+
+
+class HTTPKeepAlive(Exchange):
+    """
+    Implements an HTTP exchange over a kept-alive connection. The server opens port 80 once and answers every GET with
+    '200 OK' over HTTP/1.1, keeping the connection open. The client keeps one curl handle for all exchanges, so only
+    the first request after opening the VPN connects through the fresh tunnel, all further requests reuse the
+    connection. The latency of the first request (including the TCP handshake) and of the following requests are
+    recorded separately, so the second one shows the overhead of the VPN per packet.
+    """
+
+    def __init__(self, role, open_server_address, interface) -> None:
+        """
+        :param role: role of the host
+        :param open_server_address: address to be opened on the server, or already open for the client
+        :param interface: name of the interface for the client to use
+        """
+        super().__init__(role, open_server_address, 80, interface)
+
+        self.curl = None  # curl handle of the client, kept across exchanges
+        self.fresh = True  # True if the next request of the client has to open a new connection
+        self.server = None  # HTTP server, kept across exchanges
+
+    def run(self, timeout=None) -> int:
+        """
+        Decides what is executed based on the role.
+        :param timeout: time in seconds the server waits for a request, None (default) for waiting without limit
+        :return: 0 for success, 1 for an error that can be solved by running again, 2 for an error that requires
+        reopening the interface
+        """
+        if self.role == "server":
+            return self.__run_server(timeout)
+        elif self.role == "client":
+            return self.__run_client()
+
+        return 1  # if role was not server or client
+
+    def reset(self) -> None:
+        """
+        Makes the next request of the client open a new connection, since the old one went through the closed tunnel.
+        """
+        self.fresh = True
+
+    def close(self) -> None:
+        """
+        Closes the curl handle of the client or stops the server.
+        """
+        if self.curl:
+            self.curl.close()
+            self.curl = None
+
+        if self.server:
+            self.server.stop()
+            self.server = None
+
+    def get_counters(self) -> dict:
+        """
+        :return: counters of the server (see ThreadingHTTPServerV6.get_counters), empty if it is not running
+        """
+        server = self.server
+        return server.get_counters() if server else {}
+
+    def __run_server(self, timeout=None) -> int:
+        """
+        Starts the server if it is not running yet and waits until it answered one request.
+        :param timeout: time in seconds to wait for the request, None for waiting without limit
+        :return: 0 for success, 1 otherwise (also if no request arrived in time)
+        """
+        if not self.server:
+            self.server = start_server(self.open_server_address, self.open_server_port, HTTPKeepAlive.RequestHandler)
+            if not self.server:
+                return 1
+
+        print("Awaiting request... ", end="", flush=True)
+        try:
+            self.server.requests.get(timeout=timeout)
+        except queue.Empty:
+            messages.print_log("No request arrived in time.")
+            return 1
+
+        messages.print_log("Request answered.")
+        return 0
+
+    def __run_client(self) -> int:
+        """
+        Sends one GET request with the kept curl handle and expects '200 OK'. Keeps the timers of libcurl in
+        self.results, and the latency of the request as 'first_request' if a new connection was opened, as 'request'
+        otherwise.
+        :return: 0 for success, 1 for an error that can be solved by running again, 2 for an error that requires
+        reopening the interface
+        """
+        if not self.curl:
+            self.curl = self.__create_handle()
+
+        self.curl.setopt(pycurl.FRESH_CONNECT, self.fresh)
+
+        try:
+            self.curl.perform()
+            error = 0
+        except pycurl.error as err:
+            error = err.args[0]
+
+        self.results = get_curl_results(self.curl, error)
+
+        if error:
+            self.fresh = True  # the connection can not be used anymore
+            if error == pycurl.E_OPERATION_TIMEDOUT:
+                return 2
+            return 1
+
+        self.fresh = False
+        if self.curl.getinfo(pycurl.NUM_CONNECTS) > 0:
+            self.results["first_request"] = self.results["total"]
+        else:
+            self.results["request"] = self.results["total"]
+
+        if self.results["response_code"] == 200:
+            messages.print_log("Request successful!")
+            return 0
+
+        return 1
+
+    def __create_handle(self):
+        """
+        Creates the curl handle for all requests of the client. Specifies the interface to be used for sending, if a
+        VPN is used.
+        :return: pycurl.Curl
+        """
+        c = pycurl.Curl()
+        c.setopt(pycurl.URL, f"http://{self.open_server_address}:{self.open_server_port}")
+        c.setopt(pycurl.HTTPGET, True)
+        c.setopt(pycurl.HTTP_VERSION, pycurl.CURL_HTTP_VERSION_1_1)
+
+        # if the VPN uses a different interface, get its name
+        if self.interface:
+            c.setopt(pycurl.INTERFACE, self.interface)
+
+        c.setopt(pycurl.TIMEOUT, 2)
+        c.setopt(pycurl.WRITEFUNCTION, lambda data: None)  # the response has no body
+
+        return c
+
+    class RequestHandler(CountingRequestHandler):
+        """
+        Specifies the response to a GET packet. Sends '200 OK' without body and keeps the connection open. Connections
+        without request for 60 seconds are closed, like the ones of a closed tunnel.
+        """
+        protocol_version = "HTTP/1.1"
+        timeout = 60
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            self.server.requests.put(time.monotonic())
+
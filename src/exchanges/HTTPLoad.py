@@ -0,0 +1,245 @@
+import queue
+import time
+
+import pycurl
+
+import src.messages as messages
+from src.exchanges.Exchange import Exchange
+from src.exchanges.HTTP import start_server
+from src.exchanges.HTTPKeepAlive import HTTPKeepAlive
+from src.exchanges.OpenLoopScheduler import OpenLoopScheduler
+
+stop_path = "/stop"  # path of the request the client sends after the load, ending the exchange on the server
+
+
+class HTTPLoad(Exchange):
+    """
+    Implements a load test over HTTP. One exchange is one load phase: the client sends GET requests at the given rate
+    for the given duration over up to [concurrency] kept-alive connections at once, driven by one curl multi handle.
+    The requests are sent on a fixed timetable (open loop), so a slow response does not delay the following requests,
+    and the latency of every request is measured from the time it was due to be sent, not from the time it could be
+    sent. Like this, waiting for a free connection counts as latency (no coordinated omission). The latencies are
+    counted in a histogram, its percentiles are kept in self.results. Failed and timed out requests are counted with
+    the time until their failure, so they are part of the tail. The server answers every request and ends the
+    exchange when the client sends its stop request after the load.
+    """
+
+    def __init__(self, role, open_server_address, interface, concurrency=8, rate=100, duration=10,
+                 request_timeout=5) -> None:
+        """
+        :param role: role of the host
+        :param open_server_address: address to be opened on the server, or already open for the client
+        :param interface: name of the interface for the client to use
+        :param concurrency: maximum number of connections with a request at the same time
+        :param rate: number of requests per second
+        :param duration: time in seconds of one load phase
+        :param request_timeout: time in seconds after which a request counts as error
+        """
+        super().__init__(role, open_server_address, 80, interface)
+
+        self.concurrency = int(concurrency)
+        self.rate = float(rate)
+        self.duration = float(duration)
+        self.request_timeout = float(request_timeout)
+        if self.concurrency < 1 or self.rate <= 0 or self.duration <= 0 or self.request_timeout <= 0:
+            raise ValueError("concurrency, rate, duration and request_timeout have to be positive")
+
+        self.handles = []  # curl handles of the client, kept across exchanges
+        self.server = None  # HTTP server, kept across exchanges
+
+    def run(self, timeout=None) -> int:
+        """
+        Decides what is executed based on the role.
+        :param timeout: time in seconds the server waits for the end of the load, None (default) for waiting without
+        limit
+        :return: 0 for success, 1 for an error that can be solved by running again, 2 for an error that requires
+        reopening the interface
+        """
+        if self.role == "server":
+            return self.__run_server(timeout)
+        elif self.role == "client":
+            return self.__run_client()
+
+        return 1  # if role was not server or client
+
+    def reset(self) -> None:
+        """
+        Closes the connections of the client, since they went through the closed tunnel.
+        """
+        for handle in self.handles:
+            handle.close()
+        self.handles = []
+
+    def close(self) -> None:
+        """
+        Closes the curl handles of the client or stops the server.
+        """
+        self.reset()
+
+        if self.server:
+            self.server.stop()
+            self.server = None
+
+    def get_counters(self) -> dict:
+        """
+        :return: counters of the server (see ThreadingHTTPServerV6.get_counters), empty if it is not running
+        """
+        server = self.server
+        return server.get_counters() if server else {}
+
+    def __run_server(self, timeout=None) -> int:
+        """
+        Starts the server if it is not running yet and answers requests until the stop request of the client arrived.
+        :param timeout: time in seconds to wait for the stop request, extended to the duration of a load phase, None
+        for waiting without limit
+        :return: 0 for success, 1 otherwise (also if no stop request arrived in time)
+        """
+        if not self.server:
+            self.server = start_server(self.open_server_address, self.open_server_port, HTTPLoad.RequestHandler)
+            if not self.server:
+                return 1
+
+        if timeout is not None:
+            timeout = max(timeout, self.duration + self.request_timeout)
+
+        print("Serving load... ", end="", flush=True)
+        try:
+            self.server.requests.get(timeout=timeout)
+        except queue.Empty:
+            messages.print_log("Load did not end in time.")
+            return 1
+
+        messages.print_log("Load ended.")
+        return 0
+
+    def __run_client(self) -> int:
+        """
+        Runs one load phase on the timetable of an OpenLoopScheduler and sends the stop request afterwards. Requests
+        due while all connections are busy wait for the next free connection. Keeps the number of requests and errors,
+        the achieved rate and the percentiles of the latencies (of all requests, failed ones included) in self.results,
+        and the histogram of the latencies in self.histogram.
+        :return: 0 if at least one request succeeded, 1 otherwise
+        """
+        if not self.handles:
+            self.handles = [self.__create_handle() for _ in range(self.concurrency)]
+
+        multi = pycurl.CurlMulti()
+        free = list(self.handles)
+        active = {}  # handle -> (time the request was due, time it was sent)
+        scheduler = OpenLoopScheduler(self.rate, max(1, round(self.rate * self.duration)), 2 * self.request_timeout)
+        histogram = scheduler.histogram
+
+        scheduler.start()
+        while not scheduler.is_done() or active:
+            now = time.monotonic()
+            while free and scheduler.is_due(now):
+                handle = free.pop()
+                active[handle] = (scheduler.issue(), time.monotonic())
+                multi.add_handle(handle)
+            if not scheduler.is_done():
+                scheduler.update_backlog(now)
+
+            while multi.perform()[0] == pycurl.E_CALL_MULTI_PERFORM:
+                pass
+
+            while True:
+                queued, succeeded, failed = multi.info_read()
+                for handle in succeeded:
+                    due, sent_at = active.pop(handle)
+                    scheduler.record(
+                        due,
+                        sent_at + handle.getinfo(pycurl.TOTAL_TIME_T) / 1e6,
+                        handle.getinfo(pycurl.RESPONSE_CODE) != 200,
+                    )
+                    multi.remove_handle(handle)
+                    free.append(handle)
+                for handle, _, _ in failed:
+                    due, _ = active.pop(handle)
+                    scheduler.record(due, time.monotonic(), True)  # at least the timeout for timed out requests
+                    multi.remove_handle(handle)
+                    free.append(handle)
+                if not queued:
+                    break
+
+            # sleep until the next request is due, or some connection has data
+            wait = scheduler.get_wait(time.monotonic()) if free else 0.01
+            if wait > 0:
+                multi.select(min(wait, 0.01))
+        elapsed = scheduler.get_elapsed()
+
+        multi.close()
+        self.__send_stop()
+
+        self.histogram = histogram
+        self.results = {
+            "load_requests": histogram.count,
+            "load_errors": scheduler.errors,
+            "load_rate": histogram.count / elapsed,
+            "load_backlog": scheduler.largest_backlog,
+            "load_mean": histogram.get_mean(),
+            "load_p50": histogram.get_percentile(50),
+            "load_p90": histogram.get_percentile(90),
+            "load_p99": histogram.get_percentile(99),
+            "load_p999": histogram.get_percentile(99.9),
+            "load_max": histogram.maximum,
+        }
+
+        messages.print_log(
+            f"{histogram.count - scheduler.errors} of {scheduler.number} requests successful at "
+            f"{self.results['load_rate']:.1f}/s, p50 {self.results['load_p50']:.6f} s, "
+            f"p99 {self.results['load_p99']:.6f} s."
+        )
+        if scheduler.errors:
+            messages.print_warn(f"{scheduler.errors} requests failed.")
+
+        return 0 if histogram.count > scheduler.errors else 1
+
+    def __send_stop(self) -> None:
+        """
+        Sends the stop request, telling the server that the load phase is over.
+        """
+        c = self.__create_handle()
+        c.setopt(pycurl.URL, f"http://{self.open_server_address}:{self.open_server_port}{stop_path}")
+
+        try:
+            c.perform()
+        except pycurl.error as err:
+            messages.print_warn(f"Stop request failed: {err}")
+        finally:
+            c.close()
+
+    def __create_handle(self):
+        """
+        Creates a curl handle for the requests of the client, keeping its connection alive between requests. Specifies
+        the interface to be used for sending, if a VPN is used.
+        :return: pycurl.Curl
+        """
+        c = pycurl.Curl()
+        c.setopt(pycurl.URL, f"http://{self.open_server_address}:{self.open_server_port}")
+        c.setopt(pycurl.HTTPGET, True)
+        c.setopt(pycurl.HTTP_VERSION, pycurl.CURL_HTTP_VERSION_1_1)
+
+        # if the VPN uses a different interface, get its name
+        if self.interface:
+            c.setopt(pycurl.INTERFACE, self.interface)
+
+        c.setopt(pycurl.TIMEOUT_MS, int(self.request_timeout * 1000))
+        c.setopt(pycurl.WRITEFUNCTION, lambda data: None)  # the response has no body
+
+        return c
+
+    class RequestHandler(HTTPKeepAlive.RequestHandler):
+        """
+        Specifies the response to a GET packet. Sends '200 OK' without body and keeps the connection open. Only the stop
+        request is put into the queue of the server, and no request is logged, since there are many of them.
+        """
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            if self.path == stop_path:
+                self.server.requests.put(time.monotonic())
+
+        def log_message(self, format, *args):
+            pass
@@ -0,0 +1,131 @@
+import math
+
+import numpy as np
+
+
+class LatencyHistogram:
+    """
+    Counts latencies in logarithmic buckets, like an HDR histogram: every bucket is wider than the one before by the
+    factor (1 + precision). A percentile is given as the upper edge of its bucket, so it is accurate to the bucket
+    precision (like 1 percent), for any number of latencies and with constant memory. Histograms with the same lowest
+    latency and precision can be merged, like the histograms of all exchanges of several runs, and their percentiles are
+    as accurate as the ones of a single histogram.
+    """
+
+    def __init__(self, lowest=0.000001, highest=100.0, precision=0.01) -> None:
+        """
+        :param lowest: smallest latency in seconds that is told apart from 0, smaller latencies count as this one
+        :param highest: largest latency in seconds with a bucket of its own, larger latencies count as this one
+        :param precision: relative width of a bucket, like 0.01 for 1 percent
+        """
+        self.lowest = lowest
+        self.highest = highest
+        self.precision = precision
+        self.factor = math.log1p(precision)
+
+        self.counts = np.zeros(self.__get_index(highest) + 1, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = 0.0
+
+    def record(self, value) -> None:
+        """
+        Counts one latency.
+        :param value: latency in seconds
+        """
+        self.counts[min(self.__get_index(value), len(self.counts) - 1)] += 1
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def get_percentile(self, percentile) -> float:
+        """
+        Returns the latency below or at which the given share of all latencies lies, as the upper edge of its bucket.
+        :param percentile: percentile between 0 and 100
+        :return: latency in seconds, 0 if no latency was counted
+        """
+        if not self.count:
+            return 0.0
+
+        rank = max(1, math.ceil(percentile / 100 * self.count))
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+
+        return min(self.lowest * math.exp(index * self.factor), self.maximum)
+
+    def get_mean(self) -> float:
+        """
+        :return: mean of all latencies in seconds, 0 if no latency was counted
+        """
+        return self.total / self.count if self.count else 0.0
+
+    def merge(self, other) -> None:
+        """
+        Adds the counts of another histogram to this one. The bucket of the highest latency is the larger one of both.
+        :param other: LatencyHistogram with the same lowest latency and precision, raises ValueError otherwise
+        """
+        if other.lowest != self.lowest or other.precision != self.precision:
+            raise ValueError("histograms with different lowest latency or precision can not be merged")
+
+        if len(other.counts) > len(self.counts):
+            self.counts = np.concatenate((self.counts, np.zeros(len(other.counts) - len(self.counts), dtype=np.int64)))
+            self.highest = other.highest
+        self.counts[:len(other.counts)] += other.counts
+        self.count += other.count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    def to_record(self) -> dict:
+        """
+        Serializes the histogram, to be recorded in a data file. The buckets with latencies are encoded in one text
+        value 'buckets' as 'index:count' pairs separated by commas, so a histogram is a single value of a record and
+        not one value per bucket.
+        :return: dictionary of the layout ('lowest', 'highest', 'precision'), the 'count', 'total', 'minimum' and
+        'maximum' of the latencies and the encoded 'buckets'
+        """
+        record = {
+            "lowest": self.lowest,
+            "highest": self.highest,
+            "precision": self.precision,
+            "count": self.count,
+            "total": self.total,
+            "minimum": self.minimum if self.count else 0.0,
+            "maximum": self.maximum,
+            "buckets": ",".join(f"{index}:{self.counts[index]}" for index in np.flatnonzero(self.counts)),
+        }
+
+        return record
+
+    @staticmethod
+    def from_record(record):
+        """
+        Restores a histogram serialized by to_record().
+        :param record: dictionary of the recorded values
+        :return: LatencyHistogram, raises KeyError if a value is missing, ValueError if the buckets are malformed
+        """
+        if not isinstance(record["buckets"], str):
+            raise KeyError("buckets")
+
+        histogram = LatencyHistogram(float(record["lowest"]), float(record["highest"]), float(record["precision"]))
+        for bucket in filter(None, record["buckets"].split(",")):
+            index, count = bucket.split(":")
+            histogram.counts[min(int(index), len(histogram.counts) - 1)] += int(count)
+
+        histogram.count = int(record["count"])
+        histogram.total = float(record["total"])
+        histogram.minimum = float(record["minimum"]) if histogram.count else math.inf
+        histogram.maximum = float(record["maximum"])
+
+        return histogram
+
+    def __get_index(self, value) -> int:
+        """
+        :param value: latency in seconds
+        :return: index of the bucket of the latency
+        """
+        if value <= self.lowest:
+            return 0
+
+        return math.ceil(math.log(value / self.lowest) / self.factor)
@@ -0,0 +1,104 @@
+import math
+import time
+
+from src.exchanges.LatencyHistogram import LatencyHistogram
+
+
+class OpenLoopScheduler:
+    """
+    Timetable of an open-loop traffic generator: [number] requests are due at a constant rate from the start on, no
+    matter when the responses arrive. A request that can not be sent when it is due (like while all connections are
+    busy) waits, and its latency is counted from the time it was due, not from the time it was sent, so a slow response
+    shows in the latencies of the requests behind it instead of lowering the rate (no coordinated omission). The
+    latencies are counted in a LatencyHistogram. Failed requests are counted as well, with the time until their failure
+    was noticed, so the worst requests are not missing from the tail.
+    """
+
+    def __init__(self, rate, number, highest=100.0) -> None:
+        """
+        :param rate: number of requests per second
+        :param number: number of requests of the timetable
+        :param highest: largest latency in seconds with a bucket of its own in the histogram
+        """
+        self.interval = 1 / rate
+        self.number = number
+        self.histogram = LatencyHistogram(highest=highest)
+
+        self.start_time = None
+        self.issued = 0  # number of requests sent so far
+        self.largest_backlog = 0  # largest number of requests that were due but not sent yet
+        self.errors = 0  # number of recorded requests that failed
+
+    def start(self) -> None:
+        """
+        Starts the timetable now, the first request is due immediately.
+        """
+        self.start_time = time.monotonic()
+
+    def is_done(self) -> bool:
+        """
+        :return: True if all requests of the timetable were issued, False otherwise
+        """
+        return self.issued >= self.number
+
+    def is_due(self, now) -> bool:
+        """
+        :param now: current time of time.monotonic()
+        :return: True if the next request is due at the given time, False otherwise (also if all were issued)
+        """
+        return not self.is_done() and self.__get_due_time() <= now
+
+    def issue(self) -> float:
+        """
+        Takes the next request of the timetable, to be sent now.
+        :return: time of time.monotonic() the request was due
+        """
+        due = self.__get_due_time()
+        self.issued += 1
+
+        return due
+
+    def get_wait(self, now) -> float:
+        """
+        :param now: current time of time.monotonic()
+        :return: time in seconds until the next request is due, 0 if it is due already, infinity if all were issued
+        """
+        if self.is_done():
+            return math.inf
+
+        return max(0.0, self.__get_due_time() - now)
+
+    def update_backlog(self, now) -> int:
+        """
+        Counts the requests that are due but were not issued yet and keeps the largest number in self.largest_backlog.
+        :param now: current time of time.monotonic()
+        :return: number of requests due but not issued
+        """
+        due = min(self.number, int((now - self.start_time) / self.interval) + 1)
+        backlog = max(0, due - self.issued)
+        self.largest_backlog = max(self.largest_backlog, backlog)
+
+        return backlog
+
+    def record(self, due, completed, failed=False) -> None:
+        """
+        Counts the latency of a request from the time it was due until it was completed.
+        :param due: time of time.monotonic() the request was due, as returned by issue()
+        :param completed: time of time.monotonic() the response arrived, or the failure (like a timeout) was noticed
+        :param failed: True if the request failed, it is counted in self.errors as well
+        """
+        self.histogram.record(completed - due)
+        if failed:
+            self.errors += 1
+
+    def get_elapsed(self) -> float:
+        """
+        :return: time in seconds since the start of the timetable
+        """
+        return time.monotonic() - self.start_time
+
+    def __get_due_time(self) -> float:
+        """
+        :return: time of time.monotonic() the next request is due
+        """
+        return self.start_time + self.issued * self.interval
@@ -0,0 +1,358 @@
+import os
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+import src.messages as messages
+from src.exchanges.Exchange import Exchange
+
+# direction (b'U' client to server, b'D' server to client), number of streams and duration in seconds
+stream_header = struct.Struct("!cBd")
+# start of struct tcp_info of Linux up to tcpi_delivery_rate: 8 single bytes, 24 __u32 (tcpi_rto to
+# tcpi_total_retrans), 4 __u64 (tcpi_pacing_rate to tcpi_bytes_received), 6 __u32 (tcpi_segs_out to
+# tcpi_data_segs_out) and tcpi_delivery_rate
+tcp_info = struct.Struct("=8B24I4Q6IQ")
+
+
+class TCPStream(Exchange):
+    """
+    Implements streaming over TCP, like iperf. For every exchange, the client opens [streams] connections to the server
+    and one host sends as fast as possible over all of them for [duration] seconds: the client for 'upload', the server
+    for 'download'. While streaming, the state of the connections is read from the kernel (TCP_INFO): round-trip time,
+    congestion window, retransmissions and delivery rate. A throughput limited by the CPU (like by the encryption of
+    the VPN) shows a small round-trip time and few retransmissions, a limit by congestion shows growing round-trip
+    times and retransmissions. Both hosts offer the current state of their connections to the monitoring, so it is
+    stored with every poll, next to the CPU usage. The client keeps a summary of every exchange in self.results.
+    """
+
+    def __init__(self, role, open_server_address, interface, streams=1, duration=10, direction="upload",
+                 interval=0.1) -> None:
+        """
+        :param role: role of the host
+        :param open_server_address: address to be opened on the server, or already open for the client
+        :param interface: name of the interface for the client to use
+        :param streams: number of parallel connections
+        :param duration: time in seconds of streaming per exchange
+        :param direction: 'upload' (client sends) or 'download' (server sends)
+        :param interval: time in seconds between two readings of TCP_INFO for the summary of the client
+        """
+        super().__init__(role, open_server_address, 9999, interface)
+
+        self.streams = int(streams)
+        self.duration = float(duration)
+        self.direction = direction
+        self.interval = float(interval)
+        if direction not in ("upload", "download"):
+            raise ValueError("direction has to be upload or download")
+        if not 1 <= self.streams <= 255 or self.duration <= 0 or self.interval <= 0:
+            raise ValueError("streams has to be between 1 and 255, duration and interval have to be positive")
+
+        self.listener = None  # listening socket of the server, kept across exchanges
+        self.payload = os.urandom(128 * 1024)  # sent over and over, random so compression does not help
+        self.lock = threading.Lock()  # guards the connections and counters
+        self.connections = []  # sockets of the running streams
+        self.errors = []  # errors of the streams of the current exchange
+        self.counters = {"bytes_recv": 0, "bytes_sent": 0}
+        self.finished_retransmits = 0  # retransmissions of the connections of earlier exchanges
+
+    def run(self, timeout=None) -> int:
+        """
+        Decides what is executed based on the role.
+        :param timeout: time in seconds the server waits for the client, None (default) for waiting without limit
+        :return: 0 for success, 1 for an error that can be solved by running again, 2 for an error that requires
+        reopening the interface
+        """
+        if self.role == "server":
+            return self.__run_server(timeout)
+        elif self.role == "client":
+            return self.__run_client()
+
+        return 1  # if role was not server or client
+
+    def close(self) -> None:
+        """
+        Closes the listening socket of the server.
+        """
+        if self.listener:
+            self.listener.close()
+            self.listener = None
+
+    def get_counters(self) -> dict:
+        """
+        Reads the state of the running streams. Called by the sampler thread of the monitoring.
+        :return: dictionary of the payload bytes received and sent, the retransmissions ('tcp_retransmits'), all since
+        the start of the run, the number of running 'streams' and, while streams are running, their mean round-trip
+        time ('tcp_rtt', in seconds), the sum of their congestion windows ('tcp_cwnd', in segments) and of their
+        delivery rates ('tcp_delivery_rate', in Mbit/s)
+        """
+        with self.lock:
+            counters = dict(self.counters)
+            infos = [read_tcp_info(connection) for connection in self.connections]
+            counters["tcp_retransmits"] = self.finished_retransmits + sum(info["retransmits"] for info in infos)
+
+        counters["streams"] = len(infos)
+        if infos:
+            counters["tcp_rtt"] = float(np.mean([info["rtt"] for info in infos]))
+            counters["tcp_cwnd"] = sum(info["cwnd"] for info in infos)
+            counters["tcp_delivery_rate"] = sum(info["delivery_rate"] for info in infos)
+
+        return counters
+
+    def __run_server(self, timeout=None) -> int:
+        """
+        Opens the listening socket if it is not open yet, accepts the streams of one exchange and serves them until
+        they ended. The first stream tells the number of streams, the direction and the duration.
+        :param timeout: time in seconds to wait for the first stream, None for waiting without limit
+        :return: 0 for success, 1 otherwise (also if no stream arrived in time)
+        """
+        if not self.listener:
+            try:
+                self.listener = socket.create_server(
+                    (self.open_server_address, self.open_server_port), family=socket.AF_INET6, dualstack_ipv6=True
+                )
+            except OSError as err:
+                messages.print_err("Something went wrong while opening the TCP stream server.")
+                print(f"{err=}")
+                return 1
+
+        print("Awaiting streams... ", end="", flush=True)
+        connections = []
+        try:
+            self.listener.settimeout(timeout)
+            while True:
+                connection, _ = self.listener.accept()
+                connections.append(connection)
+                connection.settimeout(self.duration + 10)
+                direction, streams, duration = stream_header.unpack(self.__receive_exactly(connection))
+                if len(connections) >= streams:
+                    break
+                self.listener.settimeout(10)  # the other streams follow immediately
+        except (OSError, struct.error) as err:
+            for connection in connections:
+                connection.close()
+            messages.print_log(f"Streams did not arrive: {err}")
+            return 1
+
+        self.__run_streams(connections, direction == b"D", duration)
+        if self.errors:
+            messages.print_warn(f"{len(self.errors)} streams failed: {self.errors[0]}")
+            return 1
+
+        messages.print_log(f"{len(connections)} streams done.")
+        return 0
+
+    def __run_client(self) -> int:
+        """
+        Opens the streams, streams for the duration and reads TCP_INFO of all streams every [interval] seconds. Keeps
+        the number of 'stream_bytes' (payload), the 'stream_goodput' in Mbit/s, the mean and minimum round-trip time
+        ('tcp_rtt_mean', 'tcp_min_rtt', in seconds), the largest sum of the congestion windows ('tcp_cwnd_max', in
+        segments), the 'tcp_retransmits' and the mean sum of the delivery rates ('tcp_delivery_rate_mean', in Mbit/s)
+        in self.results.
+        :return: 0 for success, 1 for an error that can be solved by running again, 2 for an error that requires
+        reopening the interface
+        """
+        connections = []
+        try:
+            for _ in range(self.streams):
+                connection = self.__connect()
+                connections.append(connection)
+                connection.sendall(stream_header.pack(
+                    b"U" if self.direction == "upload" else b"D", self.streams, self.duration
+                ))
+        except socket.timeout:
+            for connection in connections:
+                connection.close()
+            return 2
+        except OSError as err:
+            for connection in connections:
+                connection.close()
+            messages.print_log(f"Could not connect: {err}")
+            return 1
+
+        with self.lock:
+            bytes_before = self.counters["bytes_sent" if self.direction == "upload" else "bytes_recv"]
+            retransmits_before = self.finished_retransmits
+        samples = []
+        start = time.perf_counter()
+
+        thread = threading.Thread(
+            target=self.__run_streams, args=(connections, self.direction == "upload", self.duration)
+        )
+        thread.start()
+        while thread.is_alive():
+            thread.join(self.interval)
+            with self.lock:
+                samples.append([read_tcp_info(connection) for connection in self.connections])
+
+        duration = time.perf_counter() - start
+        with self.lock:
+            transferred = self.counters["bytes_sent" if self.direction == "upload" else "bytes_recv"] - bytes_before
+            retransmits = self.finished_retransmits - retransmits_before
+
+        if self.errors:
+            messages.print_warn(f"{len(self.errors)} streams failed: {self.errors[0]}")
+            return 2 if any(isinstance(error, socket.timeout) for error in self.errors) else 1
+
+        self.results = get_stream_statistics(samples, self.streams, transferred, duration, retransmits)
+        messages.print_log(
+            f"{self.streams} streams, {self.results['stream_goodput']:.2f} Mbit/s, RTT "
+            f"{self.results['tcp_rtt_mean']:.6f} s, {self.results['tcp_retransmits']} retransmissions."
+        )
+        return 0
+
+    def __run_streams(self, connections, send, duration) -> None:
+        """
+        Runs the streams in threads of their own and waits until all ended. Errors are kept in self.errors.
+        :param connections: sockets of the streams
+        :param send: True for sending over the streams, False for receiving
+        :param duration: time in seconds of sending
+        """
+        self.errors = []
+        with self.lock:
+            self.connections = list(connections)
+
+        threads = [
+            threading.Thread(target=self.__send if send else self.__receive, args=(connection, duration))
+            for connection in connections
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with self.lock:
+            self.finished_retransmits += sum(read_tcp_info(connection)["retransmits"] for connection in connections)
+            self.connections = []
+        for connection in connections:
+            connection.close()
+
+    def __send(self, connection, duration) -> None:
+        """
+        Sends the payload over and over for [duration] seconds, then closes the sending side and waits until the other
+        host closed the connection.
+        :param connection: socket of the stream
+        :param duration: time in seconds of sending
+        """
+        try:
+            view = memoryview(self.payload)
+            end = time.perf_counter() + duration
+            while time.perf_counter() < end:
+                sent = connection.send(view)
+                with self.lock:
+                    self.counters["bytes_sent"] += sent
+            connection.shutdown(socket.SHUT_WR)
+            while connection.recv(1024):
+                pass
+        except OSError as err:
+            self.errors.append(err)
+
+    def __receive(self, connection, duration) -> None:
+        """
+        Receives and discards until the other host closed its sending side, then closes the connection.
+        :param connection: socket of the stream
+        :param duration: time in seconds the other host sends, the connection times out 10 seconds later
+        """
+        try:
+            connection.settimeout(duration + 10)
+            buffer = bytearray(len(self.payload))
+            while True:
+                received = connection.recv_into(buffer)
+                if not received:
+                    break
+                with self.lock:
+                    self.counters["bytes_recv"] += received
+            connection.shutdown(socket.SHUT_WR)
+        except OSError as err:
+            self.errors.append(err)
+
+    def __connect(self):
+        """
+        Connects one stream to the server, over the interface of the VPN if one is used.
+        :return: connected socket
+        """
+        family, kind, protocol, _, address = socket.getaddrinfo(
+            self.open_server_address, self.open_server_port, type=socket.SOCK_STREAM
+        )[0]
+        connection = socket.socket(family, kind, protocol)
+        try:
+            if self.interface:
+                connection.setsockopt(socket.SOL_SOCKET, socket.SO_BINDTODEVICE, self.interface.encode())
+            connection.settimeout(self.duration + 10)
+            connection.connect(address)
+        except OSError:
+            connection.close()
+            raise
+
+        return connection
+
+    @staticmethod
+    def __receive_exactly(connection) -> bytes:
+        """
+        Receives the header of a stream.
+        :param connection: socket of the stream
+        :return: the header, raises ConnectionError if the connection was closed before
+        """
+        data = b""
+        while len(data) < stream_header.size:
+            chunk = connection.recv(stream_header.size - len(data))
+            if not chunk:
+                raise ConnectionError("connection closed before the header")
+            data += chunk
+
+        return data
+
+
+def read_tcp_info(connection) -> dict:
+    """
+    Reads the state of a TCP connection from the kernel. Fields missing in older kernels are 0.
+    :param connection: TCP socket
+    :return: dictionary of the smoothed round-trip time 'rtt' and the smallest one seen 'min_rtt' (in seconds), the
+    congestion window 'cwnd' (in segments), the 'mss', the number of segments retransmitted in total ('retransmits')
+    and the 'delivery_rate' (in Mbit/s)
+    """
+    try:
+        data = connection.getsockopt(socket.IPPROTO_TCP, socket.TCP_INFO, tcp_info.size)
+    except OSError:
+        data = b""
+    values = tcp_info.unpack(data.ljust(tcp_info.size, b"\0"))
+
+    return {
+        "rtt": values[23] / 1e6,  # tcpi_rtt in microseconds
+        "min_rtt": values[39] / 1e6,  # tcpi_min_rtt in microseconds
+        "cwnd": values[26],  # tcpi_snd_cwnd
+        "mss": values[10],  # tcpi_snd_mss
+        "retransmits": values[31],  # tcpi_total_retrans
+        "delivery_rate": values[42] * 8 / 1e6,  # tcpi_delivery_rate in bytes per second
+    }
+
+
+def get_stream_statistics(samples, streams, transferred, duration, retransmits) -> dict:
+    """
+    Summarizes the readings of TCP_INFO of one exchange.
+    :param samples: list of readings, each a list of the dictionaries of read_tcp_info() of all running streams
+    :param streams: number of streams
+    :param transferred: number of payload bytes sent or received over all streams
+    :param duration: time in seconds of streaming
+    :param retransmits: number of segments retransmitted over all streams
+    :return: dictionary of 'stream_count', 'stream_bytes', 'stream_goodput' (Mbit/s), 'tcp_rtt_mean', 'tcp_min_rtt'
+    (seconds), 'tcp_cwnd_max' (segments), 'tcp_retransmits' and 'tcp_delivery_rate_mean' (Mbit/s)
+    """
+    samples = [sample for sample in samples if sample]
+    rtts = [info["rtt"] for sample in samples for info in sample]
+    min_rtts = [info["min_rtt"] for sample in samples for info in sample if info["min_rtt"] > 0]
+
+    return {
+        "stream_count": streams,
+        "stream_bytes": transferred,
+        "stream_goodput": 8 * transferred / duration / 1e6 if duration > 0 else 0.0,
+        "tcp_rtt_mean": float(np.mean(rtts)) if rtts else 0.0,
+        "tcp_min_rtt": min(min_rtts) if min_rtts else 0.0,
+        "tcp_cwnd_max": max((sum(info["cwnd"] for info in sample) for sample in samples), default=0),
+        "tcp_retransmits": retransmits,
+        "tcp_delivery_rate_mean": float(np.mean(
+            [sum(info["delivery_rate"] for info in sample) for sample in samples]
+        )) if samples else 0.0,
+    }
@@ -0,0 +1,285 @@
+import random
+import socket
+import struct
+import time
+
+import numpy as np
+
+import src.messages as messages
+from src.exchanges.Exchange import Exchange
+
+# kind (b'Q' request, b'R' reply, b'E' end of burst), burst, sequence number, time the client sent the datagram and
+# time the server received it (both in nanoseconds of the monotonic clock of the respective host)
+datagram_header = struct.Struct("!cIQqq")
+end_repetitions = 3  # the end of a burst is sent repeatedly, since single datagrams can get lost
+
+
+class UDPEcho(Exchange):
+    """
+    Implements a UDP echo exchange, measuring the tunnel without the behavior of TCP. For every exchange, the client
+    sends a burst of [count] datagrams of [size] bytes at the given rate, each with a sequence number and the time it
+    was sent, and waits for the echoes. The server sends every datagram back with the time it was received, and ends
+    the exchange when the client signals the end of the burst. The client keeps the round-trip times, the one-way jitter
+    of both directions, the loss and the reordering of the burst in self.results. Both hosts count the datagram bytes
+    for the monitoring.
+    """
+
+    def __init__(self, role, open_server_address, interface, count=100, rate=100, size=64, wait=1) -> None:
+        """
+        :param role: role of the host
+        :param open_server_address: address to be opened on the server, or already open for the client
+        :param interface: name of the interface for the client to use
+        :param count: number of datagrams of one burst
+        :param rate: number of datagrams per second
+        :param size: size of a datagram in bytes (UDP payload), at least the size of its header
+        :param wait: time in seconds the client waits for echoes after sending the last datagram
+        """
+        super().__init__(role, open_server_address, 9999, interface)
+
+        self.count = int(count)
+        self.rate = float(rate)
+        self.size = int(size)
+        self.wait = float(wait)
+        if self.count < 1 or self.rate <= 0 or self.wait < 0:
+            raise ValueError("count and rate have to be positive, wait can not be negative")
+        if not datagram_header.size <= self.size <= 65507:
+            raise ValueError(f"size has to be between {datagram_header.size} and 65507")
+
+        self.socket = None  # socket of the server, kept across exchanges
+        self.buffer = bytearray(65535)  # receives the datagrams, reused for all of them
+        # number of the current burst, so late echoes of earlier bursts are ignored, random so clients started later
+        # do not reuse numbers the server has already seen
+        self.burst = random.getrandbits(32)
+        self.counters = {"datagrams_recv": 0, "datagrams_sent": 0, "bytes_recv": 0, "bytes_sent": 0}
+
+    def run(self, timeout=None) -> int:
+        """
+        Decides what is executed based on the role.
+        :param timeout: time in seconds the server waits for datagrams, None (default) for waiting without limit
+        :return: 0 for success, 1 for an error that can be solved by running again, 2 for an error that requires
+        reopening the interface
+        """
+        if self.role == "server":
+            return self.__run_server(timeout)
+        elif self.role == "client":
+            return self.__run_client()
+
+        return 1  # if role was not server or client
+
+    def close(self) -> None:
+        """
+        Closes the socket of the server.
+        """
+        if self.socket:
+            self.socket.close()
+            self.socket = None
+
+    def get_counters(self) -> dict:
+        """
+        :return: dictionary of the datagrams and bytes received and sent, all since the start of the run
+        """
+        return dict(self.counters)
+
+    def __run_server(self, timeout=None) -> int:
+        """
+        Opens the socket if it is not open yet and echoes datagrams until the end of another burst than the last one
+        arrived (the end is sent repeatedly).
+        :param timeout: time in seconds to wait for the next datagram, None for waiting without limit
+        :return: 0 for success, 1 otherwise (also if no datagram arrived in time)
+        """
+        if not self.socket:
+            try:
+                self.socket = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+                self.socket.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 0)  # IPv4 as well
+                self.socket.bind((self.open_server_address, self.open_server_port))
+            except OSError as err:
+                messages.print_err("Something went wrong while opening the UDP echo server.")
+                print(f"{err=}")
+                self.close()
+                return 1
+
+        print("Echoing datagrams... ", end="", flush=True)
+        self.socket.settimeout(timeout)
+        while True:
+            try:
+                length, address = self.socket.recvfrom_into(self.buffer)
+            except socket.timeout:
+                messages.print_log("No datagram arrived in time.")
+                return 1
+            received = time.monotonic_ns()
+            self.__count("recv", length)
+
+            if length < datagram_header.size:
+                continue
+            kind, burst, sequence, sent, _ = datagram_header.unpack_from(self.buffer)
+
+            if kind == b"Q":
+                datagram_header.pack_into(self.buffer, 0, b"R", burst, sequence, sent, received)
+                self.socket.sendto(memoryview(self.buffer)[:length], address)
+                self.__count("sent", length)
+            elif kind == b"E" and burst != self.burst:
+                self.burst = burst
+                messages.print_log(f"Burst {burst} echoed.")
+                return 0
+
+    def __run_client(self) -> int:
+        """
+        Sends one burst on a fixed timetable, independent of the echoes, and receives the echoes in between. Signals the
+        end of the burst to the server if at least one echo arrived.
+        :return: 0 if at least one echo arrived, 1 if none arrived, 2 if the interface can not be used anymore
+        """
+        self.burst = (self.burst + 1) % 2 ** 32
+        try:
+            connection = self.__connect()
+        except OSError as err:
+            messages.print_log(f"Could not open socket: {err}")
+            return 2
+
+        echoes = []  # tuples of sequence number, sent, received by server, received (ns)
+        with connection:
+            interval = 1 / self.rate
+            datagram = bytearray(self.size)
+            sent = 0
+            start = time.monotonic()
+            deadline = None
+
+            try:
+                while True:
+                    now = time.monotonic()
+                    if sent < self.count and start + sent * interval <= now:
+                        datagram_header.pack_into(datagram, 0, b"Q", self.burst, sent, time.monotonic_ns(), 0)
+                        connection.send(datagram)
+                        self.__count("sent", self.size)
+                        sent += 1
+                        continue
+
+                    if sent == self.count and deadline is None:
+                        deadline = now + self.wait
+                    if deadline is not None and (now >= deadline or len(echoes) >= self.count):
+                        break
+
+                    connection.settimeout(max(0.0, (start + sent * interval if deadline is None else deadline) - now))
+                    try:
+                        length = connection.recv_into(self.buffer)
+                    except socket.timeout:
+                        continue
+                    received = time.monotonic_ns()
+                    self.__count("recv", length)
+
+                    if length >= datagram_header.size:
+                        kind, burst, sequence, client_sent, server_received = datagram_header.unpack_from(self.buffer)
+                        if kind == b"R" and burst == self.burst:
+                            echoes.append((sequence, client_sent, server_received, received))
+
+                if echoes:
+                    end = datagram_header.pack(b"E", self.burst, sent, 0, 0)
+                    for _ in range(end_repetitions):
+                        connection.send(end)
+            except ConnectionRefusedError:
+                messages.print_log("Server is not listening yet.")
+                return 1
+            except OSError as err:
+                messages.print_warn(f"Burst failed: {err}")
+                return 2
+
+        self.results = get_echo_statistics(echoes, sent)
+        if not echoes:
+            messages.print_log("No echo arrived.")
+            return 1
+
+        messages.print_log(
+            f"{self.results['udp_received']} of {sent} echoes, RTT p50 {self.results['rtt_p50']:.6f} s, "
+            f"jitter {self.results['jitter_forward']:.6f} s / {self.results['jitter_return']:.6f} s."
+        )
+        return 0
+
+    def __connect(self):
+        """
+        Opens a UDP socket connected to the server, over the interface of the VPN if one is used. Connecting filters
+        out datagrams from other hosts.
+        :return: connected socket
+        """
+        family, kind, protocol, _, address = socket.getaddrinfo(
+            self.open_server_address, self.open_server_port, type=socket.SOCK_DGRAM
+        )[0]
+        connection = socket.socket(family, kind, protocol)
+        try:
+            if self.interface:
+                connection.setsockopt(socket.SOL_SOCKET, socket.SO_BINDTODEVICE, self.interface.encode())
+            connection.connect(address)
+        except OSError:
+            connection.close()
+            raise
+
+        return connection
+
+    def __count(self, direction, length) -> None:
+        """
+        Counts one datagram for the monitoring.
+        :param direction: 'recv' or 'sent'
+        :param length: size of the datagram in bytes
+        """
+        self.counters[f"datagrams_{direction}"] += 1
+        self.counters[f"bytes_{direction}"] += length
+
+
+def get_echo_statistics(echoes, sent) -> dict:
+    """
+    Calculates the statistics of a burst. The one-way jitter is estimated like for RTP (RFC 3550): the difference of the
+    one-way delays of consecutive datagrams, smoothed with the factor 1/16. The clocks of the hosts do not have to be
+    synchronized, since their offset cancels out in the difference. Datagrams arriving after one with a higher
+    sequence number count as reordered.
+    :param echoes: list of tuples of sequence number, time sent by the client, received by the server and received by
+    the client (ns), in the order of arrival
+    :param sent: number of datagrams sent
+    :return: dictionary of 'udp_sent', 'udp_received', 'udp_loss' (percent), 'udp_reordered', 'udp_duplicates' and,
+    if an echo arrived, the round-trip times 'rtt_min', 'rtt_mean', 'rtt_p50', 'rtt_p99' and 'rtt_max', and the jitter
+    of both directions 'jitter_forward' (client to server) and 'jitter_return' in seconds
+    """
+    sequences = set()
+    duplicates = 0
+    reordered = 0
+    highest = -1
+    round_trip_times = []
+    jitter = {"forward": 0.0, "return": 0.0}
+    last = None
+
+    for sequence, client_sent, server_received, received in echoes:
+        if sequence in sequences:
+            duplicates += 1
+            continue
+        sequences.add(sequence)
+
+        if sequence < highest:
+            reordered += 1
+        highest = max(highest, sequence)
+
+        round_trip_times.append((received - client_sent) / 1e9)
+
+        delays = {"forward": server_received - client_sent, "return": received - server_received}
+        if last:
+            for direction in jitter:
+                jitter[direction] += (abs(delays[direction] - last[direction]) / 1e9 - jitter[direction]) / 16
+        last = delays
+
+    statistics = {
+        "udp_sent": sent,
+        "udp_received": len(sequences),
+        "udp_loss": 100 * (sent - len(sequences)) / sent if sent else 0.0,
+        "udp_reordered": reordered,
+        "udp_duplicates": duplicates,
+    }
+    if not round_trip_times:
+        return statistics
+
+    round_trip_times = np.asarray(round_trip_times)
+    return {
+        **statistics,
+        "rtt_min": float(np.min(round_trip_times)),
+        "rtt_mean": float(np.mean(round_trip_times)),
+        "rtt_p50": float(np.percentile(round_trip_times, 50)),
+        "rtt_p99": float(np.percentile(round_trip_times, 99)),
+        "rtt_max": float(np.max(round_trip_times)),
+        "jitter_forward": jitter["forward"],
+        "jitter_return": jitter["return"],
+    }
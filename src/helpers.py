@@ -1,6 +1,11 @@
+import os
+import selectors
+import socket
 import subprocess
+import time
 
 import src.messages as messages
+from src.vpns.HelperClient import get_helper
 
 """
 Contains any functions that are universal in a way that they can be used by multiple classes can be put here.
@@ -30,3 +35,106 @@ def send_file_to_host(file, target_user, target_ip_addr, target_path) -> bool:
     except Exception as err:
         print(f"{err=}")
         return False
+
+
+def get_latest_handshakes(interface) -> list:
+    """
+    Reads the times of the latest handshakes of all WireGuard peers of an interface.
+    :param interface: name of the WireGuard interface, like 'wg0'
+    :return: list of UNIX timestamps, 0 for peers without handshake, empty if the interface can not be read
+    """
+    helper = get_helper()
+    if helper:  # no 'sudo' process per check
+        return helper.read_stats(interface)
+
+    try:
+        output = subprocess.check_output(
+            ["sudo", "wg", "show", interface, "latest-handshakes"],
+            stderr=subprocess.PIPE,
+        )
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return []
+
+    timestamps = []
+    for line in output.decode().splitlines():
+        fields = line.split()
+        if len(fields) == 2 and fields[1].isdigit():
+            timestamps.append(int(fields[1]))
+
+    return timestamps
+
+
+def send_trigger_datagram(address, port=9) -> None:
+    """
+    Sends an empty UDP datagram to the discard port of an address. Used for making WireGuard start a handshake, since
+    it only does so when there is traffic for the peer. Errors are ignored.
+    :param address: IPv4 or IPv6 address, IPv6 link-local addresses need the scope, like 'fe80::1%rosenpass0'
+    :param port: UDP port, 9 (discard) by default
+    """
+    try:
+        info = socket.getaddrinfo(address, port, type=socket.SOCK_DGRAM)[0]
+        with socket.socket(info[0], socket.SOCK_DGRAM) as sock:
+            sock.sendto(b"", info[4])
+    except OSError:
+        pass
+
+
+def wait_for_handshake(interface, trigger_address=None, timeout=10.0, interval=0.05):
+    """
+    Waits until a WireGuard peer of the interface has completed a handshake. If a trigger address is given, a datagram
+    is sent to it every second, so the handshake is started without waiting for other traffic.
+    :param interface: name of the WireGuard interface
+    :param trigger_address: address of the peer inside the tunnel, or None
+    :param timeout: maximum time to wait in seconds
+    :param interval: time between two checks in seconds
+    :return: time in seconds until the handshake was detected, None if there was no handshake within the timeout
+    """
+    start = time.monotonic()
+    last_trigger = None
+
+    while time.monotonic() - start < timeout:
+        if trigger_address and (last_trigger is None or time.monotonic() - last_trigger >= 1.0):
+            send_trigger_datagram(trigger_address)
+            last_trigger = time.monotonic()
+
+        if any(get_latest_handshakes(interface)):
+            return time.monotonic() - start
+
+        time.sleep(interval)
+
+    return None
+
+
+def wait_for_output(process, text, timeout=10.0):
+    """
+    Reads the standard output of a process until a line contains the given text. Lines are consumed, so the pipe
+    does not fill up.
+    :param process: subprocess.Popen with stdout=subprocess.PIPE
+    :param text: text to wait for, like 'Initialization Sequence Completed'
+    :param timeout: maximum time to wait in seconds
+    :return: time in seconds until the text was read, None if the text did not appear within the timeout or the
+    process ended
+    """
+    if not process or not process.stdout:
+        return None
+
+    start = time.monotonic()
+    buffer = b""
+    wanted = text.encode()
+
+    with selectors.DefaultSelector() as selector:
+        selector.register(process.stdout, selectors.EVENT_READ)
+
+        while True:
+            remaining = timeout - (time.monotonic() - start)
+            if remaining <= 0 or not selector.select(remaining):
+                return None
+
+            chunk = os.read(process.stdout.fileno(), 4096)
+            if not chunk:  # process closed its output
+                return None
+
+            buffer += chunk
+            if wanted in buffer:
+                return time.monotonic() - start
+            buffer = buffer[buffer.rfind(b"\n") + 1:]  # only keep the incomplete last line
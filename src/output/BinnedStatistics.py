@@ -0,0 +1,89 @@
+import numpy as np
+
+"""
+Contains the functions for splitting a series into time bins and calculating statistics per bin. Used for the
+min-max-median graphs, but works on any series of time offsets and values, for example for summary tables.
+"""
+
+
+def get_bin_edges(offsets, number_bins=8, bin_duration=None):
+    """
+    Returns the edges of the time bins, starting at 0. Either the full time is split into a number of bins of equal
+    length, or the bins have a fixed duration and the last bin contains the end of the series.
+    :param offsets: array of time offsets in seconds
+    :param number_bins: number of bins, used if no bin duration is given
+    :param bin_duration: duration of one bin in seconds, None for using the number of bins
+    :return: array of the bin edges, one more than the number of bins
+    """
+    full_time = float(np.max(offsets)) if len(offsets) else 0.0
+
+    if bin_duration:
+        number_bins = max(1, int(np.ceil(full_time / bin_duration)))
+        return np.arange(number_bins + 1) * float(bin_duration)
+
+    return np.linspace(0.0, full_time, number_bins + 1)
+
+
+def get_binned_statistics(offsets, values, number_bins=8, bin_duration=None, percentiles=(25, 50, 75)) -> dict:
+    """
+    Assigns every value to its time bin and calculates the statistics of all bins in one pass: the values are sorted
+    once by bin and value, so minimum, maximum and percentiles are read directly from the sorted array. Values at the
+    end of the last bin belong to the last bin. Bins without values have the count 0 and NaN as statistics.
+    :param offsets: array of time offsets in seconds, in the same order as the values
+    :param values: array of values
+    :param number_bins: number of bins, used if no bin duration is given
+    :param bin_duration: duration of one bin in seconds, None for using the number of bins
+    :param percentiles: percentiles to calculate, between 0 and 100, interpolated linearly like numpy.percentile
+    :return: dictionary of the bin edges, the bin length, the counts, minimum, maximum and median per bin, the requested
+    percentiles as dictionary and the sorted values per bin as list of arrays
+    """
+    offsets = np.asarray(offsets, dtype=float)
+    values = np.asarray(values)
+    if not len(offsets) == len(values):
+        raise ValueError
+
+    edges = get_bin_edges(offsets, number_bins, bin_duration)
+    number_bins = len(edges) - 1
+
+    bins = np.clip(np.searchsorted(edges, offsets, side="right") - 1, 0, number_bins - 1)
+    order = np.lexsort((values, bins))
+    sorted_bins = bins[order]
+    sorted_values = values[order].astype(float)
+
+    starts = np.searchsorted(sorted_bins, np.arange(number_bins), side="left")
+    ends = np.searchsorted(sorted_bins, np.arange(number_bins), side="right")
+    counts = ends - starts
+    filled = counts > 0
+
+    def get_percentile(percentile):
+        """
+        Interpolates a percentile of every bin between the two nearest sorted values.
+        :param percentile: percentile between 0 and 100
+        :return: array of the percentile per bin, NaN for empty bins
+        """
+        position = starts + (np.maximum(counts, 1) - 1) * percentile / 100
+        lower = np.floor(position).astype(int)
+        upper = np.ceil(position).astype(int)
+        weight = position - lower
+
+        result = np.full(number_bins, np.nan)
+        result[filled] = (
+                sorted_values[lower[filled]] * (1 - weight[filled]) + sorted_values[upper[filled]] * weight[filled]
+        )
+        return result
+
+    minimum = np.full(number_bins, np.nan)
+    maximum = np.full(number_bins, np.nan)
+    minimum[filled] = sorted_values[starts[filled]]
+    maximum[filled] = sorted_values[ends[filled] - 1]
+
+    return {
+        "edges": edges,
+        "bin_length": float(edges[1] - edges[0]),
+        "counts": counts,
+        "min": minimum,
+        "max": maximum,
+        "median": get_percentile(50),
+        "percentiles": {percentile: get_percentile(percentile) for percentile in percentiles},
+        "groups": np.split(sorted_values, ends[:-1]),
+    }
@@ -0,0 +1,56 @@
+import numpy as np
+from matplotlib.figure import Figure
+
+from src.messages import *
+
+
+class BreakdownGenerator:
+    """
+    Plots the phases of repeated operations (like opening the VPN) as stacked bars, one bar per operation. Shows which
+    phase takes most of the time and how stable the phases are across the operations.
+    """
+
+    def __init__(self, phases: dict, title: str = "", y_label: str = "time [s]") -> None:
+        """
+        Checks if all phases have the same number of operations. Phases are stacked in the order of the dictionary.
+        :param phases: dictionary of the phase names and arrays of their durations per operation, NaN if an operation
+        did not have the phase
+        :param title: title for the figure as string
+        :param y_label: y-label for the figure as string
+        """
+        if len({len(durations) for durations in phases.values()}) > 1:
+            raise ValueError
+
+        self.phases = phases
+        self.title = title
+        self.y_label = y_label
+
+        self.figure = Figure()
+        self.axes = self.figure.add_subplot()
+
+    def plot_graph(self) -> Figure:
+        """
+        Plots the stacked bars, labels and legend. Also prints log messages.
+        :return: figure containing the graph
+        """
+        print_log("Plotting breakdown...")
+
+        number = len(next(iter(self.phases.values()))) if self.phases else 0
+        positions = np.arange(1, number + 1)
+        bottom = np.zeros(number)
+
+        for phase, durations in self.phases.items():
+            durations = np.nan_to_num(np.asarray(durations, dtype=float))
+            self.axes.bar(positions, durations, bottom=bottom, label=phase)
+            bottom += durations
+
+        self.axes.grid(True, "both", "y")
+        self.axes.set_xlabel("#operation")
+        self.axes.set_ylabel(self.y_label)
+        if self.phases:
+            self.axes.legend(loc="best", fontsize=8)
+        if self.title:
+            self.axes.set_title(self.title, fontweight="bold", fontsize=9)
+
+        print_log("Breakdown plotted.")
+        return self.figure
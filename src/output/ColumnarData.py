@@ -0,0 +1,148 @@
+import array
+import math
+
+import numpy as np
+
+from src.output.DataFile import *
+
+"""
+Contains the functions for converting data files into a compact columnar format and for loading it with NumPy.
+
+A columnar file is an uncompressed '.npz' archive with one typed array per column:
+
+- 'time': timestamps of the polls as datetime64[us]
+- 'name': index of the name of the poll in 'names' as int32
+- 'names': string table of all names of polls
+- '{category}/{value}', like 'hardware/cpu_percent': one column per value. Columns are int64 if the value is an integer
+  in every poll, otherwise float64 with NaN for polls without the value.
+- '{category}/{value}:rows' and '{category}/{value}:texts': text values (like the buckets of a latency histogram), only
+  for the polls having them, as indices of the polls (int64) and strings.
+"""
+
+columnar_format_version = 1
+columnar_extension = ".npz"
+text_rows_suffix = ":rows"
+text_values_suffix = ":texts"
+
+
+def convert_to_columnar(file_path, output_path) -> int:
+    """
+    Streams the entries of a JSON or NDJSON data file, validates them and writes them as columnar file.
+    :param file_path: path of the JSON or NDJSON file
+    :param output_path: path of the columnar file to be written, should end with '.npz'
+    :return: number of converted polls, raises KeyError or ValueError if the data has an incorrect format
+    """
+    columns = read_columns(file_path)
+
+    with open(output_path, "wb") as file:
+        np.savez(file, format_version=np.array(columnar_format_version), **columns)
+
+    return len(columns["time"])
+
+
+def read_columns(file_path) -> dict:
+    """
+    Streams the entries of a JSON or NDJSON data file, validates them and collects them into columns.
+    :param file_path: path of the JSON or NDJSON file
+    :return: dictionary of the column names and their arrays in the same format as load_columnar, raises KeyError or
+    ValueError if the data has an incorrect format
+    """
+    times = []
+    names = {}  # maps the name of a poll to its index in the string table
+    name_indices = array.array("i")
+    columns = {}  # maps the column name to its values, NaN for polls without the value
+    float_columns = set()  # columns that can not be stored as integers
+    texts = {}  # maps the column name of text values to the indices of the polls having them and the values
+
+    number = 0
+    for entry in read_entries(file_path):
+        check_entry(entry)
+
+        times.append(entry["time"])
+        name_indices.append(names.setdefault(entry["name"], len(names)))
+
+        for category, values in entry.items():
+            if category in ("name", "time"):
+                continue
+
+            for key, value in values[0].items():
+                column_name = f"{category}/{key}"
+                if column_name in (columns if isinstance(value, str) else texts):
+                    raise ValueError(f"{column_name} contains numbers and text")
+                if isinstance(value, str):
+                    rows, strings = texts.setdefault(column_name, (array.array("q"), []))
+                    rows.append(number)
+                    strings.append(value)
+                    continue
+
+                column = columns.get(column_name)
+                if column is None:
+                    column = columns[column_name] = array.array("d")
+                if len(column) < number:  # earlier polls are missing the value
+                    column.extend(array.array("d", [math.nan]) * (number - len(column)))
+                    float_columns.add(column_name)
+
+                if isinstance(value, float):
+                    float_columns.add(column_name)
+                column.append(value)
+
+        number += 1
+
+    # fill the columns of values missing in the last polls, the gaps before are filled when a value is added
+    for column_name, column in columns.items():
+        if len(column) < number:
+            column.extend(array.array("d", [math.nan]) * (number - len(column)))
+            float_columns.add(column_name)
+
+    if not number:
+        raise KeyError
+
+    arrays = {
+        "time": np.array(times, dtype="datetime64[us]"),
+        "name": np.frombuffer(name_indices, dtype=np.int32),
+        "names": np.array(list(names), dtype=str),
+    }
+    for column_name, column in columns.items():
+        values = np.frombuffer(column, dtype=np.float64)
+        if column_name not in float_columns:
+            values = values.astype(np.int64)
+        arrays[column_name] = values
+    for column_name, (rows, strings) in texts.items():
+        arrays[f"{column_name}{text_rows_suffix}"] = np.frombuffer(rows, dtype=np.int64)
+        arrays[f"{column_name}{text_values_suffix}"] = np.array(strings, dtype=str)
+
+    return arrays
+
+
+def load_columnar(file_path) -> dict:
+    """
+    Loads a columnar file. All columns are returned as NumPy arrays, no loop over the polls is needed.
+    :param file_path: path of the '.npz' file
+    :return: dictionary of the column names and their arrays, raises KeyError if the file has an unknown format
+    """
+    with np.load(file_path, allow_pickle=False) as file:
+        if "format_version" not in file.files or int(file["format_version"]) != columnar_format_version:
+            raise KeyError
+
+        return {column_name: file[column_name] for column_name in file.files if column_name != "format_version"}
+
+
+def get_value_columns(columns: dict) -> list:
+    """
+    Returns the names of all value columns, like 'hardware/cpu_percent'.
+    :param columns: dictionary of columns as returned by load_columnar
+    :return: list of column names
+    """
+    return [
+        column_name for column_name in columns
+        if "/" in column_name and not column_name.endswith((text_rows_suffix, text_values_suffix))
+    ]
+
+
+def get_text_columns(columns: dict) -> list:
+    """
+    Returns the names of all columns of text values, like 'histogram/buckets'.
+    :param columns: dictionary of columns as returned by load_columnar
+    :return: list of column names, without the suffixes of the arrays of the indices and values
+    """
+    return [column_name[:-len(text_rows_suffix)] for column_name in columns if column_name.endswith(text_rows_suffix)]
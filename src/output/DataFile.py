@@ -0,0 +1,174 @@
+import json
+import os.path
+
+import dateutil.parser
+
+from src.messages import *
+
+"""
+Contains the functions for reading and validating data files written by the monitoring.
+"""
+
+data_file_extensions = (".json", ".ndjson")  # legacy JSON files and streamed NDJSON files
+
+
+def check_entry(dictionary) -> None:
+    """
+    Checks if a single entry has the correct format. An entry is either a poll with hardware and network values, or a
+    record of other values (like the timing of an exchange) without them.
+    :param dictionary: entry to be checked
+    :return: raises KeyError if a field is incorrect, ValueError if the timestamp has an incorrect format
+    """
+
+    def check_dictionary_size():
+        """
+        Checks if the dictionary is of type dictionary, and has at least the 4 fields name, timestamp, hardware and
+        network for polls, or name, timestamp and one category of values for records.
+        :return: raises KeyError if check was not successful
+        """
+        if not isinstance(dictionary, dict) or len(dictionary) < (4 if is_poll else 3):
+            raise KeyError
+
+    def check_optional_categories():
+        """
+        Checks if the categories besides hardware and network (like 'interfaces') are of correct types and length.
+        Values are numbers, or text for values encoding more than a number (like the buckets of a histogram).
+        :return: raises KeyError if check was not successful
+        """
+        for category in dictionary:
+            if category in ("name", "time", "hardware", "network"):
+                continue
+
+            if (
+                    not isinstance(dictionary[category], list)
+                    or len(dictionary[category]) != 1
+                    or not isinstance(dictionary[category][0], dict)
+                    or not all(isinstance(v, (int, float, str)) for v in dictionary[category][0].values())
+            ):
+                raise KeyError
+
+    def check_hardware_values():
+        """
+        Checks if the hardware fields in an entry are of correct types and length. Fields added in later versions
+        (like 'monitor_cpu_percent') are optional, but have to be numbers.
+        :return: raises KeyError if check was not successful
+        """
+        if (
+                not isinstance(dictionary["hardware"], list)
+                or len(dictionary["hardware"]) != 1
+                or not isinstance(dictionary["hardware"][0], dict)
+                or not isinstance(dictionary["hardware"][0]["cpu_percent"], float)
+                or not isinstance(dictionary["hardware"][0]["ram_percent"], float)
+                or not all(isinstance(v, (int, float)) for v in dictionary["hardware"][0].values())
+        ):
+            raise KeyError
+
+    def check_network_values():
+        """
+        Checks if the network fields in an entry are of correct types and length.
+        :return: raises KeyError if check was not successful
+        """
+        if (
+                not isinstance(dictionary["network"], list)
+                or len(dictionary["network"]) != 1
+                or not isinstance(dictionary["network"][0], dict)
+                or len(dictionary["network"][0]) != 4
+                or not isinstance(dictionary["network"][0]["bytes_recv"], int)
+                or not isinstance(dictionary["network"][0]["bytes_sent"], int)
+                or not isinstance(dictionary["network"][0]["pps_recv"], int)
+                or not isinstance(dictionary["network"][0]["pps_sent"], int)
+        ):
+            raise KeyError
+
+    def check_timestamp():
+        """
+        Checks if the timestamp has the correct ISO format. Raises an error otherwise.
+        """
+        dateutil.parser.isoparse(dictionary["time"])
+
+    def check_name():
+        """
+        Checks if the name is a string.
+        :return: raises KeyError if check was not successful
+        """
+        if not isinstance(dictionary["name"], str):
+            raise KeyError
+
+    is_poll = isinstance(dictionary, dict) and ("hardware" in dictionary or "network" in dictionary)
+
+    check_dictionary_size()
+    if is_poll:
+        check_hardware_values()
+        check_network_values()
+    check_optional_categories()
+    check_timestamp()
+    check_name()
+
+
+def validate_data(data, file_name: str) -> bool:
+    """
+    Checks if the given data has the correct format in all entries. Uses the file name only for more specific errors.
+    :param data: data to be checked
+    :param file_name: name of the file from which the data was extracted, only used for more specific errors
+    :return: True for success, False otherwise
+    """
+
+    def check_data_fields():
+        """
+        Checks if there is only one field 'data', and if there are values in that field.
+        :return: raises KeyError if check was not successful
+        """
+        if len(data) != 1 or not isinstance(data["data"], list):
+            raise KeyError
+
+        if len(data["data"]) < 1:
+            raise KeyError
+
+    try:
+        check_data_fields()
+
+        for dictionary in data["data"]:
+            check_entry(dictionary)
+
+        return True
+    except KeyError:
+        print_warn(f"File {file_name} has incorrect or no data!")
+        return False
+    except ValueError:
+        print_warn(f"File {file_name} has incorrect timestamp format!")
+        return False
+    except Exception as err:
+        print(f"{err=}")
+        return False
+
+
+def read_entries(file_path):
+    """
+    Reads the entries of a data file one by one. NDJSON files are streamed line by line, so only one entry is in
+    memory at a time. JSON files of older versions are loaded at once. An incomplete last line of an NDJSON file (for
+    example after a crash while writing) is skipped with a warning.
+    :param file_path: path of the JSON or NDJSON file
+    :return: generator of the entries, raises KeyError if a line in the middle of the file is incorrect
+    """
+    with open(file_path) as file:
+        if not file_path.endswith(".ndjson"):
+            data = json.load(file)
+            if len(data) != 1 or not isinstance(data["data"], list):
+                raise KeyError
+            yield from data["data"]
+            return
+
+        broken_line = None
+        for number, line in enumerate(file, start=1):
+            if broken_line:  # only the last line may be incomplete
+                raise KeyError
+            if not line.strip():
+                continue
+
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                broken_line = number
+
+        if broken_line:
+            print_warn(f"Skipping incomplete last line {broken_line} of {os.path.basename(file_path)}.")
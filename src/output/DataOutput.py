@@ -1,6 +1,12 @@
 import os
 
+from src.exchanges.LatencyHistogram import LatencyHistogram
+from src.output.BreakdownGenerator import *
+from src.output.ColumnarData import *
+from src.output.DistributionGenerator import *
 from src.output.GraphHandler import *
+from src.output.PercentileGenerator import *
+from src.output.SweepGenerator import *
 
 
 class DataOutput:
@@ -22,7 +28,8 @@ class GraphOutput(DataOutput):
     Implements the graph output.
     """
 
-    def __init__(self, path: str, value_types: list, detailed_full: [bool, bool], normal_median: [bool, bool]):
+    def __init__(self, path: str, value_types: list, detailed_full: [bool, bool], normal_median: [bool, bool],
+                 jobs: int = 1, force: bool = False):
         """
         Checks if at least one of the detailed, full and normal, median pairs of booleans is True, otherwise raises
         ValueError. Checks if path exists, otherwise throws FileNotFoundError. Sets the parameters.
@@ -31,6 +38,8 @@ class GraphOutput(DataOutput):
         :param detailed_full: a pair of booleans, first stands for generate detailed graphs, second for full graphs
         :param normal_median: a pair of booleans, first stands for generate normal graphs, second for min-max-median
         graphs
+        :param jobs: number of processes generating graphs in parallel
+        :param force: True for generating all graphs, False for skipping graphs that are up-to-date
         """
         if detailed_full == [False, False] or normal_median == [False, False]:
             raise ValueError
@@ -42,22 +51,409 @@ class GraphOutput(DataOutput):
         self.value_types = value_types
         self.detailed_full = detailed_full
         self.normal_median = normal_median
+        self.jobs = jobs
+        self.force = force
 
     def generate(self):
         """
         Implements the generation for graphs. Creates a MultiFileGraphHandler with the initial parameters, goes through
         all combinations of input pairs and generates respective graphs.
         """
-        generator = MultiFileGraphHandler(self.path, self.value_types)
+        generator = MultiFileGraphHandler(self.path, self.value_types, self.jobs, self.force)
+        modes = []
 
         if self.detailed_full[0] and self.normal_median[0]:
-            generator.generate_graphs(False, False)
+            modes.append((False, False))
 
         if self.detailed_full[0] and self.normal_median[1]:
-            generator.generate_graphs(False, True)
+            modes.append((False, True))
 
         if self.detailed_full[1] and self.normal_median[0]:
-            generator.generate_graphs(True, False)
+            modes.append((True, False))
 
         if self.detailed_full[1] and self.normal_median[1]:
-            generator.generate_graphs(True, True)
+            modes.append((True, True))
+
+        generator.generate_all_graphs(modes)
+
+
+class ColumnarOutput(DataOutput):
+    """
+    Implements the conversion of data files into the columnar format. The columnar files are put into the
+    'data_columnar' directory.
+    """
+
+    def __init__(self, path: str):
+        """
+        Checks if path exists, otherwise throws FileNotFoundError.
+        :param path: path of a directory of JSON or NDJSON files with correct format or a single file
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError
+
+        self.path = path
+
+    def generate(self):
+        """
+        Converts the file or all files in the directory. Files with incorrect format are skipped with a warning.
+        """
+        print_log("Start converting files...")
+
+        if os.path.isdir(self.path):
+            file_paths = [os.path.join(self.path, file_name) for file_name in sorted(os.listdir(self.path))]
+        else:
+            file_paths = [self.path]
+
+        Path("data_columnar").mkdir(parents=True, exist_ok=True)
+
+        for file_path in file_paths:
+            short_file_name, extension = os.path.splitext(os.path.basename(file_path))
+            if extension not in data_file_extensions:
+                continue
+
+            output_path = os.path.join("data_columnar", f"{short_file_name}{columnar_extension}")
+            try:
+                number = convert_to_columnar(str(file_path), output_path)
+            except (KeyError, ValueError):
+                print_warn(f"File {file_path} has incorrect or no data, skipping.")
+                continue
+
+            print_log(f"Converted {number} polls to {output_path}.")
+
+        print_log("Files converted.")
+
+
+class BreakdownOutput(DataOutput):
+    """
+    Implements the breakdown of opening and closing the VPN into its phases (like starting the daemon or assigning the
+    IP address). Generates one stacked bar graph per data file and operation, saved as
+    data_graphs/{file name}/{open_spans|close_spans}/breakdown.png.
+    """
+    categories = {"open_spans": "Opening VPN", "close_spans": "Closing VPN"}
+
+    def __init__(self, path: str):
+        """
+        Checks if path exists, otherwise throws FileNotFoundError.
+        :param path: path of a directory of data files with correct format or a single file
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError
+
+        self.path = path
+
+    def generate(self):
+        """
+        Generates the breakdowns of all files. Files without phases are skipped. Also prints the mean duration of
+        every phase.
+        """
+        print_log("Start generating breakdowns...")
+
+        if os.path.isdir(self.path):
+            file_paths = [os.path.join(self.path, file_name) for file_name in sorted(os.listdir(self.path))]
+        else:
+            file_paths = [self.path]
+
+        for file_path in file_paths:
+            short_file_name, extension = os.path.splitext(os.path.basename(file_path))
+            if extension not in data_file_extensions + (columnar_extension,):
+                continue
+
+            try:
+                run = RunData(str(file_path))
+            except (KeyError, ValueError):
+                print_warn(f"File {file_path} has incorrect or no data, skipping.")
+                continue
+
+            for category, description in self.categories.items():
+                _, values = run.get_records(category)
+                if not values:
+                    continue
+
+                # phases are stacked in the order they happened
+                phases = sorted(
+                    (name for name in values if not name.endswith("_start")),
+                    key=lambda name: np.nanmedian(values.get(f"{name}_start", np.zeros(1))),
+                )
+                for phase in phases:
+                    print_log(f"{short_file_name}, {description}, {phase}: mean {np.nanmean(values[phase]):.4f} s")
+
+                generator = BreakdownGenerator(
+                    {phase: values[phase] for phase in phases},
+                    title=f"{description}: phases ({short_file_name})",
+                )
+                figure = generator.plot_graph()
+
+                output_path = os.path.join("data_graphs", short_file_name, category)
+                Path(output_path).mkdir(parents=True, exist_ok=True)
+                figure.savefig(os.path.join(output_path, "breakdown.png"))
+                print_log(f"Saved {os.path.join(output_path, 'breakdown.png')}.")
+
+        print_log("Breakdowns generated.")
+
+
+class LatencyOutput(DataOutput):
+    """
+    Implements the distribution of the latencies measured per exchange (category 'exchange'). Generates a CDF and a
+    scatter plot over the exchanges per data file and latency, saved as
+    data_graphs/{file name}/exchange/{latency}/{cdf|scatter}.png.
+    """
+    value_types = [
+        ConnectTime, PretransferTime, StarttransferTime, TotalTime, FirstRequestTime, RequestTime, LoadMedianLatency,
+        LoadTailLatency, UDPRoundTripTime,
+    ]
+
+    def __init__(self, path: str):
+        """
+        Checks if path exists, otherwise throws FileNotFoundError.
+        :param path: path of a directory of data files with correct format or a single file
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError
+
+        self.path = path
+
+    def generate(self):
+        """
+        Generates the plots of all files. Latencies without values are skipped. Also prints the median and the 99th
+        percentile of every latency.
+        """
+        print_log("Start generating latency distributions...")
+
+        if os.path.isdir(self.path):
+            file_paths = [os.path.join(self.path, file_name) for file_name in sorted(os.listdir(self.path))]
+        else:
+            file_paths = [self.path]
+
+        for file_path in file_paths:
+            short_file_name, extension = os.path.splitext(os.path.basename(file_path))
+            if extension not in data_file_extensions + (columnar_extension,):
+                continue
+
+            try:
+                run = RunData(str(file_path))
+            except (KeyError, ValueError):
+                print_warn(f"File {file_path} has incorrect or no data, skipping.")
+                continue
+
+            for value_type in self.value_types:
+                category = value_type.get_category_string(value_type)
+                name = value_type.get_name_string(value_type)
+                _, values = run.get_series(category, name)
+                if not len(values):
+                    continue
+
+                description = value_type.get_description(value_type)
+                print_log(
+                    f"{short_file_name}, {description}: median {np.median(values):.6f} s, "
+                    f"p99 {np.percentile(values, 99):.6f} s ({len(values)} exchanges)"
+                )
+
+                generator = DistributionGenerator(value_type, values, title=f"{description} ({short_file_name})")
+                output_path = os.path.join("data_graphs", short_file_name, category, name)
+                Path(output_path).mkdir(parents=True, exist_ok=True)
+
+                for graph_name, figure in (("cdf", generator.plot_cdf()), ("scatter", generator.plot_scatter())):
+                    figure.savefig(os.path.join(output_path, f"{graph_name}.png"))
+                    print_log(f"Saved {os.path.join(output_path, f'{graph_name}.png')}.")
+
+        print_log("Latency distributions generated.")
+
+
+class SweepOutput(DataOutput):
+    """
+    Implements the comparison of the VPNs over the payload sizes of a sweep of the 'bulk' exchange. Reads the client's
+    data files, groups them by VPN and plots the goodput and the time of the transfers over the sizes, one curve per
+    VPN, saved as data_graphs/sweep/{value}.png.
+    """
+    values = {
+        "download_goodput": ("Download goodput", "goodput of the download [Mbit/s]"),
+        "upload_goodput": ("Upload goodput", "goodput of the upload [Mbit/s]"),
+        "download_time": ("Download time", "time of the download [s]"),
+        "upload_time": ("Upload time", "time of the upload [s]"),
+    }
+
+    def __init__(self, path: str):
+        """
+        Checks if path exists, otherwise throws FileNotFoundError.
+        :param path: path of a directory of data files with correct format or a single file
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError
+
+        self.path = path
+
+    def generate(self):
+        """
+        Generates one graph per value, over all files of the client. Files without sizes are skipped. Also prints the
+        median goodput of every VPN at its maximum segment size.
+        """
+        print_log("Start generating sweep graphs...")
+
+        if os.path.isdir(self.path):
+            file_paths = [os.path.join(self.path, file_name) for file_name in sorted(os.listdir(self.path))]
+        else:
+            file_paths = [self.path]
+
+        runs = {}  # VPN -> list of dictionaries of value names and arrays, one per file
+        for file_path in file_paths:
+            short_file_name, extension = os.path.splitext(os.path.basename(file_path))
+            if extension not in data_file_extensions + (columnar_extension,):
+                continue
+
+            role, _, vpn = short_file_name.split("_")[0].partition("-")
+            if role != "client":
+                continue
+
+            try:
+                run = RunData(str(file_path))
+            except (KeyError, ValueError):
+                print_warn(f"File {file_path} has incorrect or no data, skipping.")
+                continue
+
+            _, values = run.get_records("exchange")
+            if "size" not in values:
+                continue
+
+            runs.setdefault(vpn, []).append(values)
+
+        if not runs:
+            print_warn("No sweep found, run the 'bulk' exchange with the option 'sizes'.")
+            return
+
+        # files of the same VPN are joined, values missing in a file are NaN
+        records = {}
+        for vpn, values_per_run in runs.items():
+            names = set().union(*values_per_run)
+            records[vpn] = {
+                name: np.concatenate([
+                    values.get(name, np.full(len(values["size"]), np.nan)) for values in values_per_run
+                ])
+                for name in names
+            }
+        segment_sizes = {
+            vpn: int(np.nanmedian(values["mss"])) for vpn, values in records.items()
+            if "mss" in values and not np.isnan(values["mss"]).all()
+        }
+
+        output_path = os.path.join("data_graphs", "sweep")
+        Path(output_path).mkdir(parents=True, exist_ok=True)
+
+        for name, (description, y_label) in self.values.items():
+            curves = {}
+            for vpn, values in records.items():
+                if name not in values:
+                    continue
+                present = ~np.isnan(values["size"]) & ~np.isnan(values[name])
+                if present.any():
+                    curves[vpn] = (values["size"][present], values[name][present])
+            if not curves:
+                continue
+
+            for vpn, (sizes, goodputs) in curves.items():
+                if name.endswith("goodput") and vpn in segment_sizes:
+                    at_mss = goodputs[sizes == segment_sizes[vpn]]
+                    if len(at_mss):
+                        print_log(f"{vpn}, {description} at MSS {segment_sizes[vpn]} B: median {np.median(at_mss):.2f}")
+
+            generator = SweepGenerator(curves, segment_sizes, y_label, title=f"{description} over payload size")
+            figure = generator.plot_graph()
+            figure.savefig(os.path.join(output_path, f"{name}.png"))
+            print_log(f"Saved {os.path.join(output_path, f'{name}.png')}.")
+
+        print_log("Sweep graphs generated.")
+
+
+class HistogramOutput(DataOutput):
+    """
+    Implements the merged latency histograms of exchanges that count their latencies (category 'histogram', like
+    'http-load'). The histograms of all exchanges of a client's data file are merged per run, and the ones of all runs
+    of a VPN per VPN, so the percentiles are the ones of all requests, not an average of the percentiles of the
+    exchanges. Prints the percentiles and saves the percentile spectrum of the VPNs as
+    data_graphs/histogram/percentiles.png.
+    """
+    percentiles = (50, 90, 99, 99.9, 99.99)
+
+    def __init__(self, path: str):
+        """
+        Checks if path exists, otherwise throws FileNotFoundError.
+        :param path: path of a directory of data files with correct format or a single file
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError
+
+        self.path = path
+
+    def generate(self):
+        """
+        Merges and prints the histograms of every file and every VPN and plots the percentile spectrum. Files without
+        histograms are skipped, just like histograms that can not be merged with the ones before.
+        """
+        print_log("Start generating latency histograms...")
+
+        if os.path.isdir(self.path):
+            file_paths = [os.path.join(self.path, file_name) for file_name in sorted(os.listdir(self.path))]
+        else:
+            file_paths = [self.path]
+
+        merged = {}  # VPN -> LatencyHistogram of all runs
+        for file_path in file_paths:
+            short_file_name, extension = os.path.splitext(os.path.basename(file_path))
+            if extension not in data_file_extensions + (columnar_extension,):
+                continue
+
+            role, _, vpn = short_file_name.split("_")[0].partition("-")
+            if role != "client":
+                continue
+
+            try:
+                run = RunData(str(file_path))
+            except (KeyError, ValueError):
+                print_warn(f"File {file_path} has incorrect or no data, skipping.")
+                continue
+
+            offsets, values = run.get_records("histogram")
+            run_histogram = None
+            for index in range(len(offsets)):
+                try:
+                    histogram = LatencyHistogram.from_record({name: column[index] for name, column in values.items()})
+                    if run_histogram is None:
+                        run_histogram = histogram
+                    else:
+                        run_histogram.merge(histogram)
+                except (KeyError, ValueError) as err:
+                    print_warn(f"Histogram {index + 1} of {short_file_name} skipped: {err}")
+            if run_histogram is None:
+                continue
+
+            self.__print_percentiles(short_file_name, run_histogram)
+            try:
+                if vpn in merged:
+                    merged[vpn].merge(run_histogram)
+                else:
+                    merged[vpn] = run_histogram
+            except ValueError as err:
+                print_warn(f"Histograms of {short_file_name} not merged into {vpn}: {err}")
+
+        if not merged:
+            print_warn("No latency histogram found, run an exchange counting its latencies, like 'http-load'.")
+            return
+
+        for vpn, histogram in sorted(merged.items()):
+            self.__print_percentiles(f"{vpn} (all runs)", histogram)
+
+        output_path = os.path.join("data_graphs", "histogram")
+        Path(output_path).mkdir(parents=True, exist_ok=True)
+        figure = PercentileGenerator(merged, title="Latency percentiles of all runs").plot_graph()
+        figure.savefig(os.path.join(output_path, "percentiles.png"))
+        print_log(f"Saved {os.path.join(output_path, 'percentiles.png')}.")
+
+        print_log("Latency histograms generated.")
+
+    def __print_percentiles(self, label, histogram) -> None:
+        """
+        Prints the number of latencies and their percentiles.
+        :param label: name of the file or VPN
+        :param histogram: LatencyHistogram
+        """
+        percentiles = ", ".join(f"p{p:g} {histogram.get_percentile(p):.6f} s" for p in self.percentiles)
+        print_log(f"{label}: {histogram.count} latencies, {percentiles}, max {histogram.maximum:.6f} s")
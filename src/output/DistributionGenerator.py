@@ -0,0 +1,79 @@
+import numpy as np
+from matplotlib.figure import Figure
+
+from src.messages import *
+
+
+class DistributionGenerator:
+    """
+    Plots values measured once per exchange, like latencies: as cumulative distribution function (CDF), showing which
+    share of the exchanges stayed below a value, and as scatter plot over the exchanges, showing changes during the
+    run. Every plot gets its own figure.
+    """
+
+    def __init__(self, value_type, values, title: str = "") -> None:
+        """
+        :param value_type: ValueType of the values, used for the labels
+        :param values: values in the order of the exchanges
+        :param title: title for the figures as string
+        """
+        self.value_instance = value_type(values, False, False)
+        self.values = np.asarray(values, dtype=float)
+        self.title = title
+
+    def plot_cdf(self) -> Figure:
+        """
+        Plots the empirical CDF of the values and marks the median and the 99th percentile.
+        :return: figure containing the graph
+        """
+        print_log("Plotting CDF...")
+        figure = Figure()
+        axes = figure.add_subplot()
+
+        values = np.sort(self.values)
+        shares = np.arange(1, len(values) + 1) / len(values)
+        axes.step(values, shares, where="post")
+
+        for percentile, color in ((50, "green"), (99, "red")):
+            value = np.percentile(values, percentile)
+            axes.axvline(value, color=color, linestyle="--", linewidth=1, label=f"p{percentile} = {value:.6f}")
+
+        axes.grid(True, "both")
+        axes.set_xlabel(self.value_instance.get_y_label())
+        axes.set_ylabel("share of exchanges")
+        axes.set_ylim([0, 1.02])
+        axes.legend(loc="lower right", fontsize=8)
+        self.__set_title(axes)
+
+        print_log("CDF plotted.")
+        return figure
+
+    def plot_scatter(self) -> Figure:
+        """
+        Plots every value over the number of its exchange.
+        :return: figure containing the graph
+        """
+        print_log("Plotting scatter plot...")
+        figure = Figure()
+        axes = figure.add_subplot()
+
+        axes.scatter(np.arange(1, len(self.values) + 1), self.values, s=8, marker=".")
+
+        axes.grid(True, "both", "y")
+        axes.set_xlabel("#exchange")
+        axes.set_ylabel(self.value_instance.get_y_label())
+        limits = self.value_instance.get_y_limit()
+        if limits:
+            axes.set_ylim(limits)
+        self.__set_title(axes)
+
+        print_log("Scatter plot plotted.")
+        return figure
+
+    def __set_title(self, axes):
+        """
+        Sets the title of the plot, if given.
+        :param axes: axes of the plot
+        """
+        if self.title:
+            axes.set_title(self.title, fontweight="bold", fontsize=9)
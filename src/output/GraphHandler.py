@@ -1,132 +1,30 @@
-import json
 import os.path
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import matplotlib
+
 import dateutil.parser
 
+from src.output.GraphManifest import *
 from src.output.PlotGenerator import *
+from src.output.RunData import *
 from src.output.ValueType import *
 
 
-def validate_data(data, file_name: str) -> bool:
-    """
-    Checks if the given data has the correct format in all entries. Uses the file name only for more specific errors.
-    :param data: data to be checked
-    :param file_name: name of the file from which the data was extracted, only used for more specific errors
-    :return: True for success, False otherwise
-    """
-
-    def check_data_fields():
-        """
-        Checks if there is only one field 'data', and if there are values in that field.
-        :return: raises KeyError if check was not successful
-        """
-        if len(data) != 1 or not isinstance(data["data"], list):
-            raise KeyError
-
-        if len(data["data"]) < 1:
-            raise KeyError
-
-    def check_dictionary_size():
-        """
-        Checks if the dictionary is of type dictionary, and its length of 4 fields (name, timestamp, hardware and
-        network)
-        :return: raises KeyError if check was not successful
-        """
-        if not isinstance(dictionary, dict) or len(dictionary) != 4:
-            raise KeyError
-
-    def check_hardware_values():
-        """
-        Checks if the hardware fields in an entry are of correct types and length.
-        :return: raises KeyError if check was not successful
-        """
-        if (
-                not isinstance(dictionary["hardware"], list)
-                or len(dictionary["hardware"]) != 1
-                or not isinstance(dictionary["hardware"][0], dict)
-                or len(dictionary["hardware"][0]) != 2
-                or not isinstance(dictionary["hardware"][0]["cpu_percent"], float)
-                or not isinstance(dictionary["hardware"][0]["ram_percent"], float)
-        ):
-            raise KeyError
-
-    def check_network_values():
-        """
-        Checks if the network fields in an entry are of correct types and length.
-        :return: raises KeyError if check was not successful
-        """
-        if (
-                not isinstance(dictionary["network"], list)
-                or len(dictionary["network"]) != 1
-                or not isinstance(dictionary["network"][0], dict)
-                or len(dictionary["network"][0]) != 4
-                or not isinstance(dictionary["network"][0]["bytes_recv"], int)
-                or not isinstance(dictionary["network"][0]["bytes_sent"], int)
-                or not isinstance(dictionary["network"][0]["pps_recv"], int)
-                or not isinstance(dictionary["network"][0]["pps_sent"], int)
-        ):
-            raise KeyError
-
-    def check_timestamp():
-        """
-        Checks if the timestamp has the correct ISO format. Raises an error otherwise.
-        """
-        dateutil.parser.isoparse(dictionary["time"])
-
-    def check_name():
-        """
-        Checks if the name is a string.
-        :return: raises KeyError if check was not successful
-        """
-        if not isinstance(dictionary["name"], str):
-            raise KeyError
-
-    try:
-        check_data_fields()
-
-        for dictionary in data["data"]:
-            check_dictionary_size()
-            check_hardware_values()
-            check_network_values()
-            check_timestamp()
-            check_name()
-
-        return True
-    except KeyError:
-        print_warn(f"File {file_name} has incorrect or no data!")
-        return False
-    except ValueError:
-        print_warn(f"File {file_name} has incorrect timestamp format!")
-        return False
-    except Exception as err:
-        print(f"{err=}")
-        return False
-
-
-def get_single_timestamp(data, n: int):
-    """
-    Returns a single timestamp at position n in data.
-    :param data: data in which the timestamp is located
-    :param n: position in the list of timestamps
-    :return: timestamp extracted from the data
-    """
-    return data["data"][n]["time"]
-
-
 class SingleFileGraphHandler:
     """
-    Handles the creation of graphs for one given input file.
+    Handles the creation of graphs for one given input file. The file is loaded only once, all graphs use the same
+    data.
     """
 
     def __init__(self, file_path, value_types: list) -> None:
         """
-        Initializes the value_types, checks if the path is a JSON file, extracts path and name information. Also loads
-        data from the file.
+        Initializes the value_types, checks if the path is a data file (JSON, NDJSON or columnar), extracts path and
+        name information. Also loads data from the file.
         :param file_path: path of the file to generate graphs for
         :param value_types: list of ValueTypes for which a graph should be generated
         """
-        self.value_lists = {}
         self.value_types = value_types
 
         if not os.path.isfile(file_path):
@@ -135,114 +33,97 @@ class SingleFileGraphHandler:
 
         self.file_path = file_path
         self.file_name = os.path.basename(file_path)
-        if self.file_name[-5:] != ".json":
-            print_warn(f"{file_path} is not a JSON file.")
+        self.short_file_name, extension = os.path.splitext(self.file_name)
+        if extension not in data_file_extensions + (columnar_extension,):
+            print_warn(f"{file_path} is not a JSON, NDJSON or columnar file.")
             raise FileNotFoundError
-        self.short_file_name = self.file_name[:-5]
 
         if not self.__load_data_from_file():
-            raise Exception("Unable to load data from file!")
-        if not self.__fill_lists_from_data():
             raise Exception(f"Incorrect data format in {self.file_path}")
 
+        self.filtered_series = {}  # maps a ValueType to its series after the outlier correction
+
     def generate_graphs(self, full: bool, median: bool):
         """
         Generates the graphs for the file with fixed full and median booleans.
         :param full: True if y-limit is 0 to 100 percent for relative ValueType, False for detailed scope
         :param median: True if min-max-median graph should be generated, False for normal graphs
         """
+        for value_type in self.value_types:
+            self.generate_graph(value_type, full, median)
 
-        def calculate_full_time() -> float:
-            """
-            Calculates the full time the exchange took.
-            :return: float of the full duration in seconds
-            """
-            initial_time = dateutil.parser.isoparse(self.value_lists["time"][0])
-            last_time = dateutil.parser.isoparse(self.value_lists["time"][len(self.value_lists["time"]) - 1])
-            return (last_time - initial_time).total_seconds()
+    def generate_graph(self, value_type, full: bool, median: bool):
+        """
+        Generates the graph of one ValueType for the file with fixed full and median booleans. The graph is saved as
+        data_graphs/{file name}/{category}/{name}/{graph type}.png.
+        :param value_type: ValueType to generate the graph for
+        :param full: True if y-limit is 0 to 100 percent for relative ValueType, False for detailed scope
+        :param median: True if min-max-median graph should be generated, False for normal graphs
+        :return: path of the saved graph, None if the file has no values for the ValueType
+        """
+        name_string = value_type.get_name_string(value_type)
+        category_string = value_type.get_category_string(value_type)
 
-        graph_dir_path = os.path.join("data_graphs", self.short_file_name)
+        if not self.run.has_series(category_string, name_string):
+            print_warn(f"File {self.file_name} has no values for {name_string}, skipping.")
+            return None
 
-        for value_type in self.value_types:
-            name_string = value_type.get_name_string(value_type)
-            category_string = value_type.get_category_string(value_type)
-
-            title = self.__get_title(value_type, calculate_full_time(), median)
-
-            # Replace outliers with 0
-            if name_string == "pps_recv" or name_string == "pps_sent":
-                self.value_lists[name_string] = [0 if i > 100000 else i for i in self.value_lists[name_string]]
-
-            # Replace outliers with 0 increase, add the following increases
-            if name_string == "bytes_recv" or name_string == "bytes_sent":
-                result = []
-                result.append(self.value_lists[name_string][0])
-                for i in range(1,len(self.value_lists[name_string])):
-                    if self.value_lists[name_string][i] > result[-1] + 1000000: # if first outlier detected
-                        if self.value_lists[name_string][i] - self.value_lists[name_string][i-1] < 1000000: # if not outlier
-                            result.append(result[-1] + self.value_lists[name_string][i] - self.value_lists[name_string][i-1]) # add increase
-                        else:
-                            result.append(result[-1]) # Replace false data with the last data, increase == 0
-                    else:
-                        result.append(self.value_lists[name_string][i]) # add until first outlier detected
-                self.value_lists[name_string] = result    
-
-            generator = PlotGenerator(
-                value_type=value_type,
-                timestamps=self.value_lists["time"],
-                values=self.value_lists[name_string],
-                full=full,
-                median=median,
-                title=title,
-            )
+        offsets, values, corrected = self.__get_filtered_series(value_type)
+        title = self.__get_title(value_type, self.run.full_time, median)
 
-            generator.plot_graph()
-            file_path = os.path.join(graph_dir_path, category_string, name_string)
-            file_name = self.__generate_filename(value_type, full, median)
-            self.__save_figure(file_path, file_name)
+        generator = PlotGenerator(
+            value_type=value_type,
+            offsets=offsets,
+            values=values,
+            corrected=corrected,
+            full=full,
+            median=median,
+            title=title,
+        )
 
-    @staticmethod
-    def __generate_filename(value_type, full: bool, median: bool) -> str:
+        figure = generator.plot_graph()
+        return self.__save_figure(figure, get_graph_path(self.file_path, value_type, full, median))
+
+    def __get_filtered_series(self, value_type):
         """
-        Returns the file name of the final graph picture. A folder with all these pictures includes the files
-
-        - normal.png
-        - full.png
-        - min-max-median.png
-        - full_min-max-median.png.
-
-        For absolute ValueTypes, only normal or min-max-median will be output.
-        :param value_type: ValueType that was used for graph generation. Used to determine if full graphs are relevant.
-        :param full: True if full option was used, False otherwise
-        :param median: True if median option was used, False otherwise
-        :return: filename of the picture as a string
+        Returns the series of a ValueType after correcting its outliers. The correction is done once per file and
+        ValueType and works on a copy, the loaded data stays unchanged.
+        :param value_type: ValueType of the series
+        :return: tuple of arrays of time offsets, values and booleans marking the corrected samples
         """
-        if issubclass(value_type, RelativeValueType):
-            if full and median:
-                return "full_min-max-median"
-            if full:
-                return "full"
+        if value_type not in self.filtered_series:
+            offsets, values = self.run.get_series(
+                value_type.get_category_string(value_type), value_type.get_name_string(value_type)
+            )
+            outlier_filter = value_type.get_outlier_filter(value_type)
 
-        if median:
-            return "min-max-median"
+            if outlier_filter:
+                values, corrected = outlier_filter.apply(values)
+                if corrected.any():
+                    print_log(f"Corrected {int(corrected.sum())} outliers of {value_type.get_name_string(value_type)}.")
+            else:
+                corrected = np.zeros(len(values), dtype=bool)
+
+            self.filtered_series[value_type] = (offsets, values, corrected)
 
-        return "normal"
+        return self.filtered_series[value_type]
 
-    def __save_figure(self, file_path, file_name):
+    @staticmethod
+    def __save_figure(figure, output_path) -> str:
         """
-        Saves the before plotted graph(s) in a file. Cleans up afterward. Creates the necessary directories if needed.
-        Prints log messages before and after.
-        :param file_path: path to generate, put the file in this directory
-        :param file_name: name of the file
+        Saves the plotted figure in a file. Creates the necessary directories if needed. Prints log messages before and
+        after.
+        :param figure: figure containing the graph
+        :param output_path: path of the file
+        :return: path of the saved file
         """
-        print_log(f"Saving file {file_name}...")
+        print_log(f"Saving file {output_path}...")
 
-        Path(file_path).mkdir(parents=True, exist_ok=True)
-        plt.savefig(os.path.join(file_path, file_name))
-        plt.clf()
-        self.__clean_up()
+        Path(os.path.dirname(output_path)).mkdir(parents=True, exist_ok=True)
+        figure.savefig(output_path)
 
         print_log("File saved.")
+        return output_path
 
     def __get_title(self, value_type, full_time: float, median: bool) -> str:
         """
@@ -319,75 +200,109 @@ class SingleFileGraphHandler:
 
     def __load_data_from_file(self) -> bool:
         """
-        Opens the file, and loads the data from the file into self.data.
+        Loads and validates the data from the file into self.run.
         :return: True for success, False otherwise
         """
         try:
-            file = open(self.file_path)
-        except Exception as err:
-            print(f"{err=}")
+            self.run = RunData(self.file_path)
+            return True
+        except KeyError:
+            print_warn(f"File {self.file_name} has incorrect or no data!")
+            return False
+        except ValueError:
+            print_warn(f"File {self.file_name} has incorrect timestamp format!")
             return False
-
-        try:
-            self.data = json.load(file)
         except Exception as err:
             print(f"{err=}")
             return False
 
-        return True
 
-    def __fill_lists_from_data(self) -> bool:
-        """
-        Fills the classes lists of values from the loaded data. Validates data first.
-        :return: True for success, False otherwise
-        """
-        if not validate_data(self.data, self.file_name):
-            return False
+renderer_version = 3  # increase on every change of the graph generation, so existing graphs are generated again
 
-        self.value_lists["time"] = []
-        for i in range(len(self.data["data"])):
-            # add timestamp entry
-            self.value_lists["time"].append(get_single_timestamp(self.data, i))
 
-            # add value entries
-            for value_type in self.value_types:
-                name_string = value_type.get_name_string(value_type)
-                category_string = value_type.get_category_string(value_type)
+def get_graph_path(file_path, value_type, full: bool, median: bool) -> str:
+    """
+    Returns the path of the graph picture as data_graphs/{file name}/{category}/{name}/{graph type}.png. A folder
+    with all these pictures includes the files
+
+    - normal.png
+    - full.png
+    - min-max-median.png
+    - full_min-max-median.png.
+
+    For absolute ValueTypes, only normal or min-max-median will be output.
+    :param file_path: path of the data file
+    :param value_type: ValueType that was used for graph generation. Used to determine if full graphs are relevant.
+    :param full: True if full option was used, False otherwise
+    :param median: True if median option was used, False otherwise
+    :return: path of the picture as a string
+    """
+    file_name = "normal"
+    if median:
+        file_name = "min-max-median"
+    if full and issubclass(value_type, RelativeValueType):
+        file_name = "full_min-max-median" if median else "full"
+
+    return os.path.join(
+        "data_graphs",
+        os.path.splitext(os.path.basename(file_path))[0],
+        value_type.get_category_string(value_type),
+        value_type.get_name_string(value_type),
+        f"{file_name}.png",
+    )
+
+
+def initialize_graph_worker():
+    """
+    Prepares a worker process for generating graphs. Uses the non-interactive Agg backend.
+    """
+    matplotlib.use("Agg")
 
-                # avoid overwriting existing entries
-                try:
-                    entry = self.data["data"][i][category_string][0][name_string]
-                    self.value_lists[name_string].append(entry)
-                except KeyError:
-                    self.value_lists[name_string] = []  # would overwrite values
-                    entry = self.data["data"][i][category_string][0][name_string]
-                    self.value_lists[name_string].append(entry)
 
-        return True
+def generate_graph_unit(unit):
+    """
+    Generates one graph. Used by the worker processes, but also for generating graphs in the main process. The loaded
+    file is kept, so following graphs of the same file do not load it again. Errors are caught, so a failing graph
+    does not end the generation of the others.
+    :param unit: tuple of the file path, ValueType, full and median boolean
+    :return: path of the saved graph, None if the file has no values for the ValueType, False if the graph could not be
+    generated
+    """
+    file_path, value_type, full, median = unit
 
-    def __clean_up(self):
-        """
-        Resets the dictionary of lists to an empty dictionary. Loads the data again.
-        :return:
-        """
-        self.value_lists = {}
+    handler = loaded_handlers.get(file_path)
+    if handler is None:
+        loaded_handlers.clear()  # only keep one file in memory
+        try:
+            handler = SingleFileGraphHandler(file_path, [value_type])
+        except Exception as err:
+            print_warn(f"Unable to generate graphs for {file_path}: {err}")
+            return False
+        loaded_handlers[file_path] = handler
 
-        if not self.__load_data_from_file():
-            raise Exception("Unable to load data from file!")
-        if not self.__fill_lists_from_data():
-            raise Exception(f"Incorrect data format in {self.file_path}")
+    try:
+        return handler.generate_graph(value_type, full, median)
+    except Exception as err:
+        print_warn(f"Unable to generate graph {get_graph_path(file_path, value_type, full, median)}: {err=}")
+        return False
+
+
+loaded_handlers = {}  # file handler of the last loaded file in this process
 
 
 class MultiFileGraphHandler:
     """
-    Handles the creation of graphs for multiple given input files in the form of a directory or a single file.
+    Handles the creation of graphs for multiple given input files in the form of a directory or a single file. Graphs
+    can be generated in parallel processes.
     """
 
-    def __init__(self, path, value_types: list) -> None:
+    def __init__(self, path, value_types: list, jobs: int = 1, force: bool = False) -> None:
         """
         Checks if the path is a file or directory.
         :param path: path of the file or directory to generate graphs for
         :param value_types: list of ValueTypes for which graphs should be generated
+        :param jobs: number of processes generating graphs, 1 for generating in this process
+        :param force: True for generating all graphs, False for only generating graphs that are not up-to-date
         """
 
         if not (os.path.isdir(path) or os.path.isfile(path)):
@@ -396,25 +311,95 @@ class MultiFileGraphHandler:
 
         self.path = path
         self.value_types = value_types
+        self.jobs = jobs
+        self.force = force
 
     def generate_graphs(self, full: bool, median: bool):
         """
-        Generates the graphs by calling the SingleFileGraphHandler for each file. Also prints log messages.
+        Generates the graphs for all files with fixed full and median booleans.
         :param full: True if y-limit is 0 to 100 percent for relative ValueType, False for detailed scope
         :param median: True if min-max-median graph should be generated, False for normal graphs
         """
-        print_log("Start generating graphs...")
-        if os.path.isdir(self.path):
-            for file_name in os.listdir(self.path):
-                single_file_handler = SingleFileGraphHandler(os.path.join(self.path, file_name), self.value_types)
-                single_file_handler.generate_graphs(full, median)
+        self.generate_all_graphs([(full, median)])
 
-                del single_file_handler
-        elif os.path.isfile(self.path):
-            single_file_handler = SingleFileGraphHandler(os.path.join(self.path), self.value_types)
-            single_file_handler.generate_graphs(full, median)
+    def generate_all_graphs(self, modes: list):
+        """
+        Generates the graphs for all files, ValueTypes and the given modes. Every graph is a separate unit of work, the
+        units are spread across the worker processes. Units of the same file are kept together, so a worker loads a
+        file only once. Graphs that are up-to-date according to the manifest are skipped, unless force is set. Prints
+        the progress.
+        :param modes: list of tuples of full and median booleans
+        """
+        print_log("Start generating graphs...")
 
-            del single_file_handler
+        manifest = GraphManifest(renderer_version)
+        units = []
+        graphs = {}  # maps the graph path to the hash of its input file, also removes duplicate graphs
+        up_to_date = 0
+
+        for file_path in self.__get_file_paths():
+            input_hash = manifest.get_input_hash(file_path)
+            for full, median in modes:
+                for value_type in self.value_types:
+                    graph_path = get_graph_path(file_path, value_type, full, median)
+                    if graph_path in graphs:  # full graphs of absolute ValueTypes are the same as normal graphs
+                        continue
+                    graphs[graph_path] = input_hash
+
+                    if not self.force and manifest.is_up_to_date(graph_path, input_hash, value_type, full, median):
+                        up_to_date += 1
+                        continue
+                    units.append((file_path, value_type, full, median))
+
+        print_log(f"{up_to_date} graphs are up-to-date, generating {len(units)} graphs.")
+
+        if self.jobs > 1:
+            chunk_size = max(1, len(units) // (self.jobs * 4))
+            with ProcessPoolExecutor(max_workers=self.jobs, initializer=initialize_graph_worker) as executor:
+                results = executor.map(generate_graph_unit, units, chunksize=chunk_size)
+                self.__report_progress(units, results, manifest, graphs)
         else:
-            raise ValueError
+            self.__report_progress(units, map(generate_graph_unit, units), manifest, graphs)
+
         print_log("Graphs generated.")
+
+    def __get_file_paths(self) -> list:
+        """
+        Returns the paths of all data files, sorted by name. Other files in a directory are ignored.
+        :return: list of file paths
+        """
+        if os.path.isfile(self.path):
+            return [self.path]
+
+        if not os.path.isdir(self.path):
+            raise ValueError
+
+        extensions = data_file_extensions + (columnar_extension,)
+        return [
+            os.path.join(self.path, file_name)
+            for file_name in sorted(os.listdir(self.path))
+            if os.path.splitext(file_name)[1] in extensions
+        ]
+
+    @staticmethod
+    def __report_progress(units, results, manifest, graphs):
+        """
+        Waits for all graphs, prints the progress and records the generated and skipped graphs in the manifest. Failed
+        graphs are not recorded, so they are generated again next time. The manifest is also written if the generation
+        is interrupted, so finished graphs are not generated again.
+        :param units: list of the generated units
+        :param results: iterator of the results of generate_graph_unit, in the same order as the units
+        :param manifest: GraphManifest to record the graphs in
+        :param graphs: dictionary of the graph paths and the hashes of their input files
+        """
+        try:
+            for i, (unit, result) in enumerate(zip(units, results), start=1):
+                file_path, value_type, full, median = unit
+                if result is False:
+                    print_log(f"Failed graph {i}/{len(units)}.")
+                    continue
+                graph_path = get_graph_path(file_path, value_type, full, median)
+                manifest.add(graph_path, graphs[graph_path], value_type, full, median, skipped=result is None)
+                print_log(f"Generated graph {i}/{len(units)}.")
+        finally:
+            manifest.write()
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os.path
+from pathlib import Path
+
+from src.messages import *
+
+manifest_path = os.path.join("data_graphs", "manifest.json")
+
+
+class GraphManifest:
+    """
+    Records for every generated graph the hash of the input file, the ValueType with its outlier filter, the full and
+    median booleans and the renderer version. Graphs whose record matches are up-to-date and do not have to be
+    generated again. Hashes of input files are reused as long as size and modification time of the file did not change.
+    """
+
+    def __init__(self, renderer_version: int, path=manifest_path) -> None:
+        """
+        Loads the manifest file if it exists. An unreadable manifest is ignored, so all graphs are generated again.
+        :param renderer_version: version of the graph generation, graphs of other versions are outdated
+        :param path: path of the manifest file
+        """
+        self.renderer_version = renderer_version
+        self.path = path
+        self.inputs = {}  # maps the input path to its size, modification time and hash
+        self.graphs = {}  # maps the graph path to the parameters it was generated with
+
+        if not os.path.isfile(path):
+            return
+
+        try:
+            with open(path) as file:
+                manifest = json.load(file)
+            self.inputs = manifest["inputs"]
+            self.graphs = manifest["graphs"]
+        except Exception as err:
+            print_warn(f"Ignoring unreadable manifest {path}: {err=}")
+            self.inputs, self.graphs = {}, {}
+
+    def get_input_hash(self, file_path) -> str:
+        """
+        Returns the SHA-256 hash of the input file. Reads the file only if it changed since the hash was calculated.
+        :param file_path: path of the input file
+        :return: hash as hexadecimal string
+        """
+        stat = os.stat(file_path)
+        key = os.path.abspath(file_path)
+        known = self.inputs.get(key)
+
+        if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+            return known["hash"]
+
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+
+        self.inputs[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest.hexdigest()}
+        return digest.hexdigest()
+
+    def is_up_to_date(self, graph_path, input_hash, value_type, full: bool, median: bool) -> bool:
+        """
+        Checks if a graph was generated with the same parameters. Graphs that were skipped (since the file has no
+        values for the ValueType) are up-to-date without existing.
+        :param graph_path: path of the graph
+        :param input_hash: hash of the input file
+        :param value_type: ValueType of the graph
+        :param full: True if y-limit is 0 to 100 percent for relative ValueType, False for detailed scope
+        :param median: True for min-max-median graphs, False for normal graphs
+        :return: True if the graph does not have to be generated again, False otherwise
+        """
+        record = self.graphs.get(graph_path)
+
+        return (
+                record == self.__get_record(input_hash, value_type, full, median, record and record["skipped"])
+                and (record["skipped"] or os.path.isfile(graph_path))
+        )
+
+    def add(self, graph_path, input_hash, value_type, full: bool, median: bool, skipped: bool) -> None:
+        """
+        Records the parameters a graph was generated with.
+        :param graph_path: path of the graph
+        :param input_hash: hash of the input file
+        :param value_type: ValueType of the graph
+        :param full: True if y-limit is 0 to 100 percent for relative ValueType, False for detailed scope
+        :param median: True for min-max-median graphs, False for normal graphs
+        :param skipped: True if no graph was generated, since the file has no values for the ValueType
+        """
+        self.graphs[graph_path] = self.__get_record(input_hash, value_type, full, median, skipped)
+
+    def write(self) -> None:
+        """
+        Writes the manifest file. Replaces the old file at once, so an interrupted write does not leave a broken file.
+        """
+        Path(os.path.dirname(self.path)).mkdir(parents=True, exist_ok=True)
+
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump({"inputs": self.inputs, "graphs": self.graphs}, indent=2, sort_keys=True, fp=file)
+        os.replace(temporary_path, self.path)
+
+    def __get_record(self, input_hash, value_type, full: bool, median: bool, skipped: bool) -> dict:
+        """
+        :return: dictionary of all parameters a graph depends on
+        """
+        outlier_filter = value_type.get_outlier_filter(value_type)
+
+        return {
+            "input_hash": input_hash,
+            "value_type": value_type.__name__,
+            "outlier_filter": outlier_filter.get_description() if outlier_filter else None,
+            "full": full,
+            "median": median,
+            "renderer_version": self.renderer_version,
+            "skipped": bool(skipped),
+        }
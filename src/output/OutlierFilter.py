@@ -0,0 +1,95 @@
+import numpy as np
+
+
+class OutlierFilter:
+    """
+    Base class for filters that correct measurement errors in a series of values, like single polls with impossible
+    packet rates. Filters work on whole NumPy arrays in one pass and return which samples were corrected, so graphs can
+    mark them. The given values stay unchanged.
+    """
+
+    def apply(self, values):
+        """
+        Corrects the outliers in the values. Base implementation raises NotImplementedError.
+        :param values: array of values in the order of the polls
+        :return: tuple of the array of corrected values and a boolean array marking the corrected samples
+        """
+        raise NotImplementedError
+
+    def get_description(self) -> str:
+        """
+        Returns a short description of the filter and its thresholds, used to tell apart graphs generated with
+        different filters. Base implementation raises NotImplementedError.
+        """
+        raise NotImplementedError
+
+
+class RateOutlierFilter(OutlierFilter):
+    """
+    Filter for rates, like packets per second. Rates above the maximum or below 0 are replaced with 0.
+    """
+
+    def __init__(self, max_value=100000) -> None:
+        """
+        :param max_value: largest possible rate, larger rates are outliers
+        """
+        self.max_value = max_value
+
+    def apply(self, values):
+        """
+        Replaces all rates above the maximum or below 0 with 0.
+        :param values: array of rates
+        :return: tuple of the array of corrected rates and a boolean array marking the corrected samples
+        """
+        values = np.asarray(values)
+        corrected = (values > self.max_value) | (values < 0)
+
+        return np.where(corrected, 0, values), corrected
+
+    def get_description(self) -> str:
+        """
+        :return: 'rate<={max_value}'
+        """
+        return f"rate<={self.max_value}"
+
+
+class CounterOutlierFilter(OutlierFilter):
+    """
+    Filter for cumulative counters, like the total number of received bytes. An increase by at least the maximum
+    between two polls is an outlier, just like a decrease (counters of a removed interface are missing from the sum).
+    Both are replaced by an increase of 0, all other increases are added up again starting from the first value. This
+    way a single wrong poll and a permanent jump of the counter are both removed.
+    """
+
+    def __init__(self, max_increase=1000000) -> None:
+        """
+        :param max_increase: smallest increase between two polls that is an outlier
+        """
+        self.max_increase = max_increase
+
+    def apply(self, values):
+        """
+        Replaces outlying increases with an increase of 0 and accumulates the remaining increases.
+        :param values: array of counter values
+        :return: tuple of the array of corrected counter values and a boolean array marking the samples whose increase
+        was replaced
+        """
+        values = np.asarray(values)
+        if not len(values):
+            return values.copy(), np.zeros(0, dtype=bool)
+
+        increases = np.diff(values)
+        outliers = (increases >= self.max_increase) | (increases < 0)
+
+        result = np.empty_like(values)
+        result[0] = values[0]
+        np.cumsum(np.where(outliers, 0, increases), out=result[1:])
+        result[1:] += values[0]
+
+        return result, np.concatenate(([False], outliers))
+
+    def get_description(self) -> str:
+        """
+        :return: 'counter<{max_increase}'
+        """
+        return f"counter<{self.max_increase}"
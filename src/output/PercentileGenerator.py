@@ -0,0 +1,63 @@
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.ticker import FixedLocator, NullLocator
+
+from src.messages import *
+
+spectrum_percentiles = (0, 50, 75, 90, 95, 99, 99.5, 99.9, 99.95, 99.99, 99.999)
+
+
+class PercentileGenerator:
+    """
+    Plots the percentile spectrum of latency histograms, one curve per VPN: the latency over the percentile, with the
+    percentiles on a scale of nines (the distance between 90, 99 and 99.9 is the same), so the tail can be compared.
+    """
+
+    def __init__(self, histograms: dict, title: str = "") -> None:
+        """
+        :param histograms: dictionary of the VPNs and their LatencyHistogram
+        :param title: title for the figure as string
+        """
+        self.histograms = histograms
+        self.title = title
+
+    def plot_graph(self) -> Figure:
+        """
+        Plots the curves of all histograms with at least one latency, and the legend.
+        :return: figure containing the graph
+        """
+        print_log("Plotting percentile spectrum...")
+        figure = Figure()
+        axes = figure.add_subplot()
+
+        for vpn, histogram in sorted(self.histograms.items()):
+            if not histogram.count:
+                continue
+            # no percentile closer to 100 than a single latency can resolve
+            percentiles = [p for p in spectrum_percentiles if 100 - p >= 100 / histogram.count] or [0]
+            latencies = [histogram.get_percentile(p) for p in percentiles]
+            axes.plot(self.__to_nines(percentiles), latencies, marker=".", label=f"{vpn} ({histogram.count})")
+
+        axes.xaxis.set_major_locator(FixedLocator(self.__to_nines(spectrum_percentiles)))
+        axes.xaxis.set_minor_locator(NullLocator())
+        axes.set_xticklabels([f"{p:g}" for p in spectrum_percentiles], rotation=45, fontsize=8)
+        axes.set_yscale("log")
+        axes.grid(True, "both")
+        axes.set_xlabel("percentile")
+        axes.set_ylabel("latency [s]")
+        if self.histograms:
+            axes.legend(loc="upper left", fontsize=8)
+        if self.title:
+            axes.set_title(self.title, fontweight="bold", fontsize=9)
+        figure.tight_layout()
+
+        print_log("Percentile spectrum plotted.")
+        return figure
+
+    @staticmethod
+    def __to_nines(percentiles):
+        """
+        :param percentiles: percentiles between 0 and 100 (exclusive)
+        :return: array of the number of nines of the percentiles, like 2 for 99
+        """
+        return -np.log10(1 - np.asarray(percentiles, dtype=float) / 100)
@@ -1,50 +1,67 @@
-import dateutil.parser
-import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.figure import Figure
 
 from src.messages import *
+from src.output.BinnedStatistics import *
 
 
 class PlotGenerator:
     """
-    Plots a graph from given data.
+    Plots a graph from given data. Every instance draws into its own figure instead of the global pyplot state, so
+    graphs can be plotted in parallel processes.
     """
 
-    def __init__(self, value_type, timestamps: list, values: list, full: bool, median: bool, title: str = "") -> None:
+    def __init__(self, value_type, offsets, values, full: bool, median: bool, title: str = "", corrected=None,
+                 number_bins=8, bin_duration=None) -> None:
         """
-        Checks if timestamps and values are consistent regarding number of entries. Sets all parameters from arguments.
+        Checks if offsets and values are consistent regarding number of entries. Sets all parameters from arguments.
         :param value_type: ValueType to plot the graph for
-        :param timestamps: timestamps to be used for the x-axis
+        :param offsets: time offsets in seconds from the start of the run, used for the x-axis
         :param values: values to be used for the graph
         :param full: True if y-limit is 0 to 100 percent for relative ValueType, False for detailed scope
         :param median: True if min-max-median graph should be plotted, False for normal graphs
         :param title: title for the figure as string
+        :param corrected: boolean array marking the values corrected by the outlier filter, marked in normal graphs
+        :param number_bins: number of time intervals of min-max-median graphs, 8 by default
+        :param bin_duration: duration of the time intervals of min-max-median graphs in seconds, used instead of the
+        number of intervals if given
         """
-        if not len(timestamps) == len(values):
+        if not len(offsets) == len(values):
             raise ValueError
 
         self.value_instance = value_type(values, full, median)
-        self.timestamps = timestamps
+        self.offsets = np.asarray(offsets, dtype=float)
         self.values = values
         self.full = full
         self.median = median
         self.title = title
+        self.corrected = np.zeros(len(values), dtype=bool) if corrected is None else np.asarray(corrected, dtype=bool)
+        self.number_bins = number_bins
+        self.bin_duration = bin_duration
 
-    def plot_graph(self):
+        self.figure = Figure()
+        self.axes = self.figure.add_subplot()
+
+    def plot_graph(self) -> Figure:
         """
         Prepares plotting by setting basic settings, labels, limits and title. Calls plot method, also prints log
         messages.
+        :return: figure containing the graph
         """
         print_log("Plotting graph...")
 
         values = self.value_instance.get_adjusted_values()
-        max_timestamp = max(self.__get_timestamps_as_absolute_difference())
+        max_timestamp = float(self.offsets.max())
 
         self.__adjust_basic_plot_settings()
 
-        # only median x-label needs interval_length argument
+        # only median x-label needs interval_length argument, the statistics are calculated once for label and plot
+        statistics = None
         if self.median:
-            _, interval_length = self.__partition_data(values)
-            self.__set_x_label(self.value_instance.get_x_label(interval_length))
+            statistics = get_binned_statistics(
+                self.offsets, values, self.number_bins, self.bin_duration, percentiles=(25, 75)
+            )
+            self.__set_x_label(self.value_instance.get_x_label(statistics["bin_length"]))
         else:
             self.__set_x_label(self.value_instance.get_x_label())
 
@@ -58,117 +75,105 @@ class PlotGenerator:
         if self.title:
             self.__set_title()
 
-        self.__plot(values)
+        self.__plot(values, statistics)
         print_log("Graph plotted.")
 
-    def __plot(self, values):
+        return self.figure
+
+    def __plot(self, values, statistics=None):
         """
         Plots the data. Distinguishes between min-max-median graphs and normal graphs.
         :param values: values to plot
+        :param statistics: binned statistics of the values, only used for min-max-median graphs
         """
         if self.median:
-            partitioned_data, _ = self.__partition_data(values)
-            plt.boxplot(
-                partitioned_data,
+            self.axes.bxp(
+                self.__get_box_statistics(statistics),
                 showfliers=True,
                 flierprops=dict(marker="x", markeredgecolor="lightgrey"),
                 medianprops=dict(color="blue", linewidth=1.5),
             )
             return
 
-        timestamps = self.__get_timestamps_as_absolute_difference()
-        plt.plot(timestamps, values)
+        self.axes.plot(self.offsets, values)
 
-    def __get_timestamps_as_absolute_difference(self) -> list[float]:
-        """
-        Return the timestamps as absolute differences from the initial time.
-        :return: list of absolute timestamps as floats starting from 0.0
-        """
-        timestamps = [0.0]
-        initial_time = dateutil.parser.isoparse(self.timestamps[0])
-
-        for i in range(1, len(self.timestamps)):
-            cur_time = dateutil.parser.isoparse(self.timestamps[i])
-            timestamps.append((cur_time - initial_time).total_seconds())
-
-        return timestamps
+        if self.corrected.any():
+            self.axes.plot(
+                self.offsets[self.corrected],
+                np.asarray(values)[self.corrected],
+                linestyle="none",
+                marker="x",
+                color="red",
+                label="corrected outlier",
+            )
+            self.axes.legend(loc="upper left", fontsize=8)
 
-    @staticmethod
-    def __adjust_basic_plot_settings():
+    def __adjust_basic_plot_settings(self):
         """
         Sets the basic settings for the plot environment.
         """
-        plt.grid(True, "both", "y")  # turn on y-axis grid
-        plt.minorticks_on()  # turn on ticks
+        self.axes.grid(True, "both", "y")  # turn on y-axis grid
+        self.axes.minorticks_on()  # turn on ticks
 
-    def __partition_data(self, initial_data, number_blocks=8):
+    @staticmethod
+    def __get_box_statistics(statistics) -> list:
         """
-        Partitions the data into multiple blocks. Used only for min-max-median graphs.
-        :param initial_data: data before separation into blocks
-        :param number_blocks: number of blocks, 8 by default
+        Converts binned statistics into the statistics drawn by a boxplot, so the percentiles do not have to be
+        calculated again. The whiskers reach the most extreme values within 1.5 times the interquartile range, all
+        other values are drawn as fliers, the same as a boxplot of the values would.
+        :param statistics: binned statistics with the 25th and 75th percentile
+        :return: list of dictionaries, one per bin
         """
+        boxes = []
 
-        def calculate_block_number():
-            """
-            Calculates in which block a value with its timestamp belongs.
-            :return:
-            """
-            result = int((time_value * number_blocks) // full_time)
-
-            if result == number_blocks:  # the last value should be part of the last block
-                return number_blocks - 1
-
-            return result
-
-        resulting_data = []  # has number_blocks many empty data blocks
-        for _ in range(number_blocks):
-            resulting_data.append([])  # appends number_block empty lists
+        for i, group in enumerate(statistics["groups"]):
+            q1 = statistics["percentiles"][25][i]
+            q3 = statistics["percentiles"][75][i]
+            box = {"med": statistics["median"][i], "q1": q1, "q3": q3, "whislo": np.nan, "whishi": np.nan, "fliers": []}
 
-        timestamps = self.__get_timestamps_as_absolute_difference()
-        full_time = max(timestamps)
-        interval_length = full_time / number_blocks
+            if len(group):
+                iqr = q3 - q1
+                low = np.searchsorted(group, q1 - 1.5 * iqr, side="left")
+                high = np.searchsorted(group, q3 + 1.5 * iqr, side="right")
+                box["whislo"] = min(group[low], q1)
+                box["whishi"] = max(group[high - 1], q3)
+                box["fliers"] = np.concatenate((group[:low], group[high:]))
 
-        for i in range(len(initial_data)):
-            time_value = timestamps[i]
-            resulting_data[calculate_block_number()].append(initial_data[i])
+            boxes.append(box)
 
-        return resulting_data, interval_length
+        return boxes
 
     def __set_title(self):
         """
         Sets the title of the plot.
         """
-        plt.title(self.title, fontweight="bold", fontsize=9)
+        self.axes.set_title(self.title, fontweight="bold", fontsize=9)
 
-    @staticmethod
-    def __set_x_label(text):
+    def __set_x_label(self, text):
         """
         Sets the x-label of the plot to text.
         :param text: x-label text
         """
-        plt.xlabel(text)
+        self.axes.set_xlabel(text)
 
-    @staticmethod
-    def __set_y_label(text):
+    def __set_y_label(self, text):
         """
         Sets the y-label of the plot to text.
         :param text: y-label text
         """
-        plt.ylabel(text)
+        self.axes.set_ylabel(text)
 
-    @staticmethod
-    def __set_x_limit(limits: list):
+    def __set_x_limit(self, limits: list):
         """
         Sets the x-limit of the plot to the two values given in limits.
         :param limits: list of the two x-limits (min- and max-limit)
         """
-        plt.xlim(limits)
+        self.axes.set_xlim(limits)
 
-    @staticmethod
-    def __set_y_limit(limits: list):
+    def __set_y_limit(self, limits: list):
         """
         Sets the y-limit of the plot to the two values given in limits if not both are 0.
         :param limits: list of the two y-limits (min- and max-limit)
         """
         if limits:
-            plt.ylim(limits)
+            self.axes.set_ylim(limits)
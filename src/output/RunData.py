@@ -0,0 +1,115 @@
+import os.path
+
+from src.output.ColumnarData import *
+
+
+class RunData:
+    """
+    Holds the data of one run, loaded from a JSON, NDJSON or columnar data file. The file is parsed and validated only
+    once, the timestamps are converted to offsets in seconds from the first poll. All arrays are read-only, so they can
+    be handed to every graph without being copied. Adjustments like the outlier correction have to work on copies.
+    """
+
+    def __init__(self, file_path) -> None:
+        """
+        Loads the file and prepares the time offsets.
+        :param file_path: path of the data file
+        :return: raises FileNotFoundError for unknown file types, KeyError or ValueError if the data has an incorrect
+        format
+        """
+        extension = os.path.splitext(file_path)[1]
+        if extension == columnar_extension:
+            columns = load_columnar(file_path)
+        elif extension in data_file_extensions:
+            columns = read_columns(file_path)
+        else:
+            raise FileNotFoundError
+
+        self.times = self.__freeze(columns["time"])
+        self.offsets = self.__freeze((self.times - self.times[0]) / np.timedelta64(1, "s"))
+        self.full_time = float(self.offsets.max())
+        self.names = self.__freeze(columns["names"])
+        self.name_indices = self.__freeze(columns["name"])
+
+        self.columns = {}
+        for column_name in get_value_columns(columns):
+            self.columns[column_name] = self.__freeze(columns[column_name])
+        self.texts = {}  # maps the column name of text values to the indices of the polls having them and the values
+        for column_name in get_text_columns(columns):
+            self.texts[column_name] = (
+                self.__freeze(columns[f"{column_name}{text_rows_suffix}"]),
+                self.__freeze(columns[f"{column_name}{text_values_suffix}"]),
+            )
+
+        self.series = {}  # cache of the series without missing values
+
+    def has_series(self, category, name) -> bool:
+        """
+        :param category: category of the value, like 'hardware'
+        :param name: name of the value, like 'cpu_percent'
+        :return: True if the file contains at least one value, False otherwise
+        """
+        return len(self.get_series(category, name)[0]) > 0
+
+    def get_series(self, category, name):
+        """
+        Returns the values of one value type together with their time offsets. Polls without the value are left out.
+        :param category: category of the value, like 'hardware'
+        :param name: name of the value, like 'cpu_percent'
+        :return: tuple of read-only arrays of time offsets in seconds and values, both empty if the value is unknown
+        """
+        column_name = f"{category}/{name}"
+
+        if column_name not in self.series:
+            values = self.columns.get(column_name)
+
+            if values is None:
+                self.series[column_name] = (self.__freeze(np.empty(0)), self.__freeze(np.empty(0)))
+            elif values.dtype.kind == "f" and np.isnan(values).any():
+                present = ~np.isnan(values)
+                self.series[column_name] = (self.__freeze(self.offsets[present]), self.__freeze(values[present]))
+            else:
+                self.series[column_name] = (self.offsets, values)
+
+        return self.series[column_name]
+
+    def get_records(self, category):
+        """
+        Returns all values of a category of records (like the phases of opening the VPN) for the entries containing at
+        least one of them, so values of the same record stay together. Text values (like the buckets of a latency
+        histogram) are returned as object arrays of strings.
+        :param category: category of the records, like 'open_spans'
+        :return: tuple of the array of time offsets in seconds and a dictionary of the value names and their arrays
+        (NaN if a record misses a number, None if it misses a text), both empty if the category is unknown
+        """
+        prefix = f"{category}/"
+        columns = {
+            column_name[len(prefix):]: values.astype(float)
+            for column_name, values in self.columns.items() if column_name.startswith(prefix)
+        }
+
+        present = np.zeros(len(self.offsets), dtype=bool)
+        for values in columns.values():
+            present |= ~np.isnan(values)
+
+        for column_name, (rows, texts) in self.texts.items():
+            if column_name.startswith(prefix):
+                values = np.full(len(self.offsets), None, dtype=object)
+                values[rows] = texts
+                columns[column_name[len(prefix):]] = values
+                present[rows] = True
+
+        if not columns:
+            return np.empty(0), {}
+
+        return self.offsets[present], {name: values[present] for name, values in columns.items()}
+
+    @staticmethod
+    def __freeze(values):
+        """
+        Makes an array read-only.
+        :param values: NumPy array
+        :return: the same array, read-only
+        """
+        values.flags.writeable = False
+        return values
@@ -0,0 +1,56 @@
+import numpy as np
+from matplotlib.figure import Figure
+
+from src.messages import *
+
+
+class SweepGenerator:
+    """
+    Plots a value measured per payload size (like the goodput of a transfer) over the payload sizes, one curve per VPN,
+    so the VPNs can be compared. Every point is the median of all transfers of a size. The maximum segment size of
+    every VPN is marked, since the value usually changes there, when a payload needs one more packet.
+    """
+
+    def __init__(self, curves: dict, segment_sizes: dict, y_label: str, title: str = "") -> None:
+        """
+        :param curves: dictionary of the VPNs and tuples of the arrays of sizes and values per transfer
+        :param segment_sizes: dictionary of the VPNs and their maximum segment size, missing for unknown ones
+        :param y_label: y-label for the figure as string
+        :param title: title for the figure as string
+        """
+        self.curves = curves
+        self.segment_sizes = segment_sizes
+        self.y_label = y_label
+        self.title = title
+
+    def plot_graph(self) -> Figure:
+        """
+        Plots the curves with logarithmic sizes, the marks of the maximum segment sizes and the legend.
+        :return: figure containing the graph
+        """
+        print_log("Plotting sweep...")
+        figure = Figure()
+        axes = figure.add_subplot()
+
+        for vpn, (sizes, values) in sorted(self.curves.items()):
+            unique_sizes = np.unique(sizes)
+            medians = [np.median(values[sizes == size]) for size in unique_sizes]
+            line, = axes.plot(unique_sizes, medians, marker=".", label=vpn)
+
+            if vpn in self.segment_sizes:
+                axes.axvline(
+                    self.segment_sizes[vpn], color=line.get_color(), linestyle="--", linewidth=1,
+                    label=f"MSS {vpn} = {self.segment_sizes[vpn]} B",
+                )
+
+        axes.set_xscale("log", base=2)
+        axes.grid(True, "both")
+        axes.set_xlabel("payload size [B]")
+        axes.set_ylabel(self.y_label)
+        if self.curves:
+            axes.legend(loc="best", fontsize=8)
+        if self.title:
+            axes.set_title(self.title, fontweight="bold", fontsize=9)
+
+        print_log("Sweep plotted.")
+        return figure
@@ -1,4 +1,7 @@
+import numpy as np
+
 from src.messages import *
+from src.output.OutlierFilter import *
 
 
 def get_smallest_bytes_unit(n):
@@ -96,6 +99,14 @@ class ValueType:
         print_err("ValueType.get_y_limit(self): NOT IMPLEMENTED")
         raise NotImplementedError
 
+    def get_outlier_filter(self) -> OutlierFilter | None:
+        """
+        Returns the filter correcting measurement errors in the values before plotting. No filter is used in base
+        implementation.
+        :return: OutlierFilter or None
+        """
+        return None
+
     def get_adjusted_values(self) -> list:
         """
         If needed, can be used to adjust the values (e.g. to a different unit). Simply returns unchanged values in
@@ -209,52 +220,98 @@ class RAMPercent(RelativeValueType):
         return "RAM usage [%]"
 
 
-class RecvBytes(AbsoluteValueType):
+class MonitorCPUPercent(RelativeValueType):
     """
-    Implements the total amount of received bytes.
+    Implements the CPU usage of the monitoring itself in percent.
     """
 
     def get_name_string(self) -> str:
         """
-        :return: 'bytes_recv'
+        :return: 'monitor_cpu_percent'
         """
-        return "bytes_recv"
+        return "monitor_cpu_percent"
 
     def get_category_string(self) -> str:
         """
-        :return: 'network'
+        :return: 'hardware'
         """
-        return "network"
+        return "hardware"
 
     def get_description(self) -> str:
         """
-        :return: 'Total received bytes'
+        :return: 'Monitoring CPU usage'
         """
-        return "Total received bytes"
+        return "Monitoring CPU usage"
 
     def get_y_label(self) -> str:
         """
-        Calculates smallest unit and returns y-label.
-        :return: 'total bytes (received) [{unit}]'
+        :return: 'CPU usage of monitoring [%]'
         """
-        unit = get_smallest_bytes_unit(max(self.values))
-        return f"total bytes (received) [{unit}]"
+        return "CPU usage of monitoring [%]"
+
+
+class BytesValueType(AbsoluteValueType):
+    """
+    Implementation of absolute ValueTypes given as amount of bytes. Values are shown in the smallest readable unit.
+    """
 
     def get_adjusted_values(self) -> list:
         """
         Adjusts the values to fit to the calculated smallest unit.
         :return: list of adjusted values
         """
-        values = self.values.copy()
+        values = np.array(self.values, dtype=float)  # copy, the given values stay unchanged
 
-        while max(values) > 1024:
-            for v in range(len(values)):
-                values[v] = values[v] / 1024
+        while values.max() > 1024:
+            values /= 1024
 
         return values
 
+    def get_unit(self) -> str:
+        """
+        :return: smallest readable unit for the values, for example 'MiB'
+        """
+        return get_smallest_bytes_unit(max(self.values))
+
+
+class RecvBytes(BytesValueType):
+    """
+    Implements the total amount of received bytes.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'bytes_recv'
+        """
+        return "bytes_recv"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'network'
+        """
+        return "network"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Total received bytes'
+        """
+        return "Total received bytes"
+
+    def get_outlier_filter(self) -> OutlierFilter:
+        """
+        :return: CounterOutlierFilter with default threshold
+        """
+        return CounterOutlierFilter()
+
+    def get_y_label(self) -> str:
+        """
+        Calculates smallest unit and returns y-label.
+        :return: 'total bytes (received) [{unit}]'
+        """
+        return f"total bytes (received) [{self.get_unit()}]"
+
 
-class SentBytes(AbsoluteValueType):
+class SentBytes(BytesValueType):
     """
     Implements the total amount of sent bytes.
     """
@@ -277,26 +334,142 @@ class SentBytes(AbsoluteValueType):
         """
         return "Total sent bytes"
 
+    def get_outlier_filter(self) -> OutlierFilter:
+        """
+        :return: CounterOutlierFilter with default threshold
+        """
+        return CounterOutlierFilter()
+
     def get_y_label(self) -> str:
         """
         Calculates smallest unit and returns y-label.
         :return: 'total bytes (sent) [{unit}]'
         """
-        unit = get_smallest_bytes_unit(max(self.values))
-        return f"total bytes (sent) [{unit}]"
+        return f"total bytes (sent) [{self.get_unit()}]"
 
-    def get_adjusted_values(self) -> list:
+
+class TunnelRecvBytes(BytesValueType):
+    """
+    Implements the total amount of bytes received on the tunnel interface of the VPN.
+    """
+
+    def get_name_string(self) -> str:
         """
-        Adjusts the values to fit to the calculated smallest unit.
-        :return: list of adjusted values
+        :return: 'tunnel_bytes_recv'
         """
-        values = self.values.copy()
+        return "tunnel_bytes_recv"
 
-        while max(values) > 1024:
-            for v in range(len(values)):
-                values[v] = values[v] / 1024
+    def get_category_string(self) -> str:
+        """
+        :return: 'interfaces'
+        """
+        return "interfaces"
 
-        return values
+    def get_description(self) -> str:
+        """
+        :return: 'Received bytes (tunnel)'
+        """
+        return "Received bytes (tunnel)"
+
+    def get_y_label(self) -> str:
+        """
+        Calculates smallest unit and returns y-label.
+        :return: 'total bytes (received, tunnel) [{unit}]'
+        """
+        return f"total bytes (received, tunnel) [{self.get_unit()}]"
+
+
+class TunnelSentBytes(BytesValueType):
+    """
+    Implements the total amount of bytes sent on the tunnel interface of the VPN.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'tunnel_bytes_sent'
+        """
+        return "tunnel_bytes_sent"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'interfaces'
+        """
+        return "interfaces"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Sent bytes (tunnel)'
+        """
+        return "Sent bytes (tunnel)"
+
+    def get_y_label(self) -> str:
+        """
+        Calculates smallest unit and returns y-label.
+        :return: 'total bytes (sent, tunnel) [{unit}]'
+        """
+        return f"total bytes (sent, tunnel) [{self.get_unit()}]"
+
+
+class WireRecvBytes(BytesValueType):
+    """
+    Implements the total amount of bytes received on the physical interface, including the VPN's encapsulation.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'wire_bytes_recv'
+        """
+        return "wire_bytes_recv"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'interfaces'
+        """
+        return "interfaces"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Received bytes (wire)'
+        """
+        return "Received bytes (wire)"
+
+    def get_y_label(self) -> str:
+        """
+        Calculates smallest unit and returns y-label.
+        :return: 'total bytes (received, wire) [{unit}]'
+        """
+        return f"total bytes (received, wire) [{self.get_unit()}]"
+
+
+class WireSentBytes(BytesValueType):
+    """
+    Implements the total amount of bytes sent on the physical interface, including the VPN's encapsulation.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'wire_bytes_sent'
+        """
+        return "wire_bytes_sent"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'interfaces'
+        """
+        return "interfaces"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Sent bytes (wire)'
+        """
+        return "Sent bytes (wire)"
+
+    def get_y_label(self) -> str:
+        """
+        Calculates smallest unit and returns y-label.
+        :return: 'total bytes (sent, wire) [{unit}]'
+        """
+        return f"total bytes (sent, wire) [{self.get_unit()}]"
 
 
 class RecvPPS(AbsoluteValueType):
@@ -322,6 +495,12 @@ class RecvPPS(AbsoluteValueType):
         """
         return "Received PPS"
 
+    def get_outlier_filter(self) -> OutlierFilter:
+        """
+        :return: RateOutlierFilter with default threshold
+        """
+        return RateOutlierFilter()
+
     def get_y_label(self) -> str:
         """
         :return: 'packets per second (received)'
@@ -352,8 +531,1040 @@ class SentPPS(AbsoluteValueType):
         """
         return "Sent PPS"
 
+    def get_outlier_filter(self) -> OutlierFilter:
+        """
+        :return: RateOutlierFilter with default threshold
+        """
+        return RateOutlierFilter()
+
     def get_y_label(self) -> str:
         """
         :return: 'packets per second (sent)'
         """
         return "packets per second (sent)"
+
+
+class VPNCPUPercent(RelativeValueType):
+    """
+    Implements the CPU usage of the VPN's processes in percent, relative to all CPUs.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'vpn_cpu_percent'
+        """
+        return "vpn_cpu_percent"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'processes'
+        """
+        return "processes"
+
+    def get_description(self) -> str:
+        """
+        :return: 'VPN process CPU usage'
+        """
+        return "VPN process CPU usage"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'CPU usage of VPN processes [%]'
+        """
+        return "CPU usage of VPN processes [%]"
+
+
+class VPNCPUTime(AbsoluteValueType):
+    """
+    Implements the total CPU time used by the VPN's processes.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'vpn_cpu_time'
+        """
+        return "vpn_cpu_time"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'processes'
+        """
+        return "processes"
+
+    def get_description(self) -> str:
+        """
+        :return: 'VPN process CPU time'
+        """
+        return "VPN process CPU time"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'total CPU time of VPN processes [s]'
+        """
+        return "total CPU time of VPN processes [s]"
+
+
+class VPNMemory(BytesValueType):
+    """
+    Implements the resident memory of the VPN's processes.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'vpn_rss'
+        """
+        return "vpn_rss"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'processes'
+        """
+        return "processes"
+
+    def get_description(self) -> str:
+        """
+        :return: 'VPN process memory'
+        """
+        return "VPN process memory"
+
+    def get_y_label(self) -> str:
+        """
+        Calculates smallest unit and returns y-label.
+        :return: 'resident memory of VPN processes [{unit}]'
+        """
+        return f"resident memory of VPN processes [{self.get_unit()}]"
+
+
+class VPNContextSwitches(AbsoluteValueType):
+    """
+    Implements the total number of context switches of the VPN's processes.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'vpn_ctx_switches'
+        """
+        return "vpn_ctx_switches"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'processes'
+        """
+        return "processes"
+
+    def get_description(self) -> str:
+        """
+        :return: 'VPN process context switches'
+        """
+        return "VPN process context switches"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'total context switches of VPN processes'
+        """
+        return "total context switches of VPN processes"
+
+
+class VPNThreads(AbsoluteValueType):
+    """
+    Implements the number of threads of the VPN's processes.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'vpn_threads'
+        """
+        return "vpn_threads"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'processes'
+        """
+        return "processes"
+
+    def get_description(self) -> str:
+        """
+        :return: 'VPN process threads'
+        """
+        return "VPN process threads"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'threads of VPN processes'
+        """
+        return "threads of VPN processes"
+
+
+class VPNOpenTime(AbsoluteValueType):
+    """
+    Implements the time needed for opening the VPN, recorded once per opening.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'vpn_open'
+        """
+        return "vpn_open"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'timing'
+        """
+        return "timing"
+
+    def get_description(self) -> str:
+        """
+        :return: 'VPN setup time'
+        """
+        return "VPN setup time"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'time for opening the VPN [s]'
+        """
+        return "time for opening the VPN [s]"
+
+
+class VPNCloseTime(AbsoluteValueType):
+    """
+    Implements the time needed for closing the VPN, recorded once per closing.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'vpn_close'
+        """
+        return "vpn_close"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'timing'
+        """
+        return "timing"
+
+    def get_description(self) -> str:
+        """
+        :return: 'VPN teardown time'
+        """
+        return "VPN teardown time"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'time for closing the VPN [s]'
+        """
+        return "time for closing the VPN [s]"
+
+
+class ShutdownTime(AbsoluteValueType):
+    """
+    Implements the time the VPN daemon needed for ending after SIGTERM when the VPN was closed, including the wait
+    for a SIGKILL if it did not end in time.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'shutdown'
+        """
+        return "shutdown"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'timing'
+        """
+        return "timing"
+
+    def get_description(self) -> str:
+        """
+        :return: 'VPN daemon shutdown time'
+        """
+        return "VPN daemon shutdown time"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'time for stopping the daemon [s]'
+        """
+        return "time for stopping the daemon [s]"
+
+
+class HandshakeTime(AbsoluteValueType):
+    """
+    Implements the time from opening the VPN until the handshake with the other host was detected.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'handshake'
+        """
+        return "handshake"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'timing'
+        """
+        return "timing"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Time to handshake'
+        """
+        return "Time to handshake"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'time until handshake [s]'
+        """
+        return "time until handshake [s]"
+
+
+class ExchangeTime(AbsoluteValueType):
+    """
+    Implements the time of a single successful exchange, without opening and closing the VPN.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'exchange'
+        """
+        return "exchange"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'timing'
+        """
+        return "timing"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Exchange latency'
+        """
+        return "Exchange latency"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'time of exchange [s]'
+        """
+        return "time of exchange [s]"
+
+
+class LatencyValueType(AbsoluteValueType):
+    """
+    Implementation of latencies measured once per exchange (category 'exchange'), like the timers of libcurl. Besides
+    the graphs over time, their distribution is plotted as CDF and their course as scatter plot over the exchanges
+    (see DistributionGenerator).
+    """
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'exchange'
+        """
+        return "exchange"
+
+
+class ConnectTime(LatencyValueType):
+    """
+    Implements the time until the TCP connection of a request was established, 0 if an open connection was reused.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'connect'
+        """
+        return "connect"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Connect time'
+        """
+        return "Connect time"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'connect time [s]'
+        """
+        return "connect time [s]"
+
+
+class PretransferTime(LatencyValueType):
+    """
+    Implements the time until a request could be sent, including connecting.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'pretransfer'
+        """
+        return "pretransfer"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Pretransfer time'
+        """
+        return "Pretransfer time"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'pretransfer time [s]'
+        """
+        return "pretransfer time [s]"
+
+
+class StarttransferTime(LatencyValueType):
+    """
+    Implements the time until the first byte of the response arrived (time to first byte).
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'starttransfer'
+        """
+        return "starttransfer"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Time to first byte'
+        """
+        return "Time to first byte"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'time to first byte [s]'
+        """
+        return "time to first byte [s]"
+
+
+class TotalTime(LatencyValueType):
+    """
+    Implements the time until the response of a request was complete, as measured by libcurl.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'total'
+        """
+        return "total"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Request latency'
+        """
+        return "Request latency"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'request latency [s]'
+        """
+        return "request latency [s]"
+
+
+class FirstRequestTime(LatencyValueType):
+    """
+    Implements the latency of a request that opened a new connection through the tunnel, including the TCP handshake.
+    Only recorded by exchanges keeping their connection, like 'http-keepalive'.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'first_request'
+        """
+        return "first_request"
+
+    def get_description(self) -> str:
+        """
+        :return: 'First request latency'
+        """
+        return "First request latency"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'latency of the first request [s]'
+        """
+        return "latency of the first request [s]"
+
+
+class RequestTime(LatencyValueType):
+    """
+    Implements the latency of a request over a kept-alive connection, without TCP handshake. Only recorded by
+    exchanges keeping their connection, like 'http-keepalive'.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'request'
+        """
+        return "request"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Kept-alive request latency'
+        """
+        return "Kept-alive request latency"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'latency of the request [s]'
+        """
+        return "latency of the request [s]"
+
+
+class ExchangeRetries(AbsoluteValueType):
+    """
+    Implements the number of retries an exchange needed, for example until the server was listening.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'retries'
+        """
+        return "retries"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'exchange'
+        """
+        return "exchange"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Exchange retries'
+        """
+        return "Exchange retries"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'number of retries'
+        """
+        return "number of retries"
+
+
+class LoadMedianLatency(LatencyValueType):
+    """
+    Implements the median latency of the requests of one load phase, measured from the time a request was due to be
+    sent. Only recorded by 'http-load'.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'load_p50'
+        """
+        return "load_p50"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Load median latency'
+        """
+        return "Load median latency"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'median latency under load [s]'
+        """
+        return "median latency under load [s]"
+
+
+class LoadTailLatency(LatencyValueType):
+    """
+    Implements the 99th percentile of the latencies of the requests of one load phase, measured from the time a request
+    was due to be sent. Only recorded by 'http-load'.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'load_p99'
+        """
+        return "load_p99"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Load p99 latency'
+        """
+        return "Load p99 latency"
+
+    def get_y_label(self) -> str:
+        """
+        :return: '99th percentile of latency under load [s]'
+        """
+        return "99th percentile of latency under load [s]"
+
+
+class LoadRate(AbsoluteValueType):
+    """
+    Implements the rate of successful requests achieved in one load phase, lower than the target rate if the tunnel or
+    the server could not keep up. Only recorded by 'http-load'.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'load_rate'
+        """
+        return "load_rate"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'exchange'
+        """
+        return "exchange"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Load request rate'
+        """
+        return "Load request rate"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'successful requests per second'
+        """
+        return "successful requests per second"
+
+
+class ServerRequestRate(AbsoluteValueType):
+    """
+    Implements the number of requests per second answered by the server of the exchange, over the window of a poll.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'requests_per_second'
+        """
+        return "requests_per_second"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'counters'
+        """
+        return "counters"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Server request rate'
+        """
+        return "Server request rate"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'requests answered per second'
+        """
+        return "requests answered per second"
+
+
+class ServerServiceTime(AbsoluteValueType):
+    """
+    Implements the mean time the server of the exchange needed for answering a request, from reading the request line
+    until the response was sent, over the window of a poll.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'mean_service_time'
+        """
+        return "mean_service_time"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'counters'
+        """
+        return "counters"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Server service time'
+        """
+        return "Server service time"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'mean service time per request [s]'
+        """
+        return "mean service time per request [s]"
+
+
+class DownloadGoodput(AbsoluteValueType):
+    """
+    Implements the goodput of a transfer from the server to the client, the payload bytes over the time of the transfer.
+    Only recorded by 'bulk'.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'download_goodput'
+        """
+        return "download_goodput"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'exchange'
+        """
+        return "exchange"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Download goodput'
+        """
+        return "Download goodput"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'goodput of the download [Mbit/s]'
+        """
+        return "goodput of the download [Mbit/s]"
+
+
+class UploadGoodput(AbsoluteValueType):
+    """
+    Implements the goodput of a transfer from the client to the server, until the server acknowledged the last byte.
+    Only recorded by 'bulk'.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'upload_goodput'
+        """
+        return "upload_goodput"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'exchange'
+        """
+        return "exchange"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Upload goodput'
+        """
+        return "Upload goodput"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'goodput of the upload [Mbit/s]'
+        """
+        return "goodput of the upload [Mbit/s]"
+
+
+class RecvGoodput(AbsoluteValueType):
+    """
+    Implements the payload bytes received by the exchange in Mbit/s, over the window of a poll.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'goodput_recv'
+        """
+        return "goodput_recv"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'counters'
+        """
+        return "counters"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Received goodput'
+        """
+        return "Received goodput"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'received payload [Mbit/s]'
+        """
+        return "received payload [Mbit/s]"
+
+
+class SentGoodput(AbsoluteValueType):
+    """
+    Implements the payload bytes sent by the exchange in Mbit/s, over the window of a poll.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'goodput_sent'
+        """
+        return "goodput_sent"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'counters'
+        """
+        return "counters"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Sent goodput'
+        """
+        return "Sent goodput"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'sent payload [Mbit/s]'
+        """
+        return "sent payload [Mbit/s]"
+
+
+class UDPRoundTripTime(LatencyValueType):
+    """
+    Implements the median round-trip time of the datagrams of one burst. Only recorded by 'udp'.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'rtt_p50'
+        """
+        return "rtt_p50"
+
+    def get_description(self) -> str:
+        """
+        :return: 'UDP round-trip time'
+        """
+        return "UDP round-trip time"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'median round-trip time of datagrams [s]'
+        """
+        return "median round-trip time of datagrams [s]"
+
+
+class UDPForwardJitter(AbsoluteValueType):
+    """
+    Implements the jitter of the one-way delay from the client to the server during one burst, estimated like for
+    RTP (RFC 3550). Only recorded by 'udp'.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'jitter_forward'
+        """
+        return "jitter_forward"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'exchange'
+        """
+        return "exchange"
+
+    def get_description(self) -> str:
+        """
+        :return: 'UDP jitter client to server'
+        """
+        return "UDP jitter client to server"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'jitter client to server [s]'
+        """
+        return "jitter client to server [s]"
+
+
+class UDPReturnJitter(AbsoluteValueType):
+    """
+    Implements the jitter of the one-way delay from the server to the client during one burst, estimated like for
+    RTP (RFC 3550). Only recorded by 'udp'.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'jitter_return'
+        """
+        return "jitter_return"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'exchange'
+        """
+        return "exchange"
+
+    def get_description(self) -> str:
+        """
+        :return: 'UDP jitter server to client'
+        """
+        return "UDP jitter server to client"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'jitter server to client [s]'
+        """
+        return "jitter server to client [s]"
+
+
+class UDPLoss(AbsoluteValueType):
+    """
+    Implements the share of the datagrams of one burst without echo. Only recorded by 'udp'.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'udp_loss'
+        """
+        return "udp_loss"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'exchange'
+        """
+        return "exchange"
+
+    def get_description(self) -> str:
+        """
+        :return: 'UDP loss'
+        """
+        return "UDP loss"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'datagrams without echo [%]'
+        """
+        return "datagrams without echo [%]"
+
+
+class StreamGoodput(AbsoluteValueType):
+    """
+    Implements the goodput of all streams of one exchange, the payload bytes over the time of streaming. Only recorded
+    by 'tcp-stream'.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'stream_goodput'
+        """
+        return "stream_goodput"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'exchange'
+        """
+        return "exchange"
+
+    def get_description(self) -> str:
+        """
+        :return: 'Stream goodput'
+        """
+        return "Stream goodput"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'goodput of the streams [Mbit/s]'
+        """
+        return "goodput of the streams [Mbit/s]"
+
+
+class TCPRoundTripTime(AbsoluteValueType):
+    """
+    Implements the smoothed round-trip time of the running TCP streams as read from the kernel (TCP_INFO), the mean
+    over the streams at a poll. Only recorded by 'tcp-stream'.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'tcp_rtt'
+        """
+        return "tcp_rtt"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'counters'
+        """
+        return "counters"
+
+    def get_description(self) -> str:
+        """
+        :return: 'TCP round-trip time'
+        """
+        return "TCP round-trip time"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'round-trip time of the streams [s]'
+        """
+        return "round-trip time of the streams [s]"
+
+
+class TCPCongestionWindow(AbsoluteValueType):
+    """
+    Implements the sum of the congestion windows of the running TCP streams at a poll. Only recorded by 'tcp-stream'.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'tcp_cwnd'
+        """
+        return "tcp_cwnd"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'counters'
+        """
+        return "counters"
+
+    def get_description(self) -> str:
+        """
+        :return: 'TCP congestion window'
+        """
+        return "TCP congestion window"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'congestion window of the streams [segments]'
+        """
+        return "congestion window of the streams [segments]"
+
+
+class TCPRetransmitRate(AbsoluteValueType):
+    """
+    Implements the segments retransmitted by the TCP streams per second, over the window of a poll. Only recorded by
+    'tcp-stream'.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'retransmits_per_second'
+        """
+        return "retransmits_per_second"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'counters'
+        """
+        return "counters"
+
+    def get_description(self) -> str:
+        """
+        :return: 'TCP retransmissions'
+        """
+        return "TCP retransmissions"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'retransmitted segments [1/s]'
+        """
+        return "retransmitted segments [1/s]"
+
+
+class TCPDeliveryRate(AbsoluteValueType):
+    """
+    Implements the sum of the delivery rates of the running TCP streams as estimated by the kernel at a poll. Only
+    recorded by 'tcp-stream'.
+    """
+
+    def get_name_string(self) -> str:
+        """
+        :return: 'tcp_delivery_rate'
+        """
+        return "tcp_delivery_rate"
+
+    def get_category_string(self) -> str:
+        """
+        :return: 'counters'
+        """
+        return "counters"
+
+    def get_description(self) -> str:
+        """
+        :return: 'TCP delivery rate'
+        """
+        return "TCP delivery rate"
+
+    def get_y_label(self) -> str:
+        """
+        :return: 'delivery rate of the streams [Mbit/s]'
+        """
+        return "delivery rate of the streams [Mbit/s]"
@@ -0,0 +1,303 @@
+import ipaddress
+import os
+import re
+
+"""
+Contains the fixed commands of the VPN daemons. A daemon is started by the name of its command and the values of the
+parameters of the command, never by a free list of arguments, so nobody who can send requests to the privileged helper
+can add options of his own (like scripts run by 'openvpn'). Every parameter is checked by its own function: interfaces
+have to be the ones of the VPNs, ports, addresses and keys have to be valid, and files have to be in the key
+directories of the VPNs. OpenVPN configurations may only contain the directives of the configurations generated by the
+VPNs, with checked arguments.
+"""
+
+daemon_commands = {
+    "wg-set": (
+        "wg", "set", "{interface}", "listen-port", "{port}", "private-key", "{private_key}", "peer", "{public_key}",
+        "allowed-ips", "{allowed_ips}", "endpoint", "{endpoint}",
+    ),
+    "rp-exchange-server": (
+        "rp", "exchange", "{secret_key}", "dev", "{interface}", "listen", "{port}", "peer", "{peer_key}",
+        "allowed-ips", "{allowed_ips}",
+    ),
+    "rp-exchange-client": (
+        "rp", "exchange", "{secret_key}", "dev", "{interface}", "peer", "{peer_key}", "endpoint", "{endpoint}",
+        "allowed-ips", "{allowed_ips}",
+    ),
+    # given after the configuration, '--script-security 1' overrides it, so no script can be run
+    "openvpn": ("openvpn", "--config", "{config}", "--script-security", "1"),
+}
+key_directories = ("wg-keys", "rp-keys", "openvpn-keys", "openvpnstatic-keys")  # relative to the working directory
+vpn_interfaces = ("wg0", "rosenpass0", "tun0")  # interfaces created by the VPNs, the only ones that may be changed
+public_key_pattern = re.compile(r"^[A-Za-z0-9+/]{43}=$")
+host_name_pattern = re.compile(r"^[A-Za-z0-9][A-Za-z0-9.-]{0,252}$")
+
+
+def build_command(name, parameters) -> list:
+    """
+    Builds the arguments of a daemon from its fixed command, after checking every parameter.
+    :param name: name of the command, like 'wg-set'
+    :param parameters: dictionary of the names of the parameters of the command and their values
+    :return: list of the program name and its arguments, raises ValueError for unknown commands, missing, unknown or
+    invalid parameters
+    """
+    if name not in daemon_commands:
+        raise ValueError(f"command '{name}' is not allowed")
+
+    template = daemon_commands[name]
+    names = {argument[1:-1] for argument in template if argument.startswith("{")}
+    if not isinstance(parameters, dict) or set(parameters) != names:
+        raise ValueError(f"command '{name}' needs exactly the parameters {', '.join(sorted(names))}")
+
+    return [
+        parameter_checks[argument[1:-1]](parameters[argument[1:-1]]) if argument.startswith("{") else argument
+        for argument in template
+    ]
+
+
+def check_interface(interface) -> str:
+    """
+    Checks if an interface is one of the interfaces created by the VPNs, raises ValueError otherwise.
+    :param interface: name of the interface
+    :return: the name of the interface
+    """
+    if interface not in vpn_interfaces:
+        raise ValueError(f"interface '{interface}' is not one of the VPN interfaces ({', '.join(vpn_interfaces)})")
+    return interface
+
+
+def check_port(port) -> str:
+    """
+    Checks if a port number is valid, raises ValueError otherwise.
+    :param port: port number as number or string
+    :return: the port number as string
+    """
+    if isinstance(port, bool) or not str(port).isdigit() or not 1 <= int(port) <= 65535:
+        raise ValueError(f"invalid port '{port}'")
+    return str(int(port))
+
+
+def check_key_file(path) -> str:
+    """
+    Checks if a file is in one of the key directories of the VPNs (also after following symbolic links), raises
+    ValueError otherwise.
+    :param path: path of the file
+    :return: the path of the file
+    """
+    if not isinstance(path, str) or path.startswith("-") or not os.path.isfile(path):
+        raise ValueError(f"invalid file '{path}'")
+
+    real_path = os.path.realpath(path)
+    for directory in key_directories:
+        real_directory = os.path.realpath(directory)
+        if os.path.commonpath([real_path, real_directory]) == real_directory:
+            return path
+
+    raise ValueError(f"file '{path}' is not in a key directory ({', '.join(key_directories)})")
+
+
+def check_openvpn_config(path) -> str:
+    """
+    Checks if an OpenVPN configuration is in a key directory and only contains allowed directives with valid
+    arguments, raises ValueError otherwise.
+    :param path: path of the configuration
+    :return: the path of the configuration
+    """
+    read_openvpn_config(path)
+    return path
+
+
+def read_openvpn_config(path) -> str:
+    """
+    Reads an OpenVPN configuration from a key directory and checks every directive against the allow-list
+    openvpn_directives. The checked directives are written anew, one per line with their arguments separated by single
+    spaces, so OpenVPN reads exactly what was checked, no matter how it would have parsed the original file.
+    :param path: path of the configuration
+    :return: the checked configuration, raises ValueError for directives that are not allowed or invalid arguments
+    """
+    check_key_file(path)
+
+    with open(path, "rb") as file:
+        content = file.read()
+    if b"\0" in content:
+        raise ValueError(f"'{path}' is no text file")
+    if content.startswith(b"\xef\xbb\xbf"):  # byte order mark, skipped by OpenVPN as well
+        content = content[3:]
+
+    lines = []
+    for number, line in enumerate(content.split(b"\n"), start=1):
+        tokens = [token.decode() for token in parse_openvpn_line(line)]
+        if not tokens:
+            continue
+
+        directive = tokens[0][2:] if tokens[0].startswith("--") else tokens[0]
+        arguments = tokens[1:]
+        checks = [checks for checks in openvpn_directives.get(directive, ()) if len(checks) == len(arguments)]
+        if directive not in openvpn_directives:
+            raise ValueError(f"directive '{directive}' in line {number} of '{path}' is not allowed")
+        if not checks:
+            raise ValueError(f"wrong number of arguments of '{directive}' in line {number} of '{path}'")
+
+        line = " ".join([directive] + [check(argument) for check, argument in zip(checks[0], arguments)])
+        if not openvpn_line_pattern.match(line):
+            raise ValueError(f"invalid arguments of '{directive}' in line {number} of '{path}'")
+        lines.append(line)
+
+    return "".join(f"{line}\n" for line in lines)
+
+
+def parse_openvpn_line(line) -> list:
+    """
+    Splits a line of an OpenVPN configuration into its tokens the way OpenVPN does (parse_line() in options.c): tokens
+    are separated by whitespace and can be quoted with double quotes or single quotes, a backslash escapes the next
+    character outside of single quotes, and a token starting with '#' or ';' starts a comment.
+    :param line: line as bytes, without the line break
+    :return: list of the tokens as bytes, raises ValueError for a missing closing quote
+    """
+    whitespace = b" \t\n\v\f\r"
+    tokens = []
+    token = bytearray()
+    state = "between"  # between tokens, or reading an 'unquoted', 'double' or 'single' quoted token
+    backslash = False
+
+    for char in (line[i:i + 1] for i in range(len(line) + 1)):  # the empty byte string at the end ends the last token
+        if not backslash and char == b"\\" and state != "single":
+            backslash = True
+            continue
+
+        if state == "between":
+            if char and char not in whitespace:
+                if char in b"#;":
+                    break
+                if not backslash and char == b'"':
+                    state = "double"
+                elif not backslash and char == b"'":
+                    state = "single"
+                else:
+                    token += char
+                    state = "unquoted"
+        elif state == "unquoted" and (not char or (not backslash and char in whitespace)):
+            tokens.append(bytes(token))
+            token, state = bytearray(), "between"
+        elif (state == "double" and not backslash and char == b'"') or (state == "single" and char == b"'"):
+            tokens.append(bytes(token))
+            token, state = bytearray(), "between"
+        else:
+            token += char
+        backslash = False
+
+    if state in ("double", "single"):
+        raise ValueError("missing closing quote in an OpenVPN configuration")
+    return tokens
+
+
+def check_public_key(key) -> str:
+    """
+    Checks if a WireGuard public key (base64 of 32 bytes) is valid, raises ValueError otherwise.
+    :param key: public key
+    :return: the public key
+    """
+    if not isinstance(key, str) or not public_key_pattern.match(key):
+        raise ValueError("invalid public key")
+    return key
+
+
+def check_network(network) -> str:
+    """
+    Checks if a network (like '10.0.0.2/32') is valid, raises ValueError otherwise.
+    :param network: network in CIDR notation
+    :return: the network
+    """
+    ipaddress.ip_network(str(network))  # raises ValueError for invalid networks
+    return str(network)
+
+
+def check_address(address) -> str:
+    """
+    Checks if an IPv4 or IPv6 address is valid, raises ValueError otherwise.
+    :param address: address
+    :return: the address
+    """
+    ipaddress.ip_address(str(address))  # raises ValueError for invalid addresses
+    return str(address)
+
+
+def check_host(host) -> str:
+    """
+    Checks if a host (address or host name, IPv6 addresses optionally in brackets) is valid, raises ValueError
+    otherwise.
+    :param host: host
+    :return: the host
+    """
+    host = str(host)
+    try:
+        ipaddress.ip_address(host[1:-1] if host.startswith("[") and host.endswith("]") else host)
+    except ValueError:
+        if not host_name_pattern.match(host):
+            raise ValueError(f"invalid host '{host}'")
+
+    return host
+
+
+def check_endpoint(endpoint) -> str:
+    """
+    Checks if an endpoint (address or host name and port, like '192.168.0.1:51820') is valid, raises ValueError
+    otherwise.
+    :param endpoint: endpoint
+    :return: the endpoint
+    """
+    host, _, port = str(endpoint).rpartition(":")
+    check_port(port)
+    check_host(host)
+
+    return str(endpoint)
+
+
+def check_choice(*values):
+    """
+    :param values: allowed values
+    :return: function checking if a value is one of the allowed values, raises ValueError otherwise
+    """
+    def check(value) -> str:
+        if value not in values:
+            raise ValueError(f"'{value}' is not one of {', '.join(values)}")
+        return value
+
+    return check
+
+
+parameter_checks = {
+    "interface": check_interface,
+    "port": check_port,
+    "private_key": check_key_file,
+    "secret_key": check_key_file,
+    "peer_key": check_key_file,
+    "public_key": check_public_key,
+    "allowed_ips": check_network,
+    "endpoint": check_endpoint,
+    "config": check_openvpn_config,
+}
+# directives of the OpenVPN configurations generated by the VPNs, with the checks of their arguments (one tuple per
+# allowed number of arguments)
+openvpn_directives = {
+    "ca": ((check_key_file,),),
+    "cert": ((check_key_file,),),
+    "cipher": ((check_choice("AES-256-CBC"),),),
+    "client": ((),),
+    "dev": ((check_choice("tun"),),),
+    "dh": ((check_key_file,),),
+    "ifconfig": ((check_address, check_address),),
+    "key": ((check_key_file,),),
+    "nobind": ((),),
+    "persist-tun": ((),),
+    "port": ((check_port,),),
+    "proto": ((check_choice("udp"),),),
+    "remote": ((check_host,), (check_host, check_port)),
+    "remote-cert-tls": ((check_choice("server"),),),
+    "resolv-retry": ((check_choice("infinite"),),),
+    "secret": ((check_key_file,),),
+    "server": ((check_address, check_address),),
+    "topology": ((check_choice("subnet"),),),
+}
+# checked directives as written for OpenVPN: no quotes, escapes or comments, shorter than OpenVPN's line limit of 256
+openvpn_line_pattern = re.compile(r"^[A-Za-z0-9_.:/ -]{1,255}$")
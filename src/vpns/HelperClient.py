@@ -0,0 +1,330 @@
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import src.messages as messages
+
+"""
+Contains the client of the privileged helper (see src/vpns/PrivilegedHelper.py) and the functions for starting and
+stopping the helper once per run. The VPNs get the running helper with get_helper().
+"""
+
+max_message_size = 65536
+helper = None  # running HelperClient, None if no helper was started
+
+
+class HelperError(Exception):
+    """
+    Raised if the privileged helper rejected or failed a request.
+    """
+
+
+class HelperClient:
+    """
+    Sends requests to the privileged helper. Offers the same methods as NetworkConfig, so the VPNs can use either of
+    them for configuring interfaces. Requests of several threads are sent one after another.
+    """
+
+    def __init__(self, socket_path, process=None, directory=None) -> None:
+        """
+        Connects to the helper.
+        :param socket_path: path of the Unix socket of the helper
+        :param process: process of the helper, waited for when closing
+        :param directory: private directory of the socket, removed when closing
+        """
+        self.process = process
+        self.directory = directory
+        self.changes = None  # changes of the running batch, None if no batch is running
+        self.lock = threading.Lock()
+
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        self.socket.connect(socket_path)
+
+    def request(self, operation, **arguments):
+        """
+        Sends a request and waits for the response.
+        :param operation: name of the operation, has to be on the allow-list of the helper
+        :param arguments: arguments of the operation
+        :return: tuple of the result and the list of file descriptors passed by the helper
+        """
+        message = json.dumps({"operation": operation, "arguments": arguments}).encode()
+
+        with self.lock:
+            self.socket.send(message)
+            response, fds, _, _ = socket.recv_fds(self.socket, max_message_size, 1)
+
+        if not response:
+            raise HelperError("privileged helper closed the connection")
+
+        response = json.loads(response)
+        if "error" in response:
+            for fd in fds:
+                os.close(fd)
+            raise HelperError(response["error"])
+
+        return response["result"], fds
+
+    def close(self) -> None:
+        """
+        Asks the helper to stop its daemons and end, then removes the socket directory.
+        """
+        try:
+            self.request("shutdown")
+        except (OSError, HelperError):
+            pass
+        self.socket.close()
+
+        if self.process:
+            try:
+                self.process.wait(5)
+            except subprocess.TimeoutExpired:
+                messages.print_warn("Privileged helper did not end in time.")
+        if self.directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def uses_netlink(self) -> bool:
+        """
+        :return: False, since the changes are done by the helper
+        """
+        return False
+
+    def begin(self) -> None:
+        """
+        Starts a batch. The changes are collected until commit() is called and sent in one request.
+        """
+        self.changes = []
+
+    def commit(self) -> bool:
+        """
+        Applies the changes of the running batch.
+        :return: True for success, False if at least one change failed
+        """
+        changes, self.changes = self.changes, None
+        if not changes:
+            return True
+
+        return self.__change("batch", changes=changes)
+
+    def delete_link(self, interface) -> bool:
+        """
+        Deletes an interface. A missing interface is no error.
+        :param interface: name of the interface
+        :return: True for success, False otherwise
+        """
+        return self.__change("delete_link", interface=interface)
+
+    def add_link(self, interface, kind) -> bool:
+        """
+        Creates an interface.
+        :param interface: name of the interface
+        :param kind: type of the interface, like 'wireguard'
+        :return: True for success, False otherwise
+        """
+        return self.__change("add_link", interface=interface, kind=kind)
+
+    def set_link_up(self, interface) -> bool:
+        """
+        Brings an interface up.
+        :param interface: name of the interface
+        :return: True for success, False otherwise
+        """
+        return self.__change("set_link_up", interface=interface)
+
+    def set_address(self, interface, address, prefix_length) -> bool:
+        """
+        Assigns an address to an interface, replacing an existing assignment of the same address.
+        :param interface: name of the interface
+        :param address: IPv4 or IPv6 address
+        :param prefix_length: length of the network prefix, like 32
+        :return: True for success, False otherwise
+        """
+        return self.__change("set_address", interface=interface, address=address, prefix_length=prefix_length)
+
+    def set_route(self, destination, interface) -> bool:
+        """
+        Routes a network through an interface. An existing route is replaced.
+        :param destination: network, like '10.0.0.0/24'
+        :param interface: name of the interface
+        :return: True for success, False otherwise
+        """
+        return self.__change("set_route", destination=destination, interface=interface)
+
+    def wait_for_link(self, interface, timeout=30.0) -> bool:
+        """
+        Waits until an interface exists, for interfaces created by a VPN daemon.
+        :param interface: name of the interface
+        :param timeout: maximum time to wait in seconds
+        :return: True if the interface exists, False if it was not created within the timeout
+        """
+        return self.__change("wait_for_link", interface=interface, timeout=timeout)
+
+    def start_daemon(self, name, parameters):
+        """
+        Starts a VPN daemon as root.
+        :param name: name of the fixed command of the daemon, see src/vpns/DaemonCommands.py
+        :param parameters: dictionary of the parameters of the command
+        :return: HelperProcess of the daemon
+        """
+        pid, fds = self.request("start_daemon", name=name, parameters=parameters)
+        return HelperProcess(self, pid, os.fdopen(fds[0], "rb", buffering=0) if fds else None)
+
+    def read_stats(self, interface) -> list:
+        """
+        Reads the times of the latest handshakes of all WireGuard peers of an interface.
+        :param interface: name of the WireGuard interface
+        :return: list of UNIX timestamps, 0 for peers without handshake, empty if the interface can not be read
+        """
+        try:
+            return self.request("read_stats", interface=interface)[0]
+        except HelperError:
+            return []
+
+    def __change(self, operation, **arguments) -> bool:
+        """
+        Adds a network change to the running batch, or sends it at once if no batch is running.
+        :param operation: name of the operation
+        :param arguments: arguments of the operation
+        :return: True for success (or if the change was added to the batch), False otherwise
+        """
+        if self.changes is not None and operation != "wait_for_link":
+            self.changes.append((operation, arguments))
+            return True
+
+        try:
+            return self.request(operation, **arguments)[0]
+        except HelperError as err:
+            messages.print_err(f"Privileged helper: {operation} failed: {err}")
+            return False
+
+
+class HelperProcess:
+    """
+    Daemon started by the privileged helper. Offers the methods of subprocess.Popen the VPNs use. The process ID is
+    the one of the daemon itself and the output of the daemon (standard output and error) can be read from stdout.
+    """
+
+    def __init__(self, client, pid, stdout) -> None:
+        """
+        :param client: HelperClient that started the daemon
+        :param pid: process ID of the daemon
+        :param stdout: file object of the output of the daemon, None if not available
+        """
+        self.client = client
+        self.pid = pid
+        self.stdout = stdout
+        self.stderr = None
+        self.returncode = None
+
+    def poll(self):
+        """
+        :return: return code of the daemon, None if it is still running
+        """
+        if self.returncode is None:
+            try:
+                self.returncode = self.client.request("poll_daemon", pid=self.pid)[0]
+            except (OSError, HelperError):
+                self.returncode = -signal.SIGKILL  # the helper stopped all daemons when it ended
+        return self.returncode
+
+    def wait(self, timeout=10.0):
+        """
+        Waits until the daemon ended.
+        :param timeout: maximum time to wait in seconds
+        :return: return code of the daemon, raises subprocess.TimeoutExpired if it did not end in time
+        """
+        if self.poll() is None:
+            try:
+                self.returncode = self.client.request("wait_daemon", pid=self.pid, timeout=timeout)[0]
+            except (OSError, HelperError):
+                self.returncode = -signal.SIGKILL  # the helper stopped all daemons when it ended
+            if self.returncode is None:
+                raise subprocess.TimeoutExpired(f"daemon {self.pid}", timeout)
+        return self.returncode
+
+    def send_signal(self, signal_number) -> None:
+        """
+        Sends SIGTERM or SIGKILL to the daemon.
+        :param signal_number: number of the signal
+        """
+        if self.returncode is None:
+            try:
+                self.returncode = self.client.request("stop_daemon", pid=self.pid, signal_number=int(signal_number))[0]
+            except (OSError, HelperError):
+                pass
+
+    def terminate(self) -> None:
+        """
+        Sends SIGTERM to the daemon.
+        """
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self) -> None:
+        """
+        Sends SIGKILL to the daemon.
+        """
+        self.send_signal(signal.SIGKILL)
+
+
+def start_helper(timeout=60.0) -> bool:
+    """
+    Starts the privileged helper with 'sudo' and connects to it. This is the only 'sudo' of a run, so a password is
+    asked for at most once. Does nothing if the framework already runs as root, since commands can be run directly.
+    :param timeout: maximum time in seconds to wait for the helper, including entering the password
+    :return: True for success, False otherwise
+    """
+    global helper
+    if helper or os.geteuid() == 0:
+        return True
+
+    directory = tempfile.mkdtemp(prefix="vpn-benchmarking-")  # only accessible by the user and root
+    socket_path = os.path.join(directory, "helper.sock")
+
+    messages.print_log("Starting privileged helper...")
+    try:
+        process = subprocess.Popen(
+            ["sudo", sys.executable, "-m", "src.vpns.PrivilegedHelper", socket_path, str(os.getuid())]
+        )
+    except FileNotFoundError as err:
+        messages.print_err(f"Unable to start privileged helper: {err=}")
+        shutil.rmtree(directory, ignore_errors=True)
+        return False
+
+    start = time.monotonic()
+    while not helper:
+        try:
+            helper = HelperClient(socket_path, process, directory)
+        except (FileNotFoundError, ConnectionRefusedError, PermissionError):  # helper is not listening yet
+            if process.poll() is not None or time.monotonic() - start >= timeout:
+                messages.print_err("Privileged helper could not be started.")
+                if process.poll() is None:
+                    process.kill()
+                shutil.rmtree(directory, ignore_errors=True)
+                return False
+            time.sleep(0.01)
+
+    messages.print_log("Privileged helper started.")
+    return True
+
+
+def stop_helper() -> None:
+    """
+    Stops the privileged helper, which also stops all daemons it started.
+    """
+    global helper
+    if helper:
+        helper.close()
+        helper = None
+
+
+def get_helper():
+    """
+    :return: the running HelperClient, None if no helper was started
+    """
+    return helper
@@ -0,0 +1,248 @@
+import os
+import select
+import subprocess
+import time
+
+import src.messages as messages
+
+try:
+    from pyroute2 import IPRoute
+    from pyroute2.netlink.exceptions import NetlinkError
+    from pyroute2.netlink.rtnl import RTMGRP_LINK
+except ImportError:  # pyroute2 is optional, 'ip -batch' is used instead
+    IPRoute = None
+
+
+class NetworkConfig:
+    """
+    Configures interfaces, addresses and routes for the VPNs. Talks netlink directly through pyroute2 if it is
+    installed and the process has the needed privileges, so no process is started per change. Otherwise, the changes
+    of a batch are collected and applied by a single 'sudo ip -batch' process. Waiting for an interface created by a
+    VPN daemon uses RTM_NEWLINK events instead of retrying.
+    """
+
+    def __init__(self) -> None:
+        """
+        Opens the netlink socket if possible.
+        """
+        self.ipr = None
+        self.sudo = [] if os.geteuid() == 0 else ["sudo"]  # the privileged helper runs as root already
+        self.commands = None  # commands of the running batch for 'ip -batch', None if no batch is running
+        self.failed = False  # True if a change of the running batch failed already
+
+        if IPRoute and os.geteuid() == 0:
+            try:
+                self.ipr = IPRoute()
+            except Exception as err:
+                messages.print_warn(f"Netlink is not available, using 'ip -batch': {err=}")
+
+    def close(self) -> None:
+        """
+        Closes the netlink socket.
+        """
+        if self.ipr:
+            self.ipr.close()
+            self.ipr = None
+
+    def uses_netlink(self) -> bool:
+        """
+        :return: True if changes are done through netlink, False if 'ip -batch' is used
+        """
+        return self.ipr is not None
+
+    def begin(self) -> None:
+        """
+        Starts a batch. With netlink, changes are applied at once anyway and their failures are remembered, otherwise
+        they are collected until commit() is called.
+        """
+        self.commands = []
+        self.failed = False
+
+    def commit(self) -> bool:
+        """
+        Applies the changes of the running batch. Without netlink, all collected commands are run by one 'ip -batch'
+        process, with '-force' so the following commands are applied even if one fails. Changes already applied
+        through netlink are reported as well, so both ways report failures the same way.
+        :return: True for success, False if at least one change failed
+        """
+        commands, self.commands = self.commands, None
+        failed, self.failed = self.failed, False
+        if not commands:
+            return not failed
+
+        try:
+            subprocess.run(
+                self.sudo + ["ip", "-force", "-batch", "-"],
+                input="\n".join(commands).encode(),
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+            return not failed
+        except subprocess.CalledProcessError as err:
+            messages.print_warn(f"Not all network changes could be applied: {err.stderr.decode().strip()}")
+            return False
+
+    def delete_link(self, interface) -> bool:
+        """
+        Deletes an interface. A missing interface is no error.
+        :param interface: name of the interface
+        :return: True for success, False otherwise
+        """
+        if not self.ipr:
+            if not os.path.exists(f"/sys/class/net/{interface}"):
+                return True
+            return self.__run(f"link del {interface}")
+
+        index = self.__get_index(interface)
+        if index is not None:
+            try:
+                self.ipr.link("del", index=index)
+            except NetlinkError as err:
+                messages.print_warn(f"Unable to delete {interface}: {err=}")
+                self.failed = True
+                return False
+
+        return True
+
+    def add_link(self, interface, kind) -> bool:
+        """
+        Creates an interface.
+        :param interface: name of the interface
+        :param kind: type of the interface, like 'wireguard'
+        :return: True for success, False otherwise
+        """
+        if not self.ipr:
+            return self.__run(f"link add {interface} type {kind}")
+
+        try:
+            self.ipr.link("add", ifname=interface, kind=kind)
+            return True
+        except NetlinkError as err:
+            messages.print_err(f"Unable to create {interface}: {err=}")
+            self.failed = True
+            return False
+
+    def set_link_up(self, interface) -> bool:
+        """
+        Brings an interface up.
+        :param interface: name of the interface
+        :return: True for success, False otherwise
+        """
+        if not self.ipr:
+            return self.__run(f"link set {interface} up")
+
+        return self.__change(interface, lambda index: self.ipr.link("set", index=index, state="up"))
+
+    def set_address(self, interface, address, prefix_length) -> bool:
+        """
+        Assigns an address to an interface. An existing assignment of the same address is replaced, so no flushing is
+        needed.
+        :param interface: name of the interface
+        :param address: IPv4 or IPv6 address
+        :param prefix_length: length of the network prefix, like 32
+        :return: True for success, False otherwise
+        """
+        if not self.ipr:
+            return self.__run(f"addr replace {address}/{prefix_length} dev {interface}")
+
+        return self.__change(
+            interface,
+            lambda index: self.ipr.addr("replace", index=index, address=address, prefixlen=prefix_length),
+        )
+
+    def set_route(self, destination, interface) -> bool:
+        """
+        Routes a network through an interface. An existing route is replaced.
+        :param destination: network, like '10.0.0.0/24'
+        :param interface: name of the interface
+        :return: True for success, False otherwise
+        """
+        if not self.ipr:
+            return self.__run(f"route replace {destination} dev {interface}")
+
+        return self.__change(interface, lambda index: self.ipr.route("replace", dst=destination, oif=index))
+
+    def wait_for_link(self, interface, timeout=30.0) -> bool:
+        """
+        Waits until an interface exists, for interfaces created by a VPN daemon. With netlink, the RTM_NEWLINK event
+        of the interface is awaited. Otherwise, the existence of /sys/class/net/{interface} is checked, which needs no
+        additional process either.
+        :param interface: name of the interface
+        :param timeout: maximum time to wait in seconds
+        :return: True if the interface exists, False if it was not created within the timeout
+        """
+        deadline = time.monotonic() + timeout
+
+        if not self.ipr:
+            while not os.path.exists(f"/sys/class/net/{interface}"):
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(0.01)
+            return True
+
+        with IPRoute() as events:
+            events.bind(groups=RTMGRP_LINK)  # subscribe before checking, so no event is missed
+
+            if self.__get_index(interface) is not None:
+                return True
+
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not select.select([events.fileno()], [], [], remaining)[0]:
+                    return False
+
+                for message in events.get():
+                    if message.get("event") == "RTM_NEWLINK" and message.get_attr("IFLA_IFNAME") == interface:
+                        return True
+
+    def __get_index(self, interface):
+        """
+        :param interface: name of the interface
+        :return: index of the interface, None if it does not exist
+        """
+        indices = self.ipr.link_lookup(ifname=interface)
+        return indices[0] if indices else None
+
+    def __change(self, interface, change) -> bool:
+        """
+        Applies a netlink change to an existing interface. A failure is remembered for commit().
+        :param interface: name of the interface
+        :param change: function doing the change, gets the index of the interface
+        :return: True for success, False otherwise
+        """
+        index = self.__get_index(interface)
+        if index is None:
+            messages.print_err(f"Interface {interface} does not exist.")
+            self.failed = True
+            return False
+
+        try:
+            change(index)
+            return True
+        except NetlinkError as err:
+            messages.print_err(f"Unable to configure {interface}: {err=}")
+            self.failed = True
+            return False
+
+    def __run(self, command) -> bool:
+        """
+        Adds an 'ip' command to the running batch, or runs it at once if no batch is running.
+        :param command: arguments of the 'ip' command, like 'link set wg0 up'
+        :return: True for success (or if the command was added to the batch), False otherwise
+        """
+        if self.commands is not None:
+            self.commands.append(command)
+            return True
+
+        try:
+            subprocess.run(
+                self.sudo + ["ip"] + command.split(),
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+            return True
+        except subprocess.CalledProcessError as err:
+            messages.print_err(f"'ip {command}' failed: {err.stderr.decode().strip()}")
+            return False
@@ -1,6 +1,5 @@
 import os
 import shutil
-import signal
 import subprocess
 
 import click
@@ -35,15 +34,17 @@ class OpenVPNstatic(VPN):
         :return: True for success, False otherwise
         """
         messages.print_log("Preparing...")
-        self.__clean_up()  # close existing OpenVPN processes
+        with self.span("cleanup"):
+            self.__clean_up()  # close existing OpenVPN processes
 
         messages.print_log("Starting key exchange processes...")
-        if self.role == "server":
-            self.process = self.__start_openvpn_key_exchange_on_server()
-        elif self.role == "client":
-            self.process = self.__start_openvpn_key_exchange_on_client()
-        else:
-            raise Exception("Unexpected role")
+        with self.span("daemon"):
+            if self.role == "server":
+                self.process = self.__start_openvpn_key_exchange_on_server()
+            elif self.role == "client":
+                self.process = self.__start_openvpn_key_exchange_on_client()
+            else:
+                raise Exception("Unexpected role")
 
         if not self.process:  # Process was not opened correctly
             return False
@@ -61,10 +62,21 @@ class OpenVPNstatic(VPN):
         Closes OpenVPN after cleanup.
         :return: True for success
         """
-        self.__clean_up()
+        with self.span("cleanup"):
+            self.__clean_up()
         messages.print_log("OpenVPN connection closed.")
         return True
 
+    def wait_ready(self, timeout=10.0):
+        """
+        Waits until OpenVPN prints 'Initialization Sequence Completed', which it does after the first packet with the
+        static key was received from the other host.
+        :param timeout: maximum time to wait in seconds
+        :return: time in seconds until the handshake was detected, None if there was no handshake within the timeout
+        """
+        with self.span("handshake"):
+            return helpers.wait_for_output(self.process, "Initialization Sequence Completed", timeout)
+
     def generate_keys(self) -> bool:
         """
         Generates the necessary static key for OpenVPN. Creates or uses existing openvpnstatic-keys directory,
@@ -175,11 +187,7 @@ class OpenVPNstatic(VPN):
                     stderr=subprocess.PIPE,
                     stdout=subprocess.PIPE,
                 )
-            process = subprocess.Popen(
-               ["sudo", "openvpn", "--config", f"{conf_dir}"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
+            process = self.start_daemon("openvpn", {"config": conf_dir})
         except Exception as err:
             messages.print_err("OpenVPN key exchange was not successful!")
             print(f"{err=}")
@@ -206,11 +214,7 @@ class OpenVPNstatic(VPN):
                     stderr=subprocess.PIPE,
                     stdout=subprocess.PIPE,
                 )
-            process = subprocess.Popen(
-                ["sudo", "openvpn", "--config", f"{conf_dir}"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
+            process = self.start_daemon("openvpn", {"config": conf_dir})
         except Exception as err:
             messages.print_err("OpenVPN key exchange was not successful!")
             print(f"{err=}")
@@ -221,9 +225,8 @@ class OpenVPNstatic(VPN):
 
     def __assign_ip_addr_to_interface(self) -> bool:
         """
-        Assigns the IP address '10.8.0.1' to the server or '10.8.0.2' to the client interface. Interface has to exist.
-        Attempts multiple times, since the interface might not be ready for the first few tries. Flushes the
-        interface after invalid attempt.
+        Assigns the IP address '10.8.0.1' to the server or '10.8.0.2' to the client interface. Waits until the VPN daemon
+        created the interface, then configures it in one batch.
         :return: True for success, False otherwise
         """
 
@@ -234,69 +237,22 @@ class OpenVPNstatic(VPN):
         else:
             return False
 
-        j = 1000  # number of attempts
-        
-        while j > 0:
-            try:
-                subprocess.check_output(
-                    [
-                        "sudo",
-                        "ip",
-                        "addr",
-                        "add",
-                        f"10.8.0.{number}/32",
-                        "dev",
-                        "tun0",
-                    ],
-                    stderr=subprocess.PIPE,
-                )
-                break
-            except subprocess.CalledProcessError:
-                # flushes the interface for the case in which 'RTNETLINK answers: File exists error' occurs
-                subprocess.run(
-                    ["sudo", "ip", "addr", "flush", "dev", "tun0"],
-                    stderr=subprocess.PIPE,
-                    stdout=subprocess.PIPE,
-                )
-                j -= 1
-            except Exception as err:
-                print(f"{err=}")
+        with self.span("wait_link"):  # the interface is created by the VPN daemon
+            if not self.network.wait_for_link("tun0"):
+                messages.print_err("Interface tun0 was not created in time! Please try again.")
                 return False
-        
-
-        # if adding an IP address failed
-        if j == 0:
-            messages.print_err(
-                f"Too many attempts assigning IP address! Please try again."
-            )
-            return False
-        
-        try:
-            # Add openvpn to route table
-            subprocess.run(
-                ["sudo", "ip", "route", "add", "10.8.0.0/24", "dev", "tun0"],
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-        except: # OpenVPN was already added to the route table
-            pass
 
+        with self.span("configure"):
+            self.network.begin()
+            self.network.set_address("tun0", f"10.8.0.{number}", 32)
+            self.network.set_route("10.8.0.0/24", "tun0")
+            if not self.network.commit():
+                return False
 
         return True
 
     def __clean_up(self):
         """
-        Terminates all running OpenVPN processes.
+        Stops the OpenVPN daemon, waits for its exit and keeps its shutdown latency, see VPN.stop_daemon().
         """
-        if self.process:
-            self.process.kill()
-
-        try:
-            for line in os.popen("ps ax | grep openvpn | grep -v grep"):
-                fields = line.split()
-                if "main.py" not in line:
-                    pid = fields[0]
-                    os.kill(int(pid), signal.SIGKILL)
-        except Exception as err:  # no OpenVPN processes running
-            return
+        self.stop_daemon()
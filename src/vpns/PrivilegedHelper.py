@@ -0,0 +1,321 @@
+import array
+import ipaddress
+import json
+import os
+import select
+import shutil
+import signal
+import socket
+import struct
+import subprocess
+import sys
+
+import src.messages as messages
+from src.vpns.DaemonCommands import build_command, check_interface, daemon_commands, read_openvpn_config
+from src.vpns.NetworkConfig import NetworkConfig
+from src.vpns.VPN import open_pidfd
+
+"""
+The privileged helper runs as root for a whole run and does the few things the VPNs need root for, so not every command
+has to be started with 'sudo'. It is started by start_helper() in src/vpns/HelperClient.py with 'sudo python -m
+src.vpns.PrivilegedHelper SOCKET_PATH OWNER_UID' and serves exactly one connection of the owner over a Unix socket.
+Requests and responses are JSON objects, one per SOCK_SEQPACKET message. Only the operations of the allow-list below are
+accepted, network changes only for the interfaces of the VPNs, and daemons are only started from the fixed commands of
+src/vpns/DaemonCommands.py, with every parameter checked. When the connection is closed, all daemons still running are
+stopped and the helper ends.
+"""
+
+link_kinds = ("wireguard",)  # types of interfaces the helper may create
+max_message_size = 65536
+
+
+class PrivilegedHelper:
+    """
+    Serves the requests of one client. Every operation checks its arguments before doing anything.
+    """
+
+    def __init__(self, socket_path, owner) -> None:
+        """
+        :param socket_path: path of the Unix socket, its directory must exist
+        :param owner: user ID allowed to connect besides root
+        """
+        self.socket_path = socket_path
+        self.owner = owner
+        self.network = NetworkConfig()
+        self.processes = {}  # maps process ID to subprocess.Popen of the started daemons
+
+        self.operations = {
+            "add_link": self.__add_link,
+            "delete_link": self.__delete_link,
+            "set_link_up": self.__set_link_up,
+            "set_address": self.__set_address,
+            "set_route": self.__set_route,
+            "wait_for_link": self.__wait_for_link,
+            "batch": self.__batch,
+            "start_daemon": self.__start_daemon,
+            "poll_daemon": self.__poll_daemon,
+            "stop_daemon": self.__stop_daemon,
+            "wait_daemon": self.__wait_daemon,
+            "read_stats": self.__read_stats,
+        }
+        self.batch_operations = ("add_link", "delete_link", "set_link_up", "set_address", "set_route")
+
+    def serve(self) -> None:
+        """
+        Creates the socket, accessible only by the owner, and handles the requests of the first connection until it is
+        closed or a shutdown is requested. Stops all daemons afterward.
+        """
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET) as server:
+            server.bind(self.socket_path)
+            os.chown(self.socket_path, self.owner, -1)
+            os.chmod(self.socket_path, 0o600)
+            server.listen(1)
+
+            connection, _ = server.accept()
+
+        os.remove(self.socket_path)
+
+        with connection:
+            _, uid, _ = struct.unpack(
+                "3i", connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+            )
+            if uid not in (0, self.owner):
+                messages.print_err(f"Privileged helper: rejected connection of user {uid}.")
+            else:
+                self.__handle(connection)
+
+        self.__stop_all()
+        self.network.close()
+
+    def __handle(self, connection) -> None:
+        """
+        Answers requests until the connection is closed or a shutdown is requested.
+        :param connection: connected socket of the client
+        """
+        while True:
+            message = connection.recv(max_message_size)
+            if not message:
+                return
+
+            try:
+                request = json.loads(message)
+                operation = request["operation"]
+                if operation == "shutdown":
+                    connection.send(json.dumps({"result": True}).encode())
+                    return
+                if operation not in self.operations:
+                    raise ValueError(f"operation '{operation}' is not allowed")
+
+                result, fds = self.operations[operation](**request.get("arguments", {})), []
+                if isinstance(result, tuple):  # operations passing file descriptors
+                    result, fds = result
+
+                response = json.dumps({"result": result}).encode()
+            except Exception as err:
+                response, fds = json.dumps({"error": f"{err}"}).encode(), []
+
+            if fds:
+                connection.sendmsg([response], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", fds))])
+                for fd in fds:
+                    os.close(fd)
+            else:
+                connection.send(response)
+
+    def __add_link(self, interface, kind) -> bool:
+        """
+        Creates an interface of an allowed type.
+        """
+        if kind not in link_kinds:
+            raise ValueError(f"interface type '{kind}' is not allowed")
+        return self.network.add_link(check_interface(interface), kind)
+
+    def __delete_link(self, interface) -> bool:
+        """
+        Deletes an interface.
+        """
+        return self.network.delete_link(check_interface(interface))
+
+    def __set_link_up(self, interface) -> bool:
+        """
+        Brings an interface up.
+        """
+        return self.network.set_link_up(check_interface(interface))
+
+    def __set_address(self, interface, address, prefix_length) -> bool:
+        """
+        Assigns an address to an interface.
+        """
+        ipaddress.ip_interface(f"{address}/{int(prefix_length)}")  # raises ValueError for invalid addresses
+        return self.network.set_address(check_interface(interface), address, int(prefix_length))
+
+    def __set_route(self, destination, interface) -> bool:
+        """
+        Routes a network through an interface.
+        """
+        ipaddress.ip_network(destination)
+        return self.network.set_route(destination, check_interface(interface))
+
+    def __wait_for_link(self, interface, timeout=30.0) -> bool:
+        """
+        Waits until an interface exists.
+        """
+        return self.network.wait_for_link(check_interface(interface), float(timeout))
+
+    def __batch(self, changes) -> bool:
+        """
+        Applies several network changes at once, with 'ip -batch' if netlink is not available.
+        :param changes: list of pairs of an operation name and its arguments
+        :return: True if all changes succeeded, False otherwise
+        """
+        self.network.begin()
+        successful = True
+        try:
+            for operation, arguments in changes:
+                if operation not in self.batch_operations:
+                    raise ValueError(f"operation '{operation}' is not allowed in a batch")
+                successful = self.operations[operation](**arguments) and successful
+        finally:
+            committed = self.network.commit()  # also ends the batch if a change was rejected
+
+        return committed and successful
+
+    def __start_daemon(self, name, parameters):
+        """
+        Starts a daemon from one of the fixed commands, without 'sudo' in between, so its process ID is the one of the
+        daemon. Its standard output and error are passed to the client as one pipe. OpenVPN gets a copy of the checked
+        configuration in memory, which the client can not change after the check.
+        :param name: name of the command, like 'wg-set'
+        :param parameters: dictionary of the parameters of the command, checked by build_command()
+        :return: tuple of the process ID and a list with the read end of the output pipe
+        """
+        command = build_command(name, parameters)
+
+        program = shutil.which(command[0])
+        if not program:
+            raise FileNotFoundError(f"program '{command[0]}' not found")
+
+        config = None
+        if "{config}" in daemon_commands[name]:
+            config = os.memfd_create("openvpn.conf")
+            os.write(config, read_openvpn_config(parameters["config"]).encode())
+            command[daemon_commands[name].index("{config}")] = f"/dev/fd/{config}"
+
+        try:
+            process = subprocess.Popen(
+                [program] + command[1:],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL,
+                start_new_session=True,  # own process group, stopped as a whole
+                pass_fds=() if config is None else (config,),
+            )
+        finally:
+            if config is not None:
+                os.close(config)
+        self.processes[process.pid] = process
+
+        output = os.dup(process.stdout.fileno())
+        process.stdout.close()  # only the client reads the output
+        return process.pid, [output]
+
+    def __poll_daemon(self, pid):
+        """
+        :param pid: process ID of a daemon started by the helper
+        :return: return code of the daemon, None if it is still running
+        """
+        return self.__get_process(pid).poll()
+
+    def __stop_daemon(self, pid, signal_number=signal.SIGTERM):
+        """
+        Sends SIGTERM or SIGKILL to the process group of a daemon started by the helper.
+        :param pid: process ID of the daemon
+        :param signal_number: number of the signal
+        :return: return code of the daemon if it already ended, None otherwise
+        """
+        if signal_number not in (signal.SIGTERM, signal.SIGKILL):
+            raise ValueError(f"signal {signal_number} is not allowed")
+
+        process = self.__get_process(pid)
+        if process.poll() is None:
+            try:
+                os.killpg(process.pid, signal_number)
+            except OSError:
+                process.send_signal(signal_number)
+        return process.poll()
+
+    def __wait_daemon(self, pid, timeout):
+        """
+        Waits until a daemon started by the helper ended, using a pidfd if the system supports it.
+        :param pid: process ID of the daemon
+        :param timeout: maximum time to wait in seconds
+        :return: return code of the daemon, None if it did not end within the timeout
+        """
+        process = self.__get_process(pid)
+        pidfd = open_pidfd(process.pid) if process.poll() is None else None
+
+        try:
+            if pidfd is not None and not select.select([pidfd], [], [], float(timeout))[0]:
+                return None
+            return process.wait(float(timeout))
+        except subprocess.TimeoutExpired:
+            return None
+        finally:
+            if pidfd is not None:
+                os.close(pidfd)
+
+    def __read_stats(self, interface) -> list:
+        """
+        Reads the times of the latest handshakes of all WireGuard peers of an interface.
+        :param interface: name of the WireGuard interface
+        :return: list of UNIX timestamps, 0 for peers without handshake, empty if the interface can not be read
+        """
+        try:
+            output = subprocess.check_output(
+                ["wg", "show", check_interface(interface), "latest-handshakes"], stderr=subprocess.PIPE
+            )
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            return []
+
+        return [int(fields[1]) for fields in map(str.split, output.decode().splitlines())
+                if len(fields) == 2 and fields[1].isdigit()]
+
+    def __get_process(self, pid):
+        """
+        :param pid: process ID
+        :return: subprocess.Popen of the daemon, raises ValueError if the helper did not start it
+        """
+        process = self.processes.get(int(pid))
+        if not process:
+            raise ValueError(f"process {pid} was not started by the helper")
+        return process
+
+    def __stop_all(self) -> None:
+        """
+        Terminates all daemons that are still running, kills them if they do not end within 2 seconds.
+        """
+        for process in self.processes.values():
+            if process.poll() is None:
+                try:
+                    os.killpg(process.pid, signal.SIGTERM)
+                except OSError:
+                    process.terminate()
+
+        for process in self.processes.values():
+            try:
+                process.wait(2)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+
+if __name__ == "__main__":
+    if os.geteuid() != 0:
+        messages.print_err("The privileged helper has to run as root.")
+        sys.exit(1)
+
+    # Ctrl+C in the terminal is handled by main.py, which closes the helper
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    PrivilegedHelper(sys.argv[1], int(sys.argv[2])).serve()
@@ -1,6 +1,5 @@
 import os
 import shutil
-import signal
 import subprocess
 
 import click
@@ -35,15 +34,17 @@ class Rosenpass(VPN):
         :return: True for success, False otherwise
         """
         messages.print_log("Preparing...")
-        self.__clean_up()  # close existing Rosenpass processes
+        with self.span("cleanup"):
+            self.__clean_up()  # close existing Rosenpass processes
 
         messages.print_log("Starting key exchange processes...")
-        if self.role == "server":
-            self.process = self.__start_rosenpass_key_exchange_on_server()
-        elif self.role == "client":
-            self.process = self.__start_rosenpass_key_exchange_on_client()
-        else:
-            raise Exception("Unexpected role")
+        with self.span("daemon"):
+            if self.role == "server":
+                self.process = self.__start_rosenpass_key_exchange_on_server()
+            elif self.role == "client":
+                self.process = self.__start_rosenpass_key_exchange_on_client()
+            else:
+                raise Exception("Unexpected role")
 
         if not self.process:  # Process was not opened correctly
             return False
@@ -61,10 +62,26 @@ class Rosenpass(VPN):
         Closes the Rosenpass VPN after cleanup.
         :return: True for success
         """
-        self.__clean_up()
+        with self.span("cleanup"):
+            self.__clean_up()
         messages.print_log("Rosenpass connection closed.")
         return True
 
+    def wait_ready(self, timeout=10.0):
+        """
+        Waits until 'wg show rosenpass0 latest-handshakes' reports a handshake of the WireGuard interface created by
+        Rosenpass. The client sends datagrams to the server's tunnel address, since WireGuard only starts a handshake
+        when there is traffic.
+        :param timeout: maximum time to wait in seconds
+        :return: time in seconds until the handshake was detected, None if there was no handshake within the timeout
+        """
+        trigger_address = None
+        if self.role == "client":
+            trigger_address = f"{self.open_server_address.strip('[]')}%rosenpass0"  # link-local address needs scope
+
+        with self.span("handshake"):
+            return helpers.wait_for_handshake("rosenpass0", trigger_address, timeout)
+
     def generate_keys(self) -> bool:
         """
         Generates the necessary keys for Rosenpass. Creates or uses existing rp-keys directory,
@@ -179,23 +196,15 @@ class Rosenpass(VPN):
         client_pk_dir = os.path.join(key_path, "client.rosenpass-public")
 
         try:
-            process = subprocess.Popen(
-                [
-                    "sudo",
-                    "rp",
-                    "exchange",
-                    server_sk_dir,  # server keys
-                    "dev",
-                    "rosenpass0",
-                    "listen",
-                    f"{opening_port}",
-                    "peer",
-                    client_pk_dir,  # client keys
-                    "allowed-ips",
-                    "fe80::/64",
-                ],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+            process = self.start_daemon(
+                "rp-exchange-server",
+                {
+                    "secret_key": server_sk_dir,  # server keys
+                    "interface": "rosenpass0",
+                    "port": opening_port,
+                    "peer_key": client_pk_dir,  # client keys
+                    "allowed_ips": "fe80::/64",
+                },
             )
         except Exception as err:
             messages.print_err("Rosenpass key exchange was not successful!")
@@ -216,23 +225,15 @@ class Rosenpass(VPN):
         server_pk_dir = os.path.join(key_path, "server.rosenpass-public")
 
         try:
-            process = subprocess.Popen(
-                [
-                    "sudo",
-                    "rp",
-                    "exchange",
-                    client_sk_dir,  # client keys
-                    "dev",
-                    "rosenpass0",
-                    "peer",
-                    server_pk_dir,  # server keys
-                    "endpoint",
-                    f"{self.hosts.server_address}:{opening_port}",
-                    "allowed-ips",
-                    "fe80::/64",
-                ],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+            process = self.start_daemon(
+                "rp-exchange-client",
+                {
+                    "secret_key": client_sk_dir,  # client keys
+                    "interface": "rosenpass0",
+                    "peer_key": server_pk_dir,  # server keys
+                    "endpoint": f"{self.hosts.server_address}:{opening_port}",
+                    "allowed_ips": "fe80::/64",
+                },
             )
         except Exception as err:
             messages.print_err("Rosenpass key exchange was not successful!")
@@ -244,9 +245,8 @@ class Rosenpass(VPN):
 
     def __assign_ip_addr_to_interface(self) -> bool:
         """
-        Assigns the IP address 'fe80::1' to the server or 'fe80::2' to the client interface. Interface has to exist.
-        Attempts multiple times, since the interface might not be ready for the first few tries. Flushes the
-        interface after invalid attempt.
+        Assigns the IP address 'fe80::1' to the server or 'fe80::2' to the client interface. Waits until the VPN daemon
+        created the interface, then configures it in one batch.
         :return: True for success, False otherwise
         """
 
@@ -257,55 +257,21 @@ class Rosenpass(VPN):
         else:
             return False
 
-        j = 1000  # number of attempts
-        while j > 0:
-            try:
-                subprocess.check_output(
-                    [
-                        "sudo",
-                        "ip",
-                        "a",
-                        "add",
-                        f"fe80::{number}/64",
-                        "dev",
-                        "rosenpass0",
-                    ],
-                    stderr=subprocess.PIPE,
-                )
-                break
-            except subprocess.CalledProcessError:
-                # flushes the interface for the case in which 'RTNETLINK answers: File exists error' occurs
-                subprocess.run(
-                    ["sudo", "ip", "addr", "flush", "dev", "rosenpass0"],
-                    stderr=subprocess.PIPE,
-                    stdout=subprocess.PIPE,
-                )
-                j -= 1
-            except Exception as err:
-                print(f"{err=}")
+        with self.span("wait_link"):  # the interface is created by the VPN daemon
+            if not self.network.wait_for_link("rosenpass0"):
+                messages.print_err("Interface rosenpass0 was not created in time! Please try again.")
                 return False
 
-        # if adding an IP address failed
-        if j == 0:
-            messages.print_err(
-                f"Too many attempts assigning IP address! Please try again."
-            )
-            return False
+        with self.span("configure"):
+            self.network.begin()
+            self.network.set_address("rosenpass0", f"fe80::{number}", 64)
+            if not self.network.commit():
+                return False
 
         return True
 
     def __clean_up(self):
         """
-        Terminates all running Rosenpass processes.
+        Stops the Rosenpass daemon, waits for its exit and keeps its shutdown latency, see VPN.stop_daemon().
         """
-        if self.process:
-            self.process.kill()
-
-        try:
-            for line in os.popen("ps ax | grep rosenpass | grep -v grep"):
-                fields = line.split()
-                if "main.py" not in line:
-                    pid = fields[0]
-                    os.kill(int(pid), signal.SIGKILL)
-        except Exception as err:  # no Rosenpass processes running
-            return
+        self.stop_daemon()
@@ -1,13 +1,187 @@
+import contextlib
 import os
+import select
+import signal
+import subprocess
+import time
+
+import psutil
 
 import src.messages as messages
 from src.HostsManager import HostsManager
+from src.vpns.DaemonCommands import build_command
+from src.vpns.HelperClient import get_helper
+from src.vpns.NetworkConfig import NetworkConfig
+
+pid_path = "pids"  # directory of the pidfiles of running VPN daemons
+
+
+class ProcessSupervisor:
+    """
+    Starts the daemon of a VPN and stops it again. The daemon gets its own process group, so stopping it also stops
+    the processes it started. Stopping sends SIGTERM, waits a bounded time for the exit and only sends SIGKILL if the
+    daemon did not end in time. The exit is awaited with a pidfd if the system supports it, so no polling is needed.
+    The process ID is written to a pidfile, so a daemon left behind by an aborted run is stopped by the next run,
+    without searching the process list by name. Daemons started by the privileged helper are stopped by the helper
+    when the run ends, so they need no pidfile.
+    """
+
+    def __init__(self, name, helper=None) -> None:
+        """
+        :param name: name of the daemon, used for the pidfile and messages
+        :param helper: privileged helper starting the daemon, None for starting it directly
+        """
+        self.name = name
+        self.helper = helper
+        self.pidfile = os.path.join(pid_path, f"{name}.pid")
+        self.process = None
+        self.pidfd = None
+
+    def start(self, command_name, parameters):
+        """
+        Stops a daemon that is still running or left behind, then starts the new one in its own process group.
+        :param command_name: name of the fixed command of the daemon, see src/vpns/DaemonCommands.py
+        :param parameters: dictionary of the parameters of the command
+        :return: process of the daemon, with its output readable from stdout
+        """
+        self.stop()
+        self.__stop_stale()
+
+        if self.helper:
+            self.process = self.helper.start_daemon(command_name, parameters)
+            return self.process
+
+        command = build_command(command_name, parameters)
+        if os.geteuid() != 0:
+            command = ["sudo"] + command
+
+        self.process = subprocess.Popen(
+            command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True
+        )
+        self.pidfd = open_pidfd(self.process.pid)
+        self.__write_pidfile()
+
+        return self.process
+
+    def stop(self, timeout=2.0):
+        """
+        Stops the daemon: SIGTERM to its process group, SIGKILL if it did not end within the timeout.
+        :param timeout: time in seconds the daemon gets for ending after SIGTERM
+        :return: time in seconds until the daemon ended (its shutdown latency), None if no daemon was started
+        """
+        if not self.process:
+            return None
+
+        start = time.monotonic()
+        if self.process.poll() is None:
+            self.__signal(signal.SIGTERM)
+            if not self.__wait(timeout):
+                messages.print_warn(f"{self.name} did not end within {timeout} seconds, killing it.")
+                self.__signal(signal.SIGKILL)
+                self.__wait(timeout)
+        latency = time.monotonic() - start
+
+        if self.pidfd is not None:
+            os.close(self.pidfd)
+            self.pidfd = None
+        if not self.helper and os.path.exists(self.pidfile):
+            os.remove(self.pidfile)
+        self.process = None
+
+        return latency
+
+    def __signal(self, signal_number) -> None:
+        """
+        Sends a signal to the process group of the daemon, see __signal_group().
+        :param signal_number: number of the signal
+        """
+        if self.helper:  # the helper signals the process group
+            self.process.send_signal(signal_number)
+            return
+
+        self.__signal_group(self.process.pid, signal_number)
+
+    @staticmethod
+    def __signal_group(pid, signal_number) -> None:
+        """
+        Sends a signal to a process group. A group started behind 'sudo' by a user without root rights belongs to root,
+        so it is signaled with 'sudo kill' instead. A group that ended already is ignored.
+        :param pid: process ID of the leader of the group
+        :param signal_number: number of the signal
+        """
+        try:
+            os.killpg(pid, signal_number)
+        except ProcessLookupError:
+            pass  # daemon ended already
+        except PermissionError:
+            try:
+                subprocess.run(
+                    ["sudo", "kill", f"-{int(signal_number)}", "--", f"-{pid}"],
+                    check=True,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                )
+            except subprocess.CalledProcessError as err:
+                if psutil.pid_exists(pid):
+                    messages.print_warn(f"Unable to signal process group {pid}: {err.stderr.decode().strip()}")
+            except OSError as err:
+                messages.print_warn(f"Unable to signal process group {pid}: {err=}")
+
+    def __wait(self, timeout) -> bool:
+        """
+        Waits until the daemon ended.
+        :param timeout: maximum time to wait in seconds
+        :return: True if the daemon ended, False otherwise
+        """
+        if self.pidfd is not None and not select.select([self.pidfd], [], [], timeout)[0]:
+            return False
+
+        try:
+            self.process.wait(timeout)
+            return True
+        except subprocess.TimeoutExpired:
+            return False
+
+    def __write_pidfile(self) -> None:
+        """
+        Writes the process ID and the start time of the daemon to the pidfile. The start time tells apart a reused
+        process ID.
+        """
+        try:
+            create_time = psutil.Process(self.process.pid).create_time()
+            os.makedirs(pid_path, exist_ok=True)
+            with open(self.pidfile, "w") as file:
+                file.write(f"{self.process.pid} {create_time}\n")
+        except (OSError, psutil.Error) as err:
+            messages.print_warn(f"Unable to write pidfile of {self.name}: {err=}")
+
+    def __stop_stale(self) -> None:
+        """
+        Stops the daemon of the pidfile if it is still running, like after an aborted run, and removes the pidfile.
+        """
+        if not os.path.exists(self.pidfile):
+            return
+
+        try:
+            with open(self.pidfile) as file:
+                pid, create_time = file.read().split()
+            process = psutil.Process(int(pid))
+            if abs(process.create_time() - float(create_time)) < 0.01:
+                messages.print_warn(f"Stopping {self.name} left behind by an earlier run (PID {pid}).")
+                self.__signal_group(process.pid, signal.SIGTERM)
+                if psutil.wait_procs([process], timeout=2.0)[1]:
+                    self.__signal_group(process.pid, signal.SIGKILL)
+        except (OSError, ValueError, psutil.Error):
+            pass  # daemon ended already
+
+        os.remove(self.pidfile)
 
 
 class VPN:
     """
     Base class for VPNs. To add a new VPN type, a class must inherit from VPN.
     """
+    process = None  # process of the VPN daemon, if the VPN uses one
 
     def __init__(self, role) -> None:
         """
@@ -22,6 +196,11 @@ class VPN:
 
         self.interface_name = None
         self.open_server_address = self.hosts.server_address
+        self.spans = []  # finished phases of the current opening or closing, see span()
+        self.helper = get_helper()  # privileged helper of the run, None if not started
+        self.network = self.helper or NetworkConfig()  # configures interfaces, addresses and routes
+        self.supervisor = ProcessSupervisor(type(self).__name__, self.helper)
+        self.shutdown_latency = None  # time in seconds the daemon needed for ending when it was stopped last
 
         if role not in ("server", "client"):
             messages.print_err(
@@ -47,6 +226,15 @@ class VPN:
         messages.print_err("VPN.close(self): NOT IMPLEMENTED")
         raise NotImplementedError
 
+    def wait_ready(self, timeout=10.0):
+        """
+        Blocks until the VPN is usable, meaning the handshake with the other host has completed. Base implementation
+        returns at once, for VPNs that are usable as soon as they are opened.
+        :param timeout: maximum time to wait in seconds
+        :return: time in seconds until the handshake was detected, None if there was no handshake within the timeout
+        """
+        return 0.0
+
     def generate_keys(self):
         """
         Generates the keys needed for a VPN exchange. Implementation is done in inheriting classes.
@@ -63,3 +251,85 @@ class VPN:
         """
         messages.print_err("VPN.share_pubkeys(self, remote_path): NOT IMPLEMENTED")
         raise NotImplementedError
+
+    @contextlib.contextmanager
+    def span(self, phase):
+        """
+        Measures one phase of opening or closing the VPN, like starting the daemon or assigning the IP address. Used as
+        context manager around the commands of the phase, the monotonic start and end times are kept until
+        pop_spans() is called.
+        :param phase: short name of the phase, like 'daemon'
+        """
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.spans.append((phase, start, time.monotonic()))
+
+    def pop_spans(self) -> dict:
+        """
+        Returns the phases measured since the last call and forgets them. Phases that happened more than once are
+        added up.
+        :return: dictionary of the duration of every phase in seconds and, as '{phase}_start', the time of its first
+        start in seconds after the start of the first phase, empty if no phase was measured
+        """
+        spans, self.spans = self.spans, []
+        if not spans:
+            return {}
+
+        first_start = min(start for _, start, _ in spans)
+        result = {}
+        for phase, start, end in spans:
+            result[phase] = result.get(phase, 0.0) + end - start
+            result.setdefault(f"{phase}_start", start - first_start)
+
+        return result
+
+    def start_daemon(self, command_name, parameters):
+        """
+        Starts a VPN daemon as root, see ProcessSupervisor. Uses the privileged helper if it is running, so no 'sudo'
+        process is started and the process ID is the one of the daemon. Otherwise, the daemon is started directly if the
+        framework runs as root, or behind 'sudo'. Daemons are only started from the fixed commands of
+        src/vpns/DaemonCommands.py.
+        :param command_name: name of the command, like 'wg-set'
+        :param parameters: dictionary of the parameters of the command, like {'interface': 'wg0', ...}
+        :return: process of the daemon, with its output readable from stdout
+        """
+        return self.supervisor.start(command_name, parameters)
+
+    def stop_daemon(self, timeout=2.0):
+        """
+        Stops the VPN daemon gracefully, see ProcessSupervisor.stop(), and keeps its shutdown latency.
+        :param timeout: time in seconds the daemon gets for ending before it is killed
+        :return: time in seconds until the daemon ended, None if no daemon was running
+        """
+        self.shutdown_latency = self.supervisor.stop(timeout)
+        self.process = None
+        return self.shutdown_latency
+
+    def get_process_ids(self) -> list:
+        """
+        Returns the IDs of the running processes of the VPN, used for monitoring their resource usage. Children of
+        these processes (like the daemon started behind 'sudo' without the privileged helper) are followed by the
+        monitoring.
+        :return: list of process IDs, empty if no process is running
+        """
+        if self.process and self.process.poll() is None:
+            return [self.process.pid]
+
+        return []
+
+
+def open_pidfd(pid):
+    """
+    Opens a pidfd for a process, which becomes readable when the process ends.
+    :param pid: process ID
+    :return: file descriptor, None if pidfds are not supported
+    """
+    if not hasattr(os, "pidfd_open"):
+        return None
+
+    try:
+        return os.pidfd_open(pid)
+    except OSError:
+        return None
@@ -1,6 +1,5 @@
 import os
 import shutil
-import signal
 import subprocess
 
 import click
@@ -35,36 +34,21 @@ class WireGuard(VPN):
         :return: True for success, False otherwise
         """
         messages.print_log("Preparing...")
-        self.__clean_up()  # close existing WireGuard processes
+        with self.span("cleanup"):
+            self.__clean_up()  # close existing WireGuard processes
 
-        try: # Delete old WiregGuard interface and create a new Wireguard interface
-            subprocess.run(
-                ["sudo","ip", "link", "del", "wg0"],
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-            subprocess.run(
-                ["sudo","ip", "link", "add", "wg0", "type", "wireguard"],
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-        except: # Old interfaces does not exist: Create WireGuard interface
-            subprocess.run(
-                ["sudo","ip", "link", "add", "wg0", "type", "wireguard"],
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
+        with self.span("interface"):  # delete an old WireGuard interface and create a new one
+            if not (self.network.delete_link("wg0") and self.network.add_link("wg0", "wireguard")):
+                return False
 
         messages.print_log("Starting key exchange processes...")
-        if self.role == "server":
-            self.process = self.__start_wg_key_exchange_on_server()
-        elif self.role == "client":
-            self.process = self.__start_wg_key_exchange_on_client()
-        else:
-            raise Exception("Unexpected role")
+        with self.span("daemon"):
+            if self.role == "server":
+                self.process = self.__start_wg_key_exchange_on_server()
+            elif self.role == "client":
+                self.process = self.__start_wg_key_exchange_on_client()
+            else:
+                raise Exception("Unexpected role")
 
         if not self.process:  # Process was not opened correctly
             return False
@@ -82,10 +66,23 @@ class WireGuard(VPN):
         Closes the WireGuard VPN after cleanup.
         :return: True for success
         """
-        self.__clean_up()
+        with self.span("cleanup"):
+            self.__clean_up()
         messages.print_log("WireGuard connection closed.")
         return True
 
+    def wait_ready(self, timeout=10.0):
+        """
+        Waits until 'wg show wg0 latest-handshakes' reports a handshake. The client sends datagrams to the server's
+        tunnel address, since WireGuard only starts a handshake when there is traffic.
+        :param timeout: maximum time to wait in seconds
+        :return: time in seconds until the handshake was detected, None if there was no handshake within the timeout
+        """
+        trigger_address = self.open_server_address if self.role == "client" else None
+
+        with self.span("handshake"):
+            return helpers.wait_for_handshake("wg0", trigger_address, timeout)
+
     def generate_keys(self) -> bool:
         """
         Generates the necessary keys for WireGuard. Creates or uses existing wg-keys directory,
@@ -204,25 +201,16 @@ class WireGuard(VPN):
         client_pk = open(client_pk_dir).readline().strip() # Contains the wg-public-key, strip() to remove whitespaces
 
         try: # Set WireGuard configuration and start key exchange
-            process = subprocess.Popen(
-                [
-                    "sudo",
-                    "wg",
-                    "set",
-                    "wg0",
-                    "listen-port",
-                    f"{opening_port}",
-                    "private-key",
-                    f"{server_sk_dir}",
-                    "peer",
-                    f"{client_pk}",                      
-                    "allowed-ips",
-                    "10.0.0.2/32",
-                    "endpoint",
-                    f"{self.hosts.client_address}:{opening_port}",    
-                ],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+            process = self.start_daemon(
+                "wg-set",
+                {
+                    "interface": "wg0",
+                    "port": opening_port,
+                    "private_key": server_sk_dir,
+                    "public_key": client_pk,
+                    "allowed_ips": "10.0.0.2/32",
+                    "endpoint": f"{self.hosts.client_address}:{opening_port}",
+                },
             )
     
         except Exception as err:
@@ -245,25 +233,16 @@ class WireGuard(VPN):
         server_pk = open(server_pk_dir).readline().strip() # Contains the wg-public-key
 
         try: # Set WireGuard configuration and start key exchange
-            process = subprocess.Popen(
-                [
-                    "sudo",
-                    "wg",
-                    "set",
-                    "wg0",
-                    "listen-port",
-                    f"{opening_port}",
-                    "private-key",
-                    client_sk_dir,  # client secret key
-                    "peer",
-                    server_pk,  # server public key
-                    "allowed-ips",
-                    "10.0.0.1/32",
-                    "endpoint",
-                    f"{self.hosts.server_address}:{opening_port}",    
-                ],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+            process = self.start_daemon(
+                "wg-set",
+                {
+                    "interface": "wg0",
+                    "port": opening_port,
+                    "private_key": client_sk_dir,  # client secret key
+                    "public_key": server_pk,  # server public key
+                    "allowed_ips": "10.0.0.1/32",
+                    "endpoint": f"{self.hosts.server_address}:{opening_port}",
+                },
             )
 
         except Exception as err:
@@ -277,8 +256,7 @@ class WireGuard(VPN):
     def __assign_ip_addr_to_interface(self) -> bool:
         """
         Assigns the IP address 'fe80::1' to the server or 'fe80::2' to the client interface. Interface has to exist.
-        Attempts multiple times, since the interface might not be ready for the first few tries. Flushes the
-        interface after invalid attempt.
+        Configures the interface in one batch.
         :return: True for success, False otherwise
         """
 
@@ -289,76 +267,20 @@ class WireGuard(VPN):
         else:
             return False
 
-        j = 1000  # number of attempts
-        while j > 0:
-            try:
-                subprocess.check_output(
-                    [
-                        "sudo",
-                        "ip",
-                        "addr",
-                        "add",
-                        f"10.0.0.{number}/32",
-                        "dev",
-                        "wg0",
-                    ],
-                    stderr=subprocess.PIPE,
-                )
-                break
-            except subprocess.CalledProcessError:
-                # flushes the interface for the case in which 'RTNETLINK answers: File exists error' occurs
-                subprocess.run(
-                    ["sudo", "ip", "addr", "flush", "dev", "wg0"],
-                    stderr=subprocess.PIPE,
-                    stdout=subprocess.PIPE,
-                )
-                j -= 1
-            except Exception as err:
-                print(f"{err=}")
+        with self.span("configure"):
+            self.network.begin()
+            self.network.set_address("wg0", f"10.0.0.{number}", 32)
+            self.network.set_link_up("wg0")
+            self.network.set_route("10.0.0.0/24", "wg0")
+            if not self.network.commit():
                 return False
 
-        # if adding an IP address failed
-        if j == 0:
-            messages.print_err(
-                f"Too many attempts assigning IP address! Please try again."
-            )
-            return False
-        
-
-        # Bring up the interface
-        subprocess.run(
-            ["sudo", "ip", "link", "set", "wg0", "up"],
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
-        
-        try:
-            # Add WireGuard to route table
-            subprocess.run(
-                ["sudo", "ip", "route", "add", "10.0.0.0/24", "dev", "wg0"],
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-        except: # Wirguard was already added to the route table
-            pass
-            
-
         return True
 
     def __clean_up(self):
         """
-        Terminates all running WireGuard processes.
+        Stops the WireGuard configuration process if it is still running, see VPN.stop_daemon(). No shutdown latency is
+        kept: 'wg set' is a one-shot command, not a daemon, so the time it needs for ending is no cost of the VPN.
         """
-        if self.process:
-            self.process.kill()
-
-        try:
-            for line in os.popen("ps ax | grep wireguard | grep -v grep"):
-                fields = line.split()
-                if "main.py" not in line:
-                    pid = fields[0]
-                    os.kill(int(pid), signal.SIGKILL)
-        except Exception as err:  # no WireGuard processes running
-            return
+        self.stop_daemon()
+        self.shutdown_latency = None